@@ -8,6 +8,20 @@ class Settings:
     # AI Provider Configuration
     AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini")  # Default: "gemini" (120x cheaper than OpenAI)
     AI_MODEL = os.getenv("AI_MODEL", "gemini-1.5-flash")  # Default: gemini-1.5-flash (faster & supports vision)
+    AI_TEXT_MODEL = os.getenv("AI_TEXT_MODEL")  # Optional cheaper Gemini model for text-only questions (defaults to AI_MODEL)
+    
+    # Solve Pipeline Configuration
+    PROVIDER_MAX_CONCURRENCY = int(os.getenv("PROVIDER_MAX_CONCURRENCY", 8))  # Provider calls in flight per worker, shared fairly by problem
+    # Shares of freed provider slots and slots held back per priority class (interactive, batch, speculative)
+    PROVIDER_PRIORITY_WEIGHTS = os.getenv("PROVIDER_PRIORITY_WEIGHTS", "interactive:6,batch:3,speculative:1")
+    PROVIDER_PRIORITY_RESERVATIONS = os.getenv("PROVIDER_PRIORITY_RESERVATIONS", "interactive:1")
+    BATCH_SOLVE_MAX_PROBLEMS = int(os.getenv("BATCH_SOLVE_MAX_PROBLEMS", 100))  # Problems per /homework/solve-batch request
+    SOLVE_MODE = os.getenv("SOLVE_MODE", "vision").lower()  # "vision" or "hybrid" (OCR first, vision only when needed)
+    HYBRID_MIN_OCR_CONFIDENCE = float(os.getenv("HYBRID_MIN_OCR_CONFIDENCE", 0.80))  # Pages below this are escalated
+    # Cost/latency model used for the hybrid pipeline report
+    VISION_PAGE_COST_USD = float(os.getenv("VISION_PAGE_COST_USD", 0.002))
+    TEXT_QUESTION_COST_USD = float(os.getenv("TEXT_QUESTION_COST_USD", 0.0002))
+    VISION_PAGE_LATENCY_SECONDS = float(os.getenv("VISION_PAGE_LATENCY_SECONDS", 6.0))  # Used until a page is measured
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -18,6 +32,26 @@ class Settings:
     # Firebase Configuration (Firestore only)
     FIREBASE_SERVICE_ACCOUNT_PATH = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH")
     
+    # Storage Backend Configuration
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()  # "firestore", "sqlite" or "mock"
+    SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/homework.sqlite3")  # Relative to the backend directory
+    
+    # Firestore Client Configuration (native async client; one gRPC channel per pooled client)
+    FIRESTORE_CHANNEL_POOL_SIZE = int(os.getenv("FIRESTORE_CHANNEL_POOL_SIZE", 1))
+    
+    # Firestore Write-Behind Configuration (buffer writes and commit them in batches)
+    FIRESTORE_WRITE_BEHIND_ENABLED = os.getenv("FIRESTORE_WRITE_BEHIND_ENABLED", "False").lower() == "true"
+    FIRESTORE_WRITE_BATCH_SIZE = int(os.getenv("FIRESTORE_WRITE_BATCH_SIZE", 100))  # Max 500 per Firestore batch
+    FIRESTORE_WRITE_FLUSH_INTERVAL_MS = int(os.getenv("FIRESTORE_WRITE_FLUSH_INTERVAL_MS", 50))
+    
+    # Homework Record Cache Configuration (in-process read-through cache for get_homework_problem)
+    # Off by default: each worker has its own cache, so with several workers a record
+    # updated elsewhere can be served stale for up to the TTL
+    HOMEWORK_CACHE_ENABLED = os.getenv("HOMEWORK_CACHE_ENABLED", "False").lower() == "true"
+    HOMEWORK_CACHE_TTL_SECONDS = float(os.getenv("HOMEWORK_CACHE_TTL_SECONDS", 2))
+    HOMEWORK_CACHE_MAX_ENTRIES = int(os.getenv("HOMEWORK_CACHE_MAX_ENTRIES", 1000))
+    HOMEWORK_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("HOMEWORK_CACHE_NEGATIVE_TTL_SECONDS", 0))  # 0 disables caching missing IDs
+    
     # Local File Storage Configuration
     UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
     
@@ -26,11 +60,69 @@ class Settings:
     PORT = int(os.getenv("PORT", 8000))
     HOST = os.getenv("HOST", "0.0.0.0")
     
+    # Warm-up Configuration (prime SDK clients, connections and OCR before reporting ready)
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "False").lower() == "true"
+    WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", 30))
+    
     # Tesseract Configuration
     TESSERACT_CMD = os.getenv("TESSERACT_CMD", "/usr/bin/tesseract")
     
+    # Response Compression (gzip for JSON bodies above the threshold)
+    GZIP_ENABLED = os.getenv("GZIP_ENABLED", "True").lower() == "true"
+    GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 1024))  # Bytes; smaller responses are sent as-is
+    
     # File Upload Configuration
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10 * 1024 * 1024))  # 10MB default
     TEMP_DIR = os.getenv("TEMP_DIR", "/tmp")
+    BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", 200))  # Files per bulk upload, counting ZIP entries
+    BULK_UPLOAD_MAX_ARCHIVE_SIZE = int(os.getenv("BULK_UPLOAD_MAX_ARCHIVE_SIZE", 200 * 1024 * 1024))  # 200MB default
+    BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", 8))  # Files staged and stored at once
+    
+    # Upload Derivatives Configuration (page rasters and vision images prepared in the background at upload)
+    DERIVATIVES_ENABLED = os.getenv("DERIVATIVES_ENABLED", "True").lower() == "true"
+    DERIVATIVE_RASTER_DPI = int(os.getenv("DERIVATIVE_RASTER_DPI", 200))  # Matches the OCR rasterization resolution
+    DERIVATIVE_VISION_MAX_SIDE = int(os.getenv("DERIVATIVE_VISION_MAX_SIDE", 2048))  # Pixels
+    DERIVATIVE_VISION_JPEG_QUALITY = int(os.getenv("DERIVATIVE_VISION_JPEG_QUALITY", 85))
+    DERIVATIVE_WAIT_TIMEOUT_SECONDS = float(os.getenv("DERIVATIVE_WAIT_TIMEOUT_SECONDS", 30))  # Solve waits this long for in-flight generation
+    
+    # Storage Cleanup Configuration (deleted uploads are removed in the background)
+    RETENTION_SWEEP_ENABLED = os.getenv("RETENTION_SWEEP_ENABLED", "False").lower() == "true"
+    HOMEWORK_RETENTION_DAYS = float(os.getenv("HOMEWORK_RETENTION_DAYS", 0))  # 0 keeps homework forever (orphans are still swept)
+    RETENTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("RETENTION_SWEEP_INTERVAL_SECONDS", 3600))
+    RETENTION_SWEEP_BATCH_SIZE = int(os.getenv("RETENTION_SWEEP_BATCH_SIZE", 100))
+    RETENTION_SWEEP_BATCH_PAUSE_SECONDS = float(os.getenv("RETENTION_SWEEP_BATCH_PAUSE_SECONDS", 1))
+    ORPHAN_GRACE_SECONDS = float(os.getenv("ORPHAN_GRACE_SECONDS", 3600))  # Younger files may belong to uploads in progress
+    
+    # Solve Coordination (one solve per problem and per identical upload, across workers)
+    SOLVE_LEASE_SECONDS = float(os.getenv("SOLVE_LEASE_SECONDS", 300))  # A "processing" status older than this is taken over
+    SOLVE_LEASE_POLL_SECONDS = float(os.getenv("SOLVE_LEASE_POLL_SECONDS", 2))  # How often to check another worker's solve
+    
+    # Solve Admission Control (shed load instead of letting every solve slow down)
+    SOLVE_MAX_CONCURRENT = int(os.getenv("SOLVE_MAX_CONCURRENT", 16))  # Solves running per worker; 0 disables admission control
+    SOLVE_MAX_QUEUE = int(os.getenv("SOLVE_MAX_QUEUE", 32))  # Solve requests waiting for a slot; more are rejected with 503
+    SOLVE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("SOLVE_QUEUE_TIMEOUT_SECONDS", 30))  # Longest wait for a slot before a 503
+    SOLVE_MIN_RETRY_AFTER_SECONDS = int(os.getenv("SOLVE_MIN_RETRY_AFTER_SECONDS", 1))  # Floor of the Retry-After estimate
+    # Batch solves have their own slots, shared by all /homework/solve-batch requests, and wait longer
+    BATCH_SOLVE_MAX_CONCURRENT = int(os.getenv("BATCH_SOLVE_MAX_CONCURRENT", 4))  # Batch solves running per worker; 0 disables the cap
+    BATCH_SOLVE_MAX_QUEUE = int(os.getenv("BATCH_SOLVE_MAX_QUEUE", 200))  # Batch solves waiting for a slot; more are rejected
+    BATCH_SOLVE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BATCH_SOLVE_QUEUE_TIMEOUT_SECONDS", 600))  # Longest wait for a batch slot
+    
+    # Speculative Solve Configuration (start solving at upload; the solve request attaches to it)
+    SPECULATIVE_SOLVE_ENABLED = os.getenv("SPECULATIVE_SOLVE_ENABLED", "False").lower() == "true"
+    SPECULATIVE_SOLVE_MAX_CONCURRENCY = int(os.getenv("SPECULATIVE_SOLVE_MAX_CONCURRENCY", 2))  # Per worker
+    SPECULATIVE_SOLVE_TTL_SECONDS = float(os.getenv("SPECULATIVE_SOLVE_TTL_SECONDS", 600))  # Unclaimed results are discarded
+    
+    # OCR Configuration
+    OCR_LAYOUT_ENABLED = os.getenv("OCR_LAYOUT_ENABLED", "True").lower() == "true"  # Segment pages into regions before OCR
+    OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", min(4, os.cpu_count() or 1)))  # Concurrent Tesseract processes
+    OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "True").lower() == "true"
+    OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", "cache/ocr_cache.sqlite3")  # Relative to the backend directory
+    OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", 10000))  # Pages
+    OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 256MB default
+    
+    # PDF Text Layer Configuration (born-digital PDFs skip rasterization and OCR)
+    PDF_TEXT_LAYER_ENABLED = os.getenv("PDF_TEXT_LAYER_ENABLED", "True").lower() == "true"
+    PDF_TEXT_LAYER_MIN_CHARS = int(os.getenv("PDF_TEXT_LAYER_MIN_CHARS", 20))  # Alphanumerics needed to trust a page
+    PDF_TEXT_LAYER_TIMEOUT_SECONDS = int(os.getenv("PDF_TEXT_LAYER_TIMEOUT_SECONDS", 10))
 
 settings = Settings()
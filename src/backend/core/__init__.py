@@ -1 +1,5 @@
 # Core application components
+import time
+
+# Reference point for the startup-time report (core is imported before the app is built)
+STARTED_AT = time.perf_counter()
@@ -6,7 +6,9 @@ Creates and configures the FastAPI application with all middleware and routes.
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
+from config.config import settings
 from core.lifespan import lifespan
 
 def create_app() -> FastAPI:
@@ -35,8 +37,14 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Browser clients page through /homework with this header
+        expose_headers=["X-Next-Cursor"],
     )
     
+    # Compress large JSON responses (solutions) for clients that accept gzip
+    if settings.GZIP_ENABLED:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+    
     # Include route handlers
     from routes.health import router as health_router
     from routes.providers import router as providers_router
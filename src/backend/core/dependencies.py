@@ -4,30 +4,152 @@ Service dependencies for the Mathematics Homework Solver API
 This module provides singleton instances of all services used throughout the application.
 """
 
-from services.firebase_service import FirebaseService
-from services.ocr_service import OCRService
-from services.math_solver_service import MathSolverService
-from utils.file_utils import FileUtils
+import threading
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from services.admission_controller import AdmissionController
+    from services.firebase_service import FirebaseService
+    from services.ocr_service import OCRService
+    from services.math_solver_service import MathSolverService
+    from services.derivative_service import DerivativeService
+    from services.solve_coordinator import SolveCoordinator
+    from services.storage_cleanup_service import StorageCleanupService
+    from utils.file_utils import FileUtils
 
 # Singleton service instances
-# These are created once and reused throughout the application
-firebase_service = FirebaseService()
-ocr_service = OCRService()
-math_solver_service = MathSolverService()
-file_utils = FileUtils()
+# These are created on first use (not at import) and reused throughout the application,
+# so a worker only pays for the SDKs and subprocesses of the services it actually uses
+_firebase_service = None
+_ocr_service = None
+_math_solver_service = None
+_derivative_service = None
+_solve_coordinator = None
+_storage_cleanup_service = None
+_admission_controller = None
+_batch_admission_controller = None
+_file_utils = None
+_lock = threading.RLock()
 
-def get_firebase_service() -> FirebaseService:
+def get_firebase_service() -> "FirebaseService":
     """Get the Firebase service instance"""
-    return firebase_service
+    global _firebase_service
+    if _firebase_service is None:
+        with _lock:
+            if _firebase_service is None:
+                from services.firebase_service import FirebaseService
+                _firebase_service = FirebaseService()
+    return _firebase_service
 
-def get_ocr_service() -> OCRService:
+def get_ocr_service() -> "OCRService":
     """Get the OCR service instance"""
-    return ocr_service
+    global _ocr_service
+    if _ocr_service is None:
+        with _lock:
+            if _ocr_service is None:
+                from services.ocr_service import OCRService
+                _ocr_service = OCRService()
+    return _ocr_service
 
-def get_math_solver_service() -> MathSolverService:
+def get_math_solver_service() -> "MathSolverService":
     """Get the math solver service instance"""
-    return math_solver_service
+    global _math_solver_service
+    if _math_solver_service is None:
+        with _lock:
+            if _math_solver_service is None:
+                from services.math_solver_service import MathSolverService
+                _math_solver_service = MathSolverService(
+                    ocr_service_factory=get_ocr_service,
+                    derivative_service_factory=get_derivative_service
+                )
+    return _math_solver_service
+
+def get_derivative_service() -> "DerivativeService":
+    """Get the upload derivative service instance"""
+    global _derivative_service
+    if _derivative_service is None:
+        with _lock:
+            if _derivative_service is None:
+                from services.derivative_service import DerivativeService
+                _derivative_service = DerivativeService()
+    return _derivative_service
+
+def get_solve_coordinator() -> "SolveCoordinator":
+    """Get the solve coordinator instance"""
+    global _solve_coordinator
+    if _solve_coordinator is None:
+        with _lock:
+            if _solve_coordinator is None:
+                from services.solve_coordinator import SolveCoordinator
+                _solve_coordinator = SolveCoordinator(
+                    math_solver_factory=get_math_solver_service,
+                    firebase_service_factory=get_firebase_service
+                )
+    return _solve_coordinator
+
+def get_storage_cleanup_service() -> "StorageCleanupService":
+    """Get the storage cleanup service instance"""
+    global _storage_cleanup_service
+    if _storage_cleanup_service is None:
+        with _lock:
+            if _storage_cleanup_service is None:
+                from services.storage_cleanup_service import StorageCleanupService
+                _storage_cleanup_service = StorageCleanupService(firebase_service_factory=get_firebase_service)
+    return _storage_cleanup_service
 
-def get_file_utils() -> FileUtils:
+def get_admission_controller() -> "AdmissionController":
+    """Get the solve admission controller instance"""
+    global _admission_controller
+    if _admission_controller is None:
+        with _lock:
+            if _admission_controller is None:
+                from config.config import settings
+                from services.admission_controller import AdmissionController
+                _admission_controller = AdmissionController(
+                    max_concurrent=settings.SOLVE_MAX_CONCURRENT,
+                    max_queue=settings.SOLVE_MAX_QUEUE,
+                    queue_timeout=settings.SOLVE_QUEUE_TIMEOUT_SECONDS,
+                    min_retry_after=settings.SOLVE_MIN_RETRY_AFTER_SECONDS
+                )
+    return _admission_controller
+
+def get_batch_admission_controller() -> "AdmissionController":
+    """Get the admission controller for batch solves (separate slots, so bulk work cannot crowd out students)"""
+    global _batch_admission_controller
+    if _batch_admission_controller is None:
+        with _lock:
+            if _batch_admission_controller is None:
+                from config.config import settings
+                from services.admission_controller import AdmissionController
+                _batch_admission_controller = AdmissionController(
+                    max_concurrent=settings.BATCH_SOLVE_MAX_CONCURRENT,
+                    max_queue=settings.BATCH_SOLVE_MAX_QUEUE,
+                    queue_timeout=settings.BATCH_SOLVE_QUEUE_TIMEOUT_SECONDS,
+                    min_retry_after=settings.SOLVE_MIN_RETRY_AFTER_SECONDS
+                )
+    return _batch_admission_controller
+
+def get_file_utils() -> "FileUtils":
     """Get the file utilities instance"""
-    return file_utils
+    global _file_utils
+    if _file_utils is None:
+        with _lock:
+            if _file_utils is None:
+                from utils.file_utils import FileUtils
+                _file_utils = FileUtils()
+    return _file_utils
+
+def get_constructed_services() -> List[str]:
+    """Names of the services that have been created so far"""
+    services = {
+        "firebase": _firebase_service,
+        "ocr": _ocr_service,
+        "math_solver": _math_solver_service,
+        "derivatives": _derivative_service,
+        "solve_coordinator": _solve_coordinator,
+        "storage_cleanup": _storage_cleanup_service,
+        "admission": _admission_controller,
+        "batch_admission": _batch_admission_controller,
+        "file_utils": _file_utils,
+    }
+    return [name for name, service in services.items() if service is not None]
@@ -4,10 +4,35 @@ Application lifespan management
 Handles startup and shutdown events for the FastAPI application.
 """
 
+import sys
+import time
 from contextlib import asynccontextmanager
+from typing import Any, Dict
 from fastapi import FastAPI
 
-from core.dependencies import get_firebase_service, get_math_solver_service
+from core import STARTED_AT
+from core.dependencies import (
+    get_constructed_services,
+    get_firebase_service,
+    get_solve_coordinator,
+    get_storage_cleanup_service
+)
+from core.warmup import warm_up
+from config.config import settings
+
+# Modules that dominate import time; the startup report shows which were loaded
+HEAVY_MODULES = ["cv2", "pytesseract", "pdf2image", "google.generativeai", "openai", "firebase_admin"]
+
+def build_startup_report(lifespan_started_at: float) -> Dict[str, Any]:
+    """Summarize how long startup took and what it loaded"""
+    now = time.perf_counter()
+    return {
+        "import_seconds": lifespan_started_at - STARTED_AT,
+        "lifespan_seconds": now - lifespan_started_at,
+        "total_seconds": now - STARTED_AT,
+        "services_constructed": get_constructed_services(),
+        "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -18,16 +43,30 @@ async def lifespan(app: FastAPI):
     This replaces the deprecated @app.on_event("startup") and @app.on_event("shutdown") decorators.
     """
     # Startup
+    lifespan_started_at = time.perf_counter()
     print("🚀 Starting Mathematics Homework Solver API...")
     
-    # Initialize Firebase service
-    firebase_service = get_firebase_service()
-    firebase_service.initialize()
+    # Services (Firestore, AI provider, OCR) are created on first use, or now if warm-up is enabled
+    print(f"🤖 Configured AI provider: {settings.AI_PROVIDER} (initialized on first use)")
+    
+    warmup_report = {"enabled": False}
+    if settings.WARMUP_ENABLED:
+        print("🔥 Warming up services...")
+        warmup_report = await warm_up(settings.WARMUP_TIMEOUT_SECONDS)
+        for name, step in warmup_report["steps"].items():
+            print(f"   {name}: {step['status']} ({step['seconds'] * 1000:.0f} ms)")
+    app.state.warmup_report = warmup_report
+    
+    if settings.RETENTION_SWEEP_ENABLED:
+        get_storage_cleanup_service().start()
     
-    # Show which AI provider is being used
-    math_solver_service = get_math_solver_service()
-    provider_name = math_solver_service.provider.provider_name
-    print(f"🤖 Initialized Math Solver with {provider_name} provider")
+    startup_report = build_startup_report(lifespan_started_at)
+    app.state.startup_report = startup_report
+    print(f"⏱️  Startup took {startup_report['total_seconds'] * 1000:.0f} ms "
+          f"(imports {startup_report['import_seconds'] * 1000:.0f} ms, "
+          f"lifespan {startup_report['lifespan_seconds'] * 1000:.0f} ms)")
+    print(f"   Services constructed: {', '.join(startup_report['services_constructed']) or 'none'}")
+    print(f"   Heavy modules loaded: {', '.join(startup_report['heavy_modules_loaded']) or 'none'}")
     
     print("✅ Application startup complete!")
     
@@ -35,5 +74,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down Mathematics Homework Solver API...")
-    # Add any cleanup logic here if needed
+    # Abandon speculative solves and finish queued file removals, then commit any
+    # buffered Firestore writes before the worker exits
+    if "solve_coordinator" in get_constructed_services():
+        await get_solve_coordinator().close()
+    if "storage_cleanup" in get_constructed_services():
+        await get_storage_cleanup_service().close()
+    if "firebase" in get_constructed_services():
+        await get_firebase_service().close()
     print("✅ Application shutdown complete!")
@@ -0,0 +1,72 @@
+"""
+Application warm-up
+
+Primes the slow first-use paths (SDK clients, TLS and gRPC connections,
+Tesseract and OpenCV initialization) before the application reports ready,
+so the first request is served at steady-state latency.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from core.dependencies import get_firebase_service, get_math_solver_service, get_ocr_service
+
+async def _warm_firestore() -> Dict[str, Any]:
+    """Connect to Firestore and touch a document"""
+    return await get_firebase_service().warm_up()
+
+async def _warm_ai_provider() -> Dict[str, Any]:
+    """Create the AI provider (imports its SDK) and open a connection to its API"""
+    loop = asyncio.get_event_loop()
+    math_solver_service = await loop.run_in_executor(None, get_math_solver_service)
+    result = await math_solver_service.provider.warm_up()
+    return {"provider": math_solver_service.provider.provider_name, **result}
+
+async def _warm_ocr() -> Dict[str, Any]:
+    """Create the OCR service and OCR a tiny synthetic page"""
+    loop = asyncio.get_event_loop()
+    ocr_service = await loop.run_in_executor(None, get_ocr_service)
+    return await ocr_service.warm_up()
+
+WARMUP_STEPS: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+    "firestore": _warm_firestore,
+    "ai_provider": _warm_ai_provider,
+    "ocr": _warm_ocr,
+}
+
+async def _run_step(step: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Run one warm-up step, timing it and capturing failures"""
+    started_at = time.perf_counter()
+    try:
+        result = await step()
+        return {"status": "ok", "seconds": time.perf_counter() - started_at, **result}
+    except Exception as e:
+        return {"status": "error", "seconds": time.perf_counter() - started_at, "error": str(e)}
+
+async def warm_up(timeout_seconds: float) -> Dict[str, Any]:
+    """
+    Run all warm-up steps concurrently within a shared timeout
+    
+    Steps still running when the timeout expires are cancelled and reported as
+    timed out; warm-up never prevents the application from starting.
+    """
+    started_at = time.perf_counter()
+    tasks = {name: asyncio.create_task(_run_step(step)) for name, step in WARMUP_STEPS.items()}
+    
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout_seconds)
+    for task in pending:
+        task.cancel()
+    
+    steps = {}
+    for name, task in tasks.items():
+        if task in done:
+            steps[name] = task.result()
+        else:
+            steps[name] = {"status": "timeout", "seconds": timeout_seconds}
+    
+    return {
+        "enabled": True,
+        "total_seconds": time.perf_counter() - started_at,
+        "steps": steps,
+    }
@@ -0,0 +1,186 @@
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+class ProblemType(str, Enum):
+    MULTIPLE_CHOICE = "multiple_choice"
+    WORD_PROBLEM = "word_problem"
+    CALCULATION = "calculation"
+    GEOMETRY = "geometry"
+    ALGEBRA = "algebra"
+    OTHER = "other"
+
+class BoundingBox(BaseModel):
+    # Pixel coordinates on the page image the region was detected on
+    x: int
+    y: int
+    width: int
+    height: int
+    
+    def union(self, other: "BoundingBox") -> "BoundingBox":
+        """Smallest box containing both boxes"""
+        left = min(self.x, other.x)
+        top = min(self.y, other.y)
+        right = max(self.x + self.width, other.x + other.width)
+        bottom = max(self.y + self.height, other.y + other.height)
+        return BoundingBox(x=left, y=top, width=right - left, height=bottom - top)
+
+class RegionType(str, Enum):
+    QUESTION = "question"
+    OPTIONS = "options"
+    TEXT = "text"
+    FIGURE = "figure"
+
+class LayoutRegion(BaseModel):
+    region_type: RegionType
+    bounding_box: Optional[BoundingBox] = None  # Unknown for text-layer pages
+    page_number: Optional[int] = None
+    text: str = ""  # Empty for figures, which are not OCR'd
+    word_confidences: List[float] = []  # Per-word OCR confidence (0-1), empty for embedded text
+
+class PageExtraction(BaseModel):
+    page_number: int
+    regions: List[LayoutRegion]
+    from_text_layer: bool = False  # Embedded PDF text rather than OCR
+    confidence: float  # Mean OCR word confidence (0-1), 1.0 for embedded text
+    has_figures: bool = False
+
+class Question(BaseModel):
+    question_number: int
+    question_text: str
+    problem_type: ProblemType
+    options: Optional[List[str]] = None  # For multiple choice questions
+    correct_answer: Optional[str] = None
+    explanation: Optional[str] = None
+    steps: Optional[List[str]] = None
+    page_number: Optional[int] = None  # Source page, when known
+    bounding_box: Optional[BoundingBox] = None  # Question area (incl. figures) on that page
+
+class ExtractedContent(BaseModel):
+    raw_text: str
+    questions: List[Question]
+    images_found: int
+    confidence_score: float
+
+class PipelineReport(BaseModel):
+    mode: str  # "hybrid" (OCR first, vision on escalation)
+    pages_total: int
+    pages_text: int  # Solved from OCR/embedded text with the text model
+    pages_escalated: int  # Sent to the vision model
+    escalation_ratio: float
+    text_seconds: float
+    vision_seconds: float
+    estimated_cost_usd: float
+    estimated_cost_saved_usd: float  # Compared to sending every page to the vision model
+    estimated_latency_saved_seconds: float
+
+class Solution(BaseModel):
+    problem_id: str
+    questions_solved: List[Question]
+    overall_explanation: str
+    total_questions: int
+    solved_at: datetime
+    processing_time_seconds: float
+    pipeline_report: Optional[PipelineReport] = None
+
+class PageDerivative(BaseModel):
+    page_number: int
+    raster_path: str  # Normalized RGB PNG at DERIVATIVE_RASTER_DPI (input for OCR)
+    vision_path: str  # Downscaled JPEG sent to vision models
+    width: int
+    height: int
+    has_text_layer: bool = False
+    text: str = ""  # Embedded PDF text, empty for scanned pages and images
+
+class DerivativeManifest(BaseModel):
+    source_path: str
+    page_count: int
+    pages: List[PageDerivative]
+    generated_at: datetime
+    generation_seconds: float
+    
+    @property
+    def all_pages_have_text(self) -> bool:
+        """Whether every page can be read from the embedded text layer"""
+        return bool(self.pages) and all(page.has_text_layer for page in self.pages)
+    
+    def page(self, page_number: int) -> Optional[PageDerivative]:
+        """Derivatives of a page (1-based), if generated"""
+        if 1 <= page_number <= len(self.pages):
+            return self.pages[page_number - 1]
+        return None
+
+class StoredFile(BaseModel):
+    file_path: str
+    sha256: str  # Hex digest of the file contents, computed while streaming
+    size_bytes: int
+    deduplicated: bool = False  # Same content was already stored
+
+class HomeworkProblem(BaseModel):
+    id: str
+    filename: str
+    file_path: str  # Local file path instead of URL
+    file_hash: Optional[str] = None  # SHA-256 of the file contents (content-addressed uploads)
+    upload_timestamp: datetime
+    extracted_content: Optional[ExtractedContent] = None
+    solution: Optional[Solution] = None
+    status: str = "uploaded"  # uploaded, processing, solved, error
+    processing_started_at: Optional[datetime] = None  # Solve lease: set when a worker starts solving
+    
+    @property
+    def record_version(self) -> str:
+        """Changes whenever the record does: upload fields are immutable, the rest move with each solve"""
+        solved_at = self.solution.solved_at.isoformat() if self.solution else ""
+        started_at = self.processing_started_at.isoformat() if self.processing_started_at else ""
+        return f"{self.status}|{started_at}|{solved_at}"
+
+class HomeworkSummary(BaseModel):
+    # Lightweight projection of HomeworkProblem for history lists (no solution payload)
+    id: str
+    filename: str
+    status: str = "uploaded"
+    upload_timestamp: datetime
+    solved_at: Optional[datetime] = None
+    question_count: Optional[int] = None  # Denormalized from the solution when it is stored
+    
+    @classmethod
+    def from_problem(cls, problem: HomeworkProblem) -> "HomeworkSummary":
+        """Project a full record onto its summary"""
+        return cls(
+            id=problem.id,
+            filename=problem.filename,
+            status=problem.status,
+            upload_timestamp=problem.upload_timestamp,
+            solved_at=problem.solution.solved_at if problem.solution else None,
+            question_count=problem.solution.total_questions if problem.solution else None
+        )
+
+class BulkUploadItem(BaseModel):
+    filename: str  # Uploaded file name, or the entry name inside a ZIP archive
+    status: str  # uploaded, rejected
+    problem_id: Optional[str] = None
+    deduplicated: bool = False
+    error: Optional[str] = None
+
+class BulkUploadResponse(BaseModel):
+    uploaded: int
+    rejected: int
+    items: List[BulkUploadItem]
+
+class BatchSolveRequest(BaseModel):
+    problem_ids: List[str]
+    force: bool = False  # Solve again even if a problem already has a solution
+
+class BatchSolveResult(BaseModel):
+    # One line of the /homework/solve-batch NDJSON stream
+    problem_id: str
+    status: str  # solved, not_found, rejected, error
+    solution: Optional[Solution] = None
+    error: Optional[str] = None
+    retry_after: Optional[int] = None  # Seconds to wait before retrying a rejected problem
+
+class HomeworkUploadResponse(BaseModel):
+    problem_id: str
+    status: str
+    message: str
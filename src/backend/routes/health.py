@@ -4,9 +4,20 @@ Health check endpoints
 Simple endpoints to verify the API is running and healthy.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from datetime import datetime
 
+from core.dependencies import (
+    get_admission_controller,
+    get_batch_admission_controller,
+    get_constructed_services,
+    get_firebase_service,
+    get_math_solver_service,
+    get_solve_coordinator,
+    get_storage_cleanup_service
+)
+from utils.serialization_utils import solution_serializer
+
 router = APIRouter()
 
 @router.get("/")
@@ -23,11 +34,11 @@ async def root():
     }
 
 @router.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """
     Detailed health check endpoint
     
-    Returns more detailed health information.
+    Returns more detailed health information, including what was warmed up at startup.
     """
     return {
         "status": "healthy",
@@ -38,5 +49,33 @@ async def health_check():
             "api": "healthy",
             "database": "healthy",  # Could be expanded with actual checks
             "storage": "healthy"     # Could be expanded with actual checks
-        }
+        },
+        "startup": getattr(request.app.state, "startup_report", None),
+        "warmup": getattr(request.app.state, "warmup_report", None)
     }
+
+@router.get("/health/stats")
+async def cache_stats():
+    """
+    Cache statistics endpoint
+    
+    Returns hit ratios and sizes of this worker's in-process caches and buffers,
+    for tuning their TTLs and bounds. Services that have not been used yet are omitted.
+    """
+    stats = {"timestamp": datetime.now().isoformat()}
+    
+    if "firebase" in get_constructed_services():
+        stats.update(get_firebase_service().get_stats())
+    stats["solution_serializer"] = solution_serializer.get_stats()
+    if "math_solver" in get_constructed_services():
+        stats["provider_scheduler"] = get_math_solver_service().scheduler.get_stats()
+    if "admission" in get_constructed_services():
+        stats["solve_admission"] = get_admission_controller().get_stats()
+    if "batch_admission" in get_constructed_services():
+        stats["batch_solve_admission"] = get_batch_admission_controller().get_stats()
+    if "solve_coordinator" in get_constructed_services():
+        stats["solves"] = get_solve_coordinator().get_stats()
+    if "storage_cleanup" in get_constructed_services():
+        stats["storage_cleanup"] = get_storage_cleanup_service().get_stats()
+    
+    return stats
@@ -4,16 +4,39 @@ Homework management endpoints
 Endpoints for uploading, solving, and managing homework problems.
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List, Dict, Any
+import asyncio
+import os
+import zipfile
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple, Union
 
-from models.homework_models import HomeworkProblem, Solution
+from config.config import settings
+from models.homework_models import (
+    BatchSolveRequest,
+    BatchSolveResult,
+    BulkUploadItem,
+    BulkUploadResponse,
+    HomeworkProblem,
+    Solution,
+    StoredFile
+)
 from core.dependencies import (
+    get_admission_controller,
+    get_batch_admission_controller,
     get_firebase_service, 
     get_ocr_service, 
-    get_math_solver_service, 
+    get_derivative_service,
+    get_solve_coordinator,
+    get_storage_cleanup_service,
     get_file_utils
 )
+from services.admission_controller import AdmissionRejectedError
+from services.provider_scheduler import solve_priority
+from utils.file_utils import FileTooLargeError, TooManyFilesError
+from utils.etag_utils import EtagUtils
+from utils.pagination_utils import InvalidCursorError, PaginationUtils
+from utils.serialization_utils import ORJSONBytesResponse, solution_serializer
 
 # Main homework router (with /homework prefix)
 router = APIRouter()
@@ -40,17 +63,27 @@ async def upload_homework(file: UploadFile = File(...)):
                 detail="Invalid file type. Please upload PNG, JPG, JPEG, or PDF files."
             )
         
-        # Save file temporarily
-        temp_file_path = await file_utils.save_temp_file(file)
+        # Stream the file into the store's staging area, hashing it and enforcing the size limit
+        try:
+            staged_file = await file_utils.save_upload(file, firebase_service.blob_store.staging_dir)
+        except FileTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
-        # Save file to local storage
-        permanent_file_path = await firebase_service.save_file(temp_file_path, file.filename)
+        # Move it to its content address (identical worksheets share one file)
+        stored_file = await firebase_service.store_upload(staged_file, file.filename)
         
         # Create homework problem record
-        problem_id = await firebase_service.create_homework_problem(permanent_file_path, file.filename)
+        problem_id = await firebase_service.create_homework_problem(
+            stored_file.file_path,
+            file.filename,
+            file_hash=stored_file.sha256
+        )
         
-        # Clean up temp file
-        file_utils.cleanup_temp_file(temp_file_path)
+        # Prepare page rasters and vision images while the client gets ready to solve
+        get_derivative_service().schedule(stored_file.file_path)
+        
+        # Optionally start solving right away; the solve request will attach to it
+        get_solve_coordinator().speculate(problem_id, stored_file.file_path)
         
         return {
             "problem_id": problem_id,
@@ -67,16 +100,125 @@ async def upload_homework(file: UploadFile = File(...)):
             detail=f"Error uploading homework: {str(e)}"
         )
 
+@upload_router.post("/upload-homework/bulk", response_model=BulkUploadResponse)
+async def upload_homework_bulk(files: List[UploadFile] = File(...)):
+    """
+    Upload many homework files at once
+    
+    Accepts any number of PNG, JPG, JPEG, or PDF files and ZIP archives of them
+    (up to BULK_UPLOAD_MAX_FILES in total). Files are staged and stored
+    concurrently and their records are written in one batch. Invalid or
+    oversized files are reported per item without failing the rest.
+    """
+    firebase_service = get_firebase_service()
+    file_utils = get_file_utils()
+    staging_dir = firebase_service.blob_store.staging_dir
+    semaphore = asyncio.Semaphore(settings.BULK_UPLOAD_CONCURRENCY)
+    loop = asyncio.get_event_loop()
+    
+    async def stage(file: UploadFile) -> List[Tuple[str, Union[StoredFile, str]]]:
+        """Stream one part (or every entry of a ZIP) into staging: (name, staged file or error)"""
+        async with semaphore:
+            if file_utils.is_archive(file.filename):
+                try:
+                    archive = await file_utils.save_upload(file, staging_dir, max_size=settings.BULK_UPLOAD_MAX_ARCHIVE_SIZE)
+                except FileTooLargeError as e:
+                    return [(file.filename, str(e))]
+                try:
+                    return await loop.run_in_executor(
+                        firebase_service.executor, file_utils.extract_archive,
+                        archive.file_path, staging_dir, settings.BULK_UPLOAD_MAX_FILES
+                    )
+                except zipfile.BadZipFile:
+                    return [(file.filename, "Not a valid ZIP archive")]
+                finally:
+                    os.remove(archive.file_path)
+            
+            if not file_utils.is_valid_file_type(file.filename):
+                return [(file.filename, "Invalid file type. Please upload PNG, JPG, JPEG, or PDF files.")]
+            try:
+                return [(file.filename, await file_utils.save_upload(file, staging_dir))]
+            except FileTooLargeError as e:
+                return [(file.filename, str(e))]
+    
+    async def store(staged_file: StoredFile, filename: str) -> StoredFile:
+        async with semaphore:
+            return await firebase_service.store_upload(staged_file, filename)
+    
+    staged = []
+    try:
+        if len(files) > settings.BULK_UPLOAD_MAX_FILES:
+            raise TooManyFilesError(settings.BULK_UPLOAD_MAX_FILES)
+        
+        results = await asyncio.gather(*(stage(file) for file in files), return_exceptions=True)
+        staged = [entry for result in results if isinstance(result, list) for entry in result]
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if len(staged) > settings.BULK_UPLOAD_MAX_FILES:
+            raise TooManyFilesError(settings.BULK_UPLOAD_MAX_FILES)
+        
+        accepted = [(name, entry) for name, entry in staged if isinstance(entry, StoredFile)]
+        stored_files = await asyncio.gather(*(store(entry, name) for name, entry in accepted))
+        staged = []
+        
+        # One batched write for all the records
+        problem_ids = await firebase_service.create_homework_problems(
+            [(stored_file, name) for stored_file, (name, _) in zip(stored_files, accepted)]
+        )
+        
+        derivative_service = get_derivative_service()
+        solve_coordinator = get_solve_coordinator()
+        for problem_id, stored_file in zip(problem_ids, stored_files):
+            derivative_service.schedule(stored_file.file_path)
+            solve_coordinator.speculate(problem_id, stored_file.file_path)
+        
+        uploaded = iter(zip(problem_ids, stored_files))
+        items = []
+        for name, entry in [entry for result in results for entry in result]:
+            if isinstance(entry, StoredFile):
+                problem_id, stored_file = next(uploaded)
+                items.append(BulkUploadItem(
+                    filename=name, status="uploaded", problem_id=problem_id,
+                    deduplicated=stored_file.deduplicated
+                ))
+            else:
+                items.append(BulkUploadItem(filename=name, status="rejected", error=entry))
+        
+        print(f"📦 Bulk upload: {len(problem_ids)} stored, {len(items) - len(problem_ids)} rejected")
+        return BulkUploadResponse(uploaded=len(problem_ids), rejected=len(items) - len(problem_ids), items=items)
+        
+    except (TooManyFilesError, FileTooLargeError) as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error uploading homework: {str(e)}"
+        )
+    finally:
+        # Staged files that never reached the store
+        for _, entry in staged:
+            if isinstance(entry, StoredFile) and os.path.exists(entry.file_path):
+                os.remove(entry.file_path)
+
 @router.post("/solve/{problem_id}", response_model=Solution)
-async def solve_homework(problem_id: str):
+async def solve_homework(problem_id: str, force: bool = False):
     """
     Solve the homework problem identified by problem_id
     
     Uses AI Vision to directly analyze the image and extract + solve mathematical problems,
     bypassing traditional OCR for better accuracy with complex diagrams and formulas.
+    
+    Retries are safe: a problem that is already solved returns its stored solution
+    (pass force=true to solve again), and concurrent requests share one solve.
+    
+    New solves are admission-controlled: when SOLVE_MAX_CONCURRENT solves are
+    running and SOLVE_MAX_QUEUE are waiting, or a slot does not free up within
+    SOLVE_QUEUE_TIMEOUT_SECONDS, the request gets a 503 with Retry-After.
     """
     firebase_service = get_firebase_service()
-    math_solver_service = get_math_solver_service()
     file_utils = get_file_utils()
     
     try:
@@ -85,20 +227,20 @@ async def solve_homework(problem_id: str):
         if not homework_problem:
             raise HTTPException(status_code=404, detail="Homework problem not found")
         
+        if homework_problem.status == "solved" and homework_problem.solution and not force:
+            return ORJSONBytesResponse(solution_serializer.serialize(homework_problem.solution).json)
+        
         # Get local file path (file is already stored locally)
         local_file_path = await firebase_service.get_file_path(homework_problem.file_path)
         
         print(f"🔍 Processing homework image: {homework_problem.filename}")
         print(f"📁 Local file path: {local_file_path}")
         
-        # Solve problems directly from image using AI Vision (bypasses OCR)
-        solution = await math_solver_service.solve_problems_from_image(local_file_path)
-        
-        # Set the problem ID in the solution
-        solution.problem_id = problem_id
-        
-        # Update the homework problem with the solution
-        await firebase_service.update_homework_solution(problem_id, solution)
+        # Solve directly from the image using AI Vision (bypasses OCR); the coordinator
+        # joins an in-flight or speculative solve for free, admits any new solve and stores the solution
+        solution = await get_solve_coordinator().solve(
+            homework_problem, local_file_path, admission=get_admission_controller()
+        )
         
         print(f"✅ Successfully solved {solution.total_questions} questions in {solution.processing_time_seconds:.2f}s")
         
@@ -107,8 +249,16 @@ async def solve_homework(problem_id: str):
         if local_file_path.startswith("/tmp/"):
             file_utils.cleanup_temp_file(local_file_path)
         
-        return solution
+        # Same bytes as were stored with the record; no second serialization
+        return ORJSONBytesResponse(solution_serializer.serialize(solution).json)
         
+    except AdmissionRejectedError as e:
+        print(f"🚦 Shedding solve of {problem_id}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{e}; retry in {e.retry_after}s",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -117,13 +267,81 @@ async def solve_homework(problem_id: str):
             detail=f"Error solving homework: {str(e)}"
         )
 
+@router.post("/solve-batch")
+async def solve_homework_batch(request: BatchSolveRequest):
+    """
+    Solve several homework problems together, streaming results as they complete
+    
+    Problems are solved concurrently, and all their page and question calls go
+    through one global queue (PROVIDER_MAX_CONCURRENCY slots shared round-robin
+    between problems), so a batch neither exceeds the provider quota nor
+    starves other solves. Batch calls run in the "batch" priority class, behind
+    interactive solves. The response is NDJSON: one BatchSolveResult line per
+    problem, in completion order.
+    
+    New solves are admission-controlled like single solves, but with their own
+    slots: at most BATCH_SOLVE_MAX_CONCURRENT batch solves run per worker, across
+    all batch requests, and the rest wait (BATCH_SOLVE_MAX_QUEUE, up to
+    BATCH_SOLVE_QUEUE_TIMEOUT_SECONDS). Problems that cannot get a slot are
+    reported with status "rejected" and a retry_after hint.
+    """
+    problem_ids = list(dict.fromkeys(request.problem_ids))
+    if len(problem_ids) > settings.BATCH_SOLVE_MAX_PROBLEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch solves are limited to {settings.BATCH_SOLVE_MAX_PROBLEMS} problems"
+        )
+    
+    firebase_service = get_firebase_service()
+    solve_coordinator = get_solve_coordinator()
+    
+    async def solve_one(problem_id: str) -> BatchSolveResult:
+        # Provider calls for the batch yield to interactive solves
+        solve_priority.set("batch")
+        try:
+            homework_problem = await firebase_service.get_homework_problem(problem_id)
+            if not homework_problem:
+                return BatchSolveResult(problem_id=problem_id, status="not_found", error="Homework problem not found")
+            if homework_problem.status == "solved" and homework_problem.solution and not request.force:
+                return BatchSolveResult(problem_id=problem_id, status="solved", solution=homework_problem.solution)
+            
+            local_file_path = await firebase_service.get_file_path(homework_problem.file_path)
+            solution = await solve_coordinator.solve(
+                homework_problem, local_file_path, admission=get_batch_admission_controller()
+            )
+            return BatchSolveResult(problem_id=problem_id, status="solved", solution=solution)
+        except AdmissionRejectedError as e:
+            return BatchSolveResult(problem_id=problem_id, status="rejected", error=str(e), retry_after=e.retry_after)
+        except Exception as e:
+            return BatchSolveResult(problem_id=problem_id, status="error", error=f"Error solving homework: {str(e)}")
+    
+    async def stream_results():
+        tasks = [asyncio.create_task(solve_one(problem_id)) for problem_id in problem_ids]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                yield solution_serializer.dumps_model(result) + b"\n"
+        finally:
+            # Client went away: stop waiting (solves already started still finish and are stored)
+            for task in tasks:
+                task.cancel()
+    
+    print(f"📚 Batch solve of {len(problem_ids)} problem(s)")
+    # Identity encoding keeps the gzip middleware from buffering lines until the stream ends
+    return StreamingResponse(
+        stream_results(),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"}
+    )
+
 @router.get("/{problem_id}", response_model=HomeworkProblem)
-async def get_homework_problem(problem_id: str):
+async def get_homework_problem(problem_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Get homework problem details and solution if available
     
     Returns the complete homework problem record including upload details
-    and solution if it has been solved.
+    and solution if it has been solved. Responses carry an ETag; pollers that
+    send it back in If-None-Match get 304 Not Modified until the record changes.
     """
     firebase_service = get_firebase_service()
     
@@ -132,7 +350,12 @@ async def get_homework_problem(problem_id: str):
         if not homework_problem:
             raise HTTPException(status_code=404, detail="Homework problem not found")
         
-        return homework_problem
+        etag = EtagUtils.for_problem(homework_problem)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if EtagUtils.matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        return ORJSONBytesResponse(solution_serializer.dumps_model(homework_problem), headers=headers)
         
     except HTTPException:
         raise
@@ -142,12 +365,22 @@ async def get_homework_problem(problem_id: str):
             detail=f"Error retrieving homework: {str(e)}"
         )
 
-@router.get("", response_model=List[HomeworkProblem])
-async def list_homework_problems(limit: int = 10, offset: int = 0):
+@router.get("", response_model=None, responses={200: {
+    "description": "Array of HomeworkSummary objects, or of full HomeworkProblem records with full=true",
+    "headers": {"X-Next-Cursor": {"description": "Cursor for the next page, when more results may follow",
+                                  "schema": {"type": "string"}}}
+}})
+async def list_homework_problems(limit: int = 10, offset: int = 0,
+                                 cursor: Optional[str] = None, full: bool = False):
     """
     List recent homework problems
     
-    Returns a paginated list of homework problems, most recent first.
+    Returns a paginated list of homework summaries (id, filename, status,
+    timestamps and question count), most recent first. Pass full=true to get
+    complete records including solutions.
+    When more results may follow, the X-Next-Cursor response header holds a
+    cursor; pass it back as ?cursor= to fetch the next page. Cursor pages cost
+    the same at any depth, unlike the legacy offset parameter.
     """
     firebase_service = get_firebase_service()
     
@@ -155,9 +388,14 @@ async def list_homework_problems(limit: int = 10, offset: int = 0):
         if limit > 100:
             limit = 100  # Prevent excessive data transfer
             
-        problems = await firebase_service.list_homework_problems(limit, offset)
-        return problems
+        problems = await firebase_service.list_homework_problems(limit, offset, cursor=cursor, full=full)
+        headers = {}
+        if problems and len(problems) == limit:
+            headers["X-Next-Cursor"] = PaginationUtils.encode_cursor(problems[-1])
+        return ORJSONBytesResponse(solution_serializer.dumps_models(problems), headers=headers)
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -180,15 +418,16 @@ async def delete_homework_problem(problem_id: str):
         if not homework_problem:
             raise HTTPException(status_code=404, detail="Homework problem not found")
         
-        # TODO: Implement actual deletion logic
-        # This would involve:
-        # 1. Deleting the file from Firebase Storage
-        # 2. Removing the record from Firestore
+        # Stop any speculative solve of the problem
+        get_solve_coordinator().cancel(problem_id)
+        
+        # Remove the record now; the file and its derivatives are removed in the
+        # background once no other upload shares them
+        await get_storage_cleanup_service().delete_problem(homework_problem)
         
         return {
-            "message": f"Homework problem {problem_id} deletion requested",
-            "status": "pending",
-            "note": "Deletion functionality not yet implemented"
+            "message": f"Homework problem {problem_id} deleted",
+            "status": "deleted"
         }
         
     except HTTPException:
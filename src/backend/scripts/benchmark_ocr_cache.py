@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Cold vs warm benchmark for the OCR result cache
+
+Renders a synthetic worksheet page, OCRs it once with an empty cache (cold)
+and then repeatedly with the cache populated (warm). Requires Tesseract.
+
+Usage:
+    uv run python scripts/benchmark_ocr_cache.py [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config.config import settings
+
+def render_page() -> Image.Image:
+    """Render an A4 page at 200 dpi with a few questions and a figure"""
+    page = Image.new("RGB", (1654, 2339), "white")
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=36)
+
+    y = 120
+    for number in range(1, 9):
+        draw.text((120, y), f"{number}. Which one of the following is {number * 7} + {number * 13}?", fill="black", font=font)
+        draw.text((160, y + 60), f"(1) {number * 20}   (2) {number * 20 + 1}   (3) {number * 19}   (4) {number * 21}", fill="black", font=font)
+        y += 170
+        if number == 4:
+            # A figure between questions, skipped by the layout stage
+            draw.rectangle((160, y, 760, y + 300), outline="black", width=6)
+            draw.line((160, y, 760, y + 300), fill="black", width=6)
+            y += 360
+    return page
+
+async def run_benchmark(runs: int):
+    """OCR the same page cold and warm"""
+    from services.ocr_service import OCRService
+
+    ocr_service = OCRService()
+    if not ocr_service.tesseract_available:
+        print("❌ Tesseract is required for this benchmark")
+        return
+
+    page = render_page()
+    ocr_service.ocr_cache.clear()
+
+    start = time.perf_counter()
+    regions = await ocr_service._process_image(page, 1)
+    cold = time.perf_counter() - start
+
+    warm_times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await ocr_service._process_image(page, 1)
+        warm_times.append(time.perf_counter() - start)
+    warm = sum(warm_times) / len(warm_times)
+
+    print(f"\n📊 Regions found: {len(regions)}")
+    print(f"   Cold (OCR):   {cold * 1000:.1f} ms")
+    print(f"   Warm (cache): {warm * 1000:.1f} ms (mean of {runs})")
+    print(f"   Speed-up:     {cold / warm:.0f}x")
+    print(f"   Cache stats:  {ocr_service.ocr_cache.get_stats()}")
+
+def main():
+    """Run the OCR cache benchmark against a throwaway cache file"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of warm runs")
+    args = parser.parse_args()
+
+    print("=== OCR Cache Benchmark ===")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        settings.OCR_CACHE_ENABLED = True
+        settings.OCR_CACHE_PATH = os.path.join(cache_dir, "ocr_cache.sqlite3")
+        asyncio.run(run_benchmark(args.runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the incremental question parser
+
+Generates a large synthetic worksheet and measures how fast QuestionParser
+consumes it, both in one go and page by page as the OCR pipeline feeds it.
+
+Usage:
+    uv run python scripts/benchmark_question_parser.py [--questions 20000] [--per-page 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.question_parser import QuestionParser
+
+QUESTION_TEMPLATES = [
+    ("Which one of the following is sixty-three thousand and forty in numerals?",
+     ["(1) 6340", "(2) 63 040", "(3) 63 400", "(4) 630 040"]),
+    ("The figure below is made up of 20 identical small rectangles.",
+     ["What percentage of the figure is shaded?"]),
+    ("Find the area of a square with sides of 12 cm.", []),
+    ("Solve the equation 3x + 5 = 20.", ["Show your working."]),
+    ("John has 15 apples and gives 7 to Mary.", ["How many apples does John have altogether now?"]),
+    ("Calculate 456 + 789.", ["(A) 1245    (B) 1145    (C) 1235    (D) 1345"]),
+]
+
+def build_pages(question_count: int, per_page: int):
+    """Build synthetic page texts containing question_count questions"""
+    pages = []
+    lines = []
+    for number in range(1, question_count + 1):
+        text, extra_lines = QUESTION_TEMPLATES[number % len(QUESTION_TEMPLATES)]
+        lines.append(f"{number}. {text}")
+        lines.extend(extra_lines)
+        if number % per_page == 0:
+            pages.append("\n".join(lines))
+            lines = []
+    if lines:
+        pages.append("\n".join(lines))
+    return pages
+
+def run_whole_document(pages):
+    """Parse all pages joined into one string"""
+    parser = QuestionParser()
+    text = "\n".join(pages)
+    start = time.perf_counter()
+    questions = parser.feed_text(text) + parser.close()
+    return questions, time.perf_counter() - start
+
+def run_incremental(pages):
+    """Parse page by page, as the OCR pipeline does"""
+    parser = QuestionParser()
+    questions = []
+    start = time.perf_counter()
+    for page_number, page_text in enumerate(pages, 1):
+        questions.extend(parser.feed_text(page_text, page_number))
+    questions.extend(parser.close())
+    return questions, time.perf_counter() - start
+
+def report(label: str, questions, elapsed: float, total_bytes: int, total_lines: int):
+    """Print throughput figures for one run"""
+    print(f"\n📊 {label}")
+    print(f"   Questions parsed: {len(questions)}")
+    print(f"   Time:             {elapsed * 1000:.1f} ms")
+    print(f"   Throughput:       {total_bytes / elapsed / 1024 / 1024:.1f} MB/s, "
+          f"{total_lines / elapsed:,.0f} lines/s, {len(questions) / elapsed:,.0f} questions/s")
+
+def main():
+    """Run the parser benchmark"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--questions", type=int, default=20000, help="number of synthetic questions")
+    arg_parser.add_argument("--per-page", type=int, default=10, help="questions per page")
+    args = arg_parser.parse_args()
+
+    print("=== Question Parser Benchmark ===")
+    pages = build_pages(args.questions, args.per_page)
+    total_bytes = sum(len(page.encode("utf-8")) for page in pages)
+    total_lines = sum(page.count("\n") + 1 for page in pages)
+    print(f"Synthetic input: {len(pages)} pages, {total_lines:,} lines, "
+          f"{total_bytes / 1024 / 1024:.2f} MB")
+
+    # Warm up pattern caches and the allocator
+    run_incremental(pages[:10])
+
+    questions, elapsed = run_whole_document(pages)
+    report("Whole document", questions, elapsed, total_bytes, total_lines)
+
+    questions, elapsed = run_incremental(pages)
+    report("Incremental (page by page)", questions, elapsed, total_bytes, total_lines)
+
+if __name__ == "__main__":
+    main()
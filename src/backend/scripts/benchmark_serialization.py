@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for large Solution payloads
+
+Builds a synthetic solution with explanations and steps for every question
+and compares the time to produce the response body with FastAPI's default
+encoder, pydantic's model_dump_json and SolutionSerializer (cold and warm),
+plus the body size per question before and after gzip.
+
+Usage:
+    uv run python scripts/benchmark_serialization.py [--questions 40] [--runs 200]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from models.homework_models import HomeworkProblem, ProblemType, Question, Solution
+from utils.serialization_utils import SolutionSerializer
+
+def build_solution(question_count: int) -> Solution:
+    """A solved multiple-choice paper with worked steps for every question"""
+    questions = [
+        Question(
+            question_number=number,
+            question_text=f"Which one of the following is the value of {number * 7} + {number * 13} × 2?",
+            problem_type=ProblemType.MULTIPLE_CHOICE,
+            options=[f"({option}) {number * 33 + option}" for option in range(1, 5)],
+            correct_answer=f"({number % 4 + 1})",
+            explanation=f"Multiplication comes before addition, so {number * 13} × 2 is evaluated first. " * 3,
+            steps=[f"Step {step}: simplify the expression and compare with option {step}" for step in range(1, 6)],
+            page_number=number // 8 + 1
+        )
+        for number in range(1, question_count + 1)
+    ]
+    return Solution(
+        problem_id="benchmark",
+        questions_solved=questions,
+        overall_explanation="Every question tests the order of operations. " * 10,
+        total_questions=question_count,
+        solved_at=datetime.now(),
+        processing_time_seconds=12.5
+    )
+
+def mean_ms(function: Callable[[], bytes], runs: int) -> float:
+    """Mean time of a call in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs * 1000
+
+def run_benchmark(question_count: int, runs: int):
+    """Time each serialization path for the same solution"""
+    solution = build_solution(question_count)
+    problem = HomeworkProblem(
+        id="benchmark", filename="paper.pdf", file_path="uploads/paper.pdf",
+        upload_timestamp=datetime.now(), solution=solution, status="solved"
+    )
+
+    def fastapi_default() -> bytes:
+        # What a route with response_model=Solution does: validate, encode, dump
+        validated = Solution.model_validate(solution.model_dump())
+        return json.dumps(jsonable_encoder(validated)).encode()
+
+    def cold() -> bytes:
+        return SolutionSerializer().serialize(solution).json
+
+    serializer = SolutionSerializer()
+    serializer.serialize(solution)
+
+    timings = {
+        "FastAPI default encoder": mean_ms(fastapi_default, runs),
+        "pydantic model_dump_json": mean_ms(solution.model_dump_json, runs),
+        "SolutionSerializer (cold)": mean_ms(cold, runs),
+        "SolutionSerializer (warm)": mean_ms(lambda: serializer.serialize(solution).json, runs),
+        "Homework record (warm)": mean_ms(lambda: serializer.dumps_model(problem), runs),
+    }
+
+    body = serializer.serialize(solution).json
+    compressed = gzip.compress(body)
+    baseline = timings["FastAPI default encoder"]
+
+    print(f"\n📊 Solution with {question_count} questions (mean of {runs} runs)")
+    for name, milliseconds in timings.items():
+        print(f"   {name + ':':<28} {milliseconds:7.3f} ms  ({baseline / milliseconds:.0f}x)")
+    print(f"   Body size:     {len(body):,} bytes ({len(body) / question_count:,.0f} per question)")
+    print(f"   Gzipped:       {len(compressed):,} bytes ({len(compressed) / question_count:,.0f} per question)")
+    print(f"   Cache stats:   {serializer.get_stats()}")
+
+def main():
+    """Run the serialization benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=40, help="questions in the solution")
+    parser.add_argument("--runs", type=int, default=200, help="runs per measurement")
+    args = parser.parse_args()
+
+    print("=== Solution Serialization Benchmark ===")
+    run_benchmark(args.questions, args.runs)
+
+if __name__ == "__main__":
+    main()
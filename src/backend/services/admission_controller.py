@@ -0,0 +1,127 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+
+class AdmissionRejectedError(Exception):
+    """A solve request was shed; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Caps the number of solves running at once, with a bounded wait queue
+
+    Without a cap every request under overload starts a solve, and all of them
+    share the executors and provider quota until they time out together. Here
+    at most SOLVE_MAX_CONCURRENT solves run per worker and SOLVE_MAX_QUEUE more
+    wait, first come first served, for up to SOLVE_QUEUE_TIMEOUT_SECONDS.
+    Anything beyond that is rejected at once with a Retry-After estimate, so
+    admitted solves keep finishing at full speed.
+    """
+
+    # Weight of the latest solve in the running mean used for Retry-After
+    DURATION_SMOOTHING = 0.2
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float, min_retry_after: int = 1):
+        self.max_concurrent = max(0, max_concurrent)  # 0 disables admission control
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.min_retry_after = max(1, min_retry_after)
+        self._active = 0
+        self._waiting: Deque[asyncio.Future] = deque()
+        self._mean_duration = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_queue_timeout = 0
+        self.completed = 0
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a solve slot for the duration of the block, or raise AdmissionRejectedError"""
+        if not self.max_concurrent:
+            yield
+            return
+
+        await self._acquire()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record_duration(time.perf_counter() - started_at)
+            self._release()
+
+    async def _acquire(self):
+        if self._active < self.max_concurrent and not self._waiting:
+            self._active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiting) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejectedError("Too many solves in progress", self.retry_after())
+
+        future = asyncio.get_event_loop().create_future()
+        self._waiting.append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the caller gave up; pass it on
+                self._release()
+            else:
+                future.cancel()
+                self._discard(future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_queue_timeout += 1
+            raise AdmissionRejectedError("Timed out waiting for a solve slot", self.retry_after())
+        self.admitted += 1
+
+    def _discard(self, future: asyncio.Future):
+        try:
+            self._waiting.remove(future)
+        except ValueError:
+            pass
+
+    def _release(self):
+        self._active -= 1
+        while self._active < self.max_concurrent and self._waiting:
+            future = self._waiting.popleft()
+            if not future.done():
+                future.set_result(None)
+                self._active += 1
+
+    def _record_duration(self, seconds: float):
+        self.completed += 1
+        if self.completed == 1:
+            self._mean_duration = seconds
+        else:
+            self._mean_duration += self.DURATION_SMOOTHING * (seconds - self._mean_duration)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained, from the mean solve time"""
+        backlog = self._active + len(self._waiting)
+        estimate = self._mean_duration * backlog / max(1, self.max_concurrent)
+        return max(self.min_retry_after, math.ceil(estimate))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Slot usage and shedding counters for /health/stats"""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queue_depth": len(self._waiting),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_queue_timeout": self.rejected_queue_timeout,
+            "mean_solve_seconds": self._mean_duration,
+            "retry_after_seconds": self.retry_after()
+        }
@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from models.homework_models import Question
 
+class ProviderError(Exception):
+    """Raised when a provider cannot solve a question or read a homework file"""
+
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
     
@@ -17,7 +20,7 @@ class AIProvider(ABC):
     
     @abstractmethod
     async def solve_single_question(self, question: Question) -> Question:
-        """Solve a single mathematical question"""
+        """Solve a single mathematical question; raises ProviderError when it cannot"""
         pass
     
     @abstractmethod
@@ -37,6 +40,14 @@ class AIProvider(ABC):
         """Return list of supported models for this provider"""
         pass
     
+    async def warm_up(self) -> Dict[str, Any]:
+        """
+        Prime the provider's client and connection before the first real request
+        
+        Providers backed by a remote API override this with a cheap metadata call.
+        """
+        return {"connected": False, "detail": "nothing to warm up"}
+    
     def get_system_prompt(self) -> str:
         """Get the system prompt for mathematical problem solving"""
         return """You are an expert mathematics tutor. Your job is to solve mathematical problems step by step and provide clear explanations that students can understand. 
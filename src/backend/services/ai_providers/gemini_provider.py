@@ -1,12 +1,12 @@
 import google.generativeai as genai
 import json
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from PIL import Image
 import base64
 import io
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from .base_provider import AIProvider
+from .base_provider import AIProvider, ProviderError
 from models.homework_models import Question
 from config.config import settings
 
@@ -20,13 +20,16 @@ class GeminiProvider(AIProvider):
         # Use the same model for vision if it supports it, otherwise use gemini-1.5-flash
         self.vision_model = self.model if self.model in ["gemini-1.5-flash", "gemini-1.5-pro", "gemini-pro-vision"] else "gemini-1.5-flash"
         
+        # Text-only questions can use a cheaper model (AI_TEXT_MODEL)
+        self.text_model = settings.AI_TEXT_MODEL or self.model
+        
         super().__init__(api_key, **kwargs)
         if self.is_available:
             genai.configure(api_key=self.api_key)
-            self.client = genai.GenerativeModel(self.model)
+            self.client = genai.GenerativeModel(self.text_model)
             # Create vision model - gemini-1.5-flash supports both text and vision
             self.vision_client = genai.GenerativeModel(self.vision_model)
-            print(f"✅ Gemini initialized: Text={self.model}, Vision={self.vision_model}")
+            print(f"✅ Gemini initialized: Text={self.text_model}, Vision={self.vision_model}")
         else:
             self.client = None
             self.vision_client = None
@@ -48,6 +51,15 @@ class GeminiProvider(AIProvider):
             "gemini-pro-vision" # Legacy vision model
         ]
     
+    async def warm_up(self) -> Dict[str, Any]:
+        """Fetch model metadata to establish the TLS connection to the Gemini API"""
+        if not self.client:
+            return {"connected": False, "detail": "Gemini client not available"}
+        
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, lambda: genai.get_model(f"models/{self.text_model}"))
+        return {"connected": True, "model": self.text_model}
+    
     async def solve_single_question(self, question: Question) -> Question:
         """Solve a single mathematical question using Gemini"""
         try:
@@ -93,11 +105,15 @@ class GeminiProvider(AIProvider):
             
         except Exception as e:
             print(f"Error solving question with Gemini: {e}")
-            question.explanation = f"Error solving this question with Gemini: {str(e)}"
-            return question
+            raise ProviderError(f"Gemini could not solve question {question.question_number}: {e}") from e
     
     async def solve_homework_from_image(self, file_path: str) -> List[Question]:
-        """Solve homework problems directly from image or PDF using Gemini Vision"""
+        """
+        Solve homework problems directly from image or PDF using Gemini Vision
+
+        Returns an empty list when the file holds no questions; raises
+        ProviderError when the file could not be processed.
+        """
         try:
             if not self.vision_client:
                 raise Exception("Gemini Vision client not available")
@@ -110,16 +126,11 @@ class GeminiProvider(AIProvider):
                 print(f"🖼️ Processing image file: {file_path}")
                 return await self._solve_from_image(file_path)
                 
+        except ProviderError:
+            raise
         except Exception as e:
             print(f"Error solving homework from file with Gemini Vision: {e}")
-            # Return a fallback question
-            return [Question(
-                question_number=1,
-                question_text="Error processing file",
-                problem_type="other",
-                explanation=f"Unable to process file: {str(e)}",
-                steps=["Please check the file format and try again"]
-            )]
+            raise ProviderError(f"Gemini Vision could not process the file: {e}") from e
     
     async def _solve_from_pdf(self, pdf_path: str) -> List[Question]:
         """Process PDF directly using Gemini Vision (no conversion needed)"""
@@ -166,7 +177,7 @@ Find ALL questions in the PDF. Return valid JSON only."""
             questions = self._parse_questions_response(response.text, "PDF")
             
             print(f"📊 Found {len(questions)} questions in PDF")
-            return questions if questions else [self._create_fallback_question("No questions found in PDF")]
+            return questions
             
         except Exception as e:
             print(f"❌ Error processing PDF directly: {e}")
@@ -239,14 +250,14 @@ Be thorough and accurate in your mathematical reasoning."""
                     print(f"✅ Found {len(page_questions)} questions on page {page_num}")
             
             print(f"📊 Total questions found: {len(all_questions)}")
-            return all_questions if all_questions else [self._create_fallback_question("No questions found in PDF")]
+            return all_questions
             
-        except ImportError:
+        except ImportError as e:
             print("❌ pdf2image not available - install with: pip install pdf2image")
-            return [self._create_fallback_question("PDF processing requires pdf2image package")]
+            raise ProviderError("PDF processing requires pdf2image package") from e
         except Exception as e:
             print(f"❌ Error in PDF fallback processing: {e}")
-            return [self._create_fallback_question(f"PDF processing error: {str(e)}")]
+            raise ProviderError(f"PDF processing error: {e}") from e
     
     async def _solve_from_image(self, image_path: str) -> List[Question]:
         """Process single image file using Gemini Vision"""
@@ -291,11 +302,11 @@ Be thorough and accurate in your mathematical reasoning."""
             response = await self._generate_with_image_async(prompt, image)
             questions = self._parse_questions_response(response.text, 1)
             
-            return questions if questions else [self._create_fallback_question("No questions found in image")]
+            return questions
             
         except Exception as e:
             print(f"❌ Error processing image: {e}")
-            return [self._create_fallback_question(f"Image processing error: {str(e)}")]
+            raise ProviderError(f"Image processing error: {e}") from e
     
     def _parse_questions_response(self, response_text: str, page_num: int) -> List[Question]:
         """Parse Gemini response into Question objects with robust error handling"""
@@ -428,16 +439,6 @@ Be thorough and accurate in your mathematical reasoning."""
             print(f"❌ Error in regex extraction: {e}")
             return []
     
-    def _create_fallback_question(self, error_message: str) -> Question:
-        """Create a fallback question for errors"""
-        return Question(
-            question_number=1,
-            question_text="Error processing file",
-            problem_type="other",
-            explanation=error_message,
-            steps=["Please check the file format and try again"]
-        )
-
     async def generate_overall_explanation(self, solved_questions: List[Question]) -> str:
         """Generate an overall explanation using Gemini"""
         try:
@@ -1,7 +1,7 @@
 import openai
 import json
-from typing import List, Optional
-from .base_provider import AIProvider
+from typing import Any, Dict, List, Optional
+from .base_provider import AIProvider, ProviderError
 from models.homework_models import Question
 
 class OpenAIProvider(AIProvider):
@@ -33,6 +33,14 @@ class OpenAIProvider(AIProvider):
             "gpt-3.5-turbo-16k"
         ]
     
+    async def warm_up(self) -> Dict[str, Any]:
+        """Fetch model metadata to establish the TLS connection to the OpenAI API"""
+        if not self.client:
+            return {"connected": False, "detail": "OpenAI client not available"}
+        
+        await self.client.models.retrieve(self.model)
+        return {"connected": True, "model": self.model}
+    
     async def solve_single_question(self, question: Question) -> Question:
         """Solve a single mathematical question using OpenAI"""
         try:
@@ -70,8 +78,7 @@ class OpenAIProvider(AIProvider):
             
         except Exception as e:
             print(f"Error solving question with OpenAI: {e}")
-            question.explanation = f"Error solving this question with OpenAI: {str(e)}"
-            return question
+            raise ProviderError(f"OpenAI could not solve question {question.question_number}: {e}") from e
     
     async def generate_overall_explanation(self, solved_questions: List[Question]) -> str:
         """Generate an overall explanation using OpenAI"""
@@ -1,20 +1,32 @@
 import os
-from typing import Dict, Type, Optional
+import importlib
+from typing import Dict, Type, Optional, Union
 from .base_provider import AIProvider
-from .openai_provider import OpenAIProvider
-from .gemini_provider import GeminiProvider
 from .mock_provider import MockProvider
 
 class AIProviderFactory:
     """Factory class to create and manage AI providers"""
     
     # Registry of available providers
-    _providers: Dict[str, Type[AIProvider]] = {
-        "openai": OpenAIProvider,
-        "gemini": GeminiProvider,
+    # SDK-backed providers are registered as "module:Class" and imported on first use,
+    # since the openai and google.generativeai packages are slow to import
+    _providers: Dict[str, Union[Type[AIProvider], str]] = {
+        "openai": ".openai_provider:OpenAIProvider",
+        "gemini": ".gemini_provider:GeminiProvider",
         "mock": MockProvider
     }
     
+    @classmethod
+    def _get_provider_class(cls, provider_name: str) -> Type[AIProvider]:
+        """Resolve a registered provider, importing its module if needed"""
+        provider_class = cls._providers[provider_name]
+        if isinstance(provider_class, str):
+            module_name, class_name = provider_class.split(":")
+            module = importlib.import_module(module_name, package=__package__)
+            provider_class = getattr(module, class_name)
+            cls._providers[provider_name] = provider_class
+        return provider_class
+    
     @classmethod
     def get_provider(cls, 
                      provider_name: str = None, 
@@ -52,10 +64,10 @@ class AIProviderFactory:
         if not model:
             model = cls._get_default_model(provider_name)
         
-        # Create provider instance
-        provider_class = cls._providers[provider_name]
-        
         try:
+            # Create provider instance
+            provider_class = cls._get_provider_class(provider_name)
+            
             if provider_name == "mock":
                 return provider_class(**kwargs)
             else:
@@ -118,11 +130,12 @@ class AIProviderFactory:
         
         providers_info = {}
         
-        for name, provider_class in cls._providers.items():
+        for name in list(cls._providers):
             api_key = cls._get_api_key_for_provider(name)
             
             # Create a temporary instance to check availability
             try:
+                provider_class = cls._get_provider_class(name)
                 if name == "mock":
                     instance = provider_class()
                 else:
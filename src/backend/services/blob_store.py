@@ -0,0 +1,95 @@
+import os
+from typing import Optional
+
+from models.homework_models import StoredFile
+
+class BlobStore:
+    """
+    Content-addressed file store
+
+    Files are named by the SHA-256 of their contents and fanned out over two
+    levels of hashed directories (uploads/ab/cd/abcd....pdf), so identical
+    uploads share one file and no directory grows beyond a few hundred entries.
+    Uploads are staged inside the store so committing them is an atomic rename
+    on the same filesystem. All methods are blocking; call them from an executor.
+
+    There is at most one blob per digest: the extension (kept because the
+    solver picks the PDF or image path from it) is normalized, and content
+    already stored under another extension is reused, so reference counts
+    keyed by digest always describe exactly one file.
+    """
+
+    STAGING_DIR_NAME = ".staging"
+    # Spellings of the same file type; blobs use the canonical one
+    EXTENSION_ALIASES = {".jpeg": ".jpg"}
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.staging_dir = os.path.join(root_dir, self.STAGING_DIR_NAME)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    @classmethod
+    def normalize_extension(cls, extension: str) -> str:
+        extension = extension.lower()
+        return cls.EXTENSION_ALIASES.get(extension, extension)
+
+    def path_for(self, sha256: str, extension: str = "") -> str:
+        """Location of the blob with the given digest"""
+        return os.path.join(self.root_dir, sha256[:2], sha256[2:4], f"{sha256}{self.normalize_extension(extension)}")
+
+    def _stored_path(self, sha256: str) -> Optional[str]:
+        """Path of the blob with this digest under any extension, or None"""
+        directory = os.path.dirname(self.path_for(sha256))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            path = os.path.join(directory, name)
+            # Derivative directories (<digest>.<ext>.derivatives) do not match
+            if os.path.splitext(name)[0] == sha256:
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def find(self, sha256: str, extension: str = "") -> Optional[str]:
+        """Path of a stored blob, or None"""
+        path = self.path_for(sha256, extension)
+        return path if os.path.exists(path) else None
+
+    def commit(self, staged_file: StoredFile, extension: str) -> StoredFile:
+        """
+        Move a staged upload to its content address
+
+        When the blob already exists (under any extension) the staged copy is
+        simply dropped, so a duplicate upload costs only the hash computed
+        while streaming.
+        """
+        path = self._stored_path(staged_file.sha256)
+        if path:
+            os.remove(staged_file.file_path)
+            # Fresh mtime keeps the retention sweep's grace period from treating it as orphaned
+            os.utime(path)
+            deduplicated = True
+        else:
+            path = self.path_for(staged_file.sha256, extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Concurrent uploads of the same content race harmlessly: the bytes are identical
+            os.replace(staged_file.file_path, path)
+            deduplicated = False
+
+        return StoredFile(
+            file_path=path,
+            sha256=staged_file.sha256,
+            size_bytes=staged_file.size_bytes,
+            deduplicated=deduplicated
+        )
+
+    def delete(self, sha256: str, extension: str = "") -> bool:
+        """Remove a blob; returns False when it did not exist"""
+        path = self.path_for(sha256, extension)
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
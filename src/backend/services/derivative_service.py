@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps
+
+from config.config import settings
+from models.homework_models import DerivativeManifest, PageDerivative
+from utils.pdf_utils import PDFUtils
+
+class DerivativeService:
+    """
+    Precomputes solve-time artifacts for an upload in the background
+
+    For every page: a normalized raster at OCR resolution, a compressed
+    vision-ready image, and (for PDFs) the embedded text layer. Artifacts are
+    stored in a "<upload>.derivatives" directory next to the upload, described
+    by a manifest.json, so the solve path only reads them. Uploads are
+    content-addressed, so duplicate uploads share their derivatives.
+    """
+
+    DERIVATIVES_SUFFIX = ".derivatives"
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.pdf_utils = PDFUtils()
+        # Generation in progress, by upload path
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def derivatives_dir(cls, file_path: str) -> str:
+        """Directory holding an upload's derivatives"""
+        return file_path + cls.DERIVATIVES_SUFFIX
+
+    @classmethod
+    def load_manifest(cls, file_path: str) -> Optional[DerivativeManifest]:
+        """Read the manifest of an upload's derivatives, if they have been generated"""
+        manifest_path = os.path.join(cls.derivatives_dir(file_path), cls.MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return DerivativeManifest.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable derivative manifest {manifest_path}: {e}")
+            return None
+
+    def schedule(self, file_path: str) -> Optional[asyncio.Task]:
+        """Start generating derivatives in the background (no-op if running or disabled)"""
+        if not settings.DERIVATIVES_ENABLED:
+            return None
+        task = self._tasks.get(file_path)
+        if task is None:
+            task = asyncio.create_task(self._generate(file_path))
+            self._tasks[file_path] = task
+            task.add_done_callback(lambda _: self._tasks.pop(file_path, None))
+        return task
+
+    async def get_manifest(self, file_path: str) -> Optional[DerivativeManifest]:
+        """
+        Derivatives for an upload, waiting for in-flight generation
+
+        Returns None when they are neither generated nor being generated, or
+        when generation does not finish within DERIVATIVE_WAIT_TIMEOUT_SECONDS;
+        callers then prepare the file inline as before.
+        """
+        task = self._tasks.get(file_path)
+        if task is not None:
+            try:
+                # shield: a timed-out solve must not cancel generation for later requests
+                return await asyncio.wait_for(asyncio.shield(task), timeout=settings.DERIVATIVE_WAIT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                print(f"⚠️  Derivatives for {file_path} not ready, preparing inline")
+                return None
+            except Exception:
+                return None
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.load_manifest, file_path)
+
+    async def _generate(self, file_path: str) -> Optional[DerivativeManifest]:
+        """Generate derivatives unless a manifest already exists"""
+        loop = asyncio.get_event_loop()
+        try:
+            manifest = await loop.run_in_executor(self.executor, self.load_manifest, file_path)
+            if manifest is None:
+                manifest = await loop.run_in_executor(self.executor, self.generate_derivatives, file_path)
+                print(f"✅ Prepared {manifest.page_count} page(s) of derivatives in "
+                      f"{manifest.generation_seconds:.2f}s: {self.derivatives_dir(file_path)}")
+            return manifest
+        except Exception as e:
+            print(f"❌ Error preparing derivatives for {file_path}: {e}")
+            return None
+
+    def generate_derivatives(self, file_path: str) -> DerivativeManifest:
+        """Render every page and write its artifacts and the manifest (blocking)"""
+        started_at = time.perf_counter()
+        output_dir = self.derivatives_dir(file_path)
+        # Build in a scratch directory and rename, so readers never see a partial set
+        build_dir = f"{output_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(build_dir, ignore_errors=True)
+        os.makedirs(build_dir)
+
+        try:
+            if file_path.lower().endswith('.pdf'):
+                pages = self._generate_pdf_pages(file_path, build_dir, output_dir)
+            else:
+                with Image.open(file_path) as image:
+                    pages = [self._write_page(ImageOps.exif_transpose(image), 1, build_dir, output_dir)]
+
+            manifest = DerivativeManifest(
+                source_path=file_path,
+                page_count=len(pages),
+                pages=pages,
+                generated_at=datetime.now(),
+                generation_seconds=time.perf_counter() - started_at
+            )
+            with open(os.path.join(build_dir, self.MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                f.write(manifest.model_dump_json())
+
+            try:
+                os.rename(build_dir, output_dir)
+            except OSError:
+                # Another worker finished first; its derivatives are identical
+                shutil.rmtree(build_dir, ignore_errors=True)
+            return manifest
+        except Exception:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+
+    def _generate_pdf_pages(self, pdf_path: str, build_dir: str, output_dir: str) -> List[PageDerivative]:
+        """Rasterize a PDF one page at a time, keeping its text layer"""
+        from pdf2image import convert_from_path, pdfinfo_from_path
+
+        page_texts = self.pdf_utils.extract_text_layer(pdf_path) if settings.PDF_TEXT_LAYER_ENABLED else []
+        page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+
+        pages = []
+        for page_number in range(1, page_count + 1):
+            # One page at a time keeps memory flat for long documents
+            image = convert_from_path(
+                pdf_path, dpi=settings.DERIVATIVE_RASTER_DPI, first_page=page_number, last_page=page_number
+            )[0]
+            text = page_texts[page_number - 1] if page_number <= len(page_texts) else ""
+            page = self._write_page(image, page_number, build_dir, output_dir)
+            page.has_text_layer = self.pdf_utils.has_text_layer(text)
+            page.text = text if page.has_text_layer else ""
+            pages.append(page)
+        return pages
+
+    def _write_page(self, image: Image.Image, page_number: int, build_dir: str, output_dir: str) -> PageDerivative:
+        """Write a page's normalized raster and vision image (recording their final paths)"""
+        image = image.convert('RGB')
+        raster_name = f"page-{page_number:03d}.png"
+        image.save(os.path.join(build_dir, raster_name))
+
+        vision_image = image.copy()
+        max_side = settings.DERIVATIVE_VISION_MAX_SIDE
+        vision_image.thumbnail((max_side, max_side), Image.LANCZOS)
+        vision_name = f"page-{page_number:03d}.vision.jpg"
+        vision_image.save(
+            os.path.join(build_dir, vision_name), 'JPEG',
+            quality=settings.DERIVATIVE_VISION_JPEG_QUALITY, optimize=True
+        )
+
+        return PageDerivative(
+            page_number=page_number,
+            raster_path=os.path.join(output_dir, raster_name),
+            vision_path=os.path.join(output_dir, vision_name),
+            width=image.width,
+            height=image.height
+        )
@@ -1,28 +1,48 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
 import uuid
 import os
-import shutil
-import aiofiles
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-from models.homework_models import HomeworkProblem, Solution, ExtractedContent
+from config.config import settings
+from models.homework_models import HomeworkProblem, HomeworkSummary, Solution, StoredFile
+from services.blob_store import BlobStore
+from services.record_cache import MISSING, RecordCache
+from services.repositories.base_repository import HomeworkRepository
+from services.repositories.repository_factory import RepositoryFactory
+from utils.pagination_utils import PaginationUtils
 
 # Load environment variables
 load_dotenv()
 
 class FirebaseService:
+    """
+    Homework storage service
+    
+    Records are kept by a pluggable repository (STORAGE_BACKEND: Firestore,
+    embedded SQLite, or mock) behind a read-through cache; uploaded files are
+    kept in the local content-addressed blob store.
+    """
+    
     def __init__(self):
-        self.db = None
+        self.repository: Optional[HomeworkRepository] = None
+        self.initialized = False
+        self.problem_cache: Optional[RecordCache[HomeworkProblem]] = None
+        if settings.HOMEWORK_CACHE_ENABLED:
+            self.problem_cache = RecordCache(
+                max_entries=settings.HOMEWORK_CACHE_MAX_ENTRIES,
+                ttl=settings.HOMEWORK_CACHE_TTL_SECONDS,
+                negative_ttl=settings.HOMEWORK_CACHE_NEGATIVE_TTL_SECONDS
+            )
+        # The storage backend is connected on first use so importing and booting the app stays cheap
+        self._init_lock = asyncio.Lock()
         self.executor = ThreadPoolExecutor(max_workers=4)
         # Local file storage configuration
         self.uploads_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
         self._ensure_uploads_dir()
+        self.blob_store = BlobStore(self.uploads_dir)
     
     def _ensure_uploads_dir(self):
         """Ensure uploads directory exists"""
@@ -33,49 +53,70 @@ class FirebaseService:
             print(f"❌ Error creating uploads directory: {e}")
     
     def initialize(self):
-        """Initialize Firebase Admin SDK (Firestore only)"""
-        try:
-            # Initialize Firebase Admin for Firestore only
-            if not firebase_admin._apps:
-                if os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH"):
-                    cred = credentials.Certificate(os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH"))
-                    firebase_admin.initialize_app(cred)
-                else:
-                    # For local development without service account
-                    firebase_admin.initialize_app()
-            
-            self.db = firestore.client()
-            print("✅ Firebase Firestore connected successfully")
-            
-        except Exception as e:
-            print(f"Firebase initialization error: {e}")
-            print("⚠️  Running with mock Firestore for development")
-            self.db = None
+        """Create and connect the configured storage backend"""
+        self.repository = RepositoryFactory.create_repository(settings.STORAGE_BACKEND, self.executor)
+        self.initialized = True
     
-    async def save_file(self, temp_file_path: str, original_filename: str) -> str:
-        """Save file to local uploads directory and return the local file path"""
-        try:
-            # Generate unique filename to prevent conflicts
-            file_extension = os.path.splitext(original_filename)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            
-            # Create permanent file path in uploads directory
-            permanent_file_path = os.path.join(self.uploads_dir, unique_filename)
-            
-            # Copy file from temp location to permanent location
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                self.executor,
-                lambda: shutil.copy2(temp_file_path, permanent_file_path)
-            )
-            
-            print(f"✅ File saved locally: {permanent_file_path}")
-            return permanent_file_path
-            
-        except Exception as e:
-            print(f"❌ Error saving file locally: {e}")
-            # Fallback to temp file path
-            return temp_file_path
+    async def ensure_initialized(self):
+        """Initialize the storage backend on first use without blocking the event loop"""
+        if self.initialized:
+            return
+        async with self._init_lock:
+            if not self.initialized:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(self.executor, self.initialize)
+    
+    async def flush(self):
+        """Persist any buffered writes"""
+        if self.repository:
+            await self.repository.flush()
+    
+    async def close(self):
+        """Flush buffered writes and release the storage backend (called at shutdown)"""
+        if self.repository:
+            await self.repository.close()
+    
+    async def warm_up(self) -> Dict[str, Any]:
+        """Connect to the storage backend and prime its connection"""
+        await self.ensure_initialized()
+        result = await self.repository.warm_up()
+        return {"backend": self.repository.repository_name, **result}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and storage backend counters for /health/stats"""
+        stats = {}
+        if self.problem_cache:
+            stats["homework_cache"] = self.problem_cache.get_stats()
+        if self.repository:
+            stats["storage"] = {"backend": self.repository.repository_name, **self.repository.get_stats()}
+        return stats
+    
+    async def store_upload(self, staged_file: StoredFile, original_filename: str) -> StoredFile:
+        """Move a staged upload into the content-addressed store"""
+        extension = os.path.splitext(original_filename)[1]
+        loop = asyncio.get_event_loop()
+        stored_file = await loop.run_in_executor(
+            self.executor,
+            self.blob_store.commit,
+            staged_file,
+            extension
+        )
+        
+        if stored_file.deduplicated:
+            print(f"♻️  Duplicate upload, reusing stored file: {stored_file.file_path}")
+        else:
+            print(f"✅ File saved locally: {stored_file.file_path}")
+        return stored_file
+    
+    async def release_blob_reference(self, file_hash: str) -> int:
+        """Drop one reference to a stored blob and return the remaining count"""
+        await self.ensure_initialized()
+        return await self.repository.release_blob_reference(file_hash)
+    
+    async def get_blob_reference_count(self, file_hash: str) -> int:
+        """Number of homework records referencing a stored blob"""
+        await self.ensure_initialized()
+        return await self.repository.get_blob_reference_count(file_hash)
     
     async def get_file_path(self, file_path: str) -> str:
         """Return the local file path (files are already stored locally)"""
@@ -96,119 +137,177 @@ class FirebaseService:
             print(f"❌ Error accessing file: {e}")
             return "/tmp/mock_homework_file.png"
     
-    async def create_homework_problem(self, file_path: str, filename: str) -> str:
-        """Create a new homework problem record in Firestore"""
+    async def create_homework_problem(self, file_path: str, filename: str,
+                                      file_hash: Optional[str] = None) -> str:
+        """
+        Create a new homework problem record
+        
+        When the file is content-addressed (file_hash given), the blob's
+        reference count is incremented together with the record.
+        """
         try:
-            problem_id = str(uuid.uuid4())
-            homework_data = {
-                "id": problem_id,
-                "filename": filename,
-                "file_path": file_path,  # Local file path instead of URL
-                "upload_timestamp": datetime.now(),
-                "status": "uploaded"
-            }
+            await self.ensure_initialized()
             
-            if self.db:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    self.executor,
-                    lambda: self.db.collection("homework_problems").document(problem_id).set(homework_data)
-                )
-                print(f"✅ Homework problem created in Firestore: {problem_id}")
-            else:
-                # Mock implementation for development
-                print(f"⚠️  Mock: Created homework problem {problem_id}")
+            problem = HomeworkProblem(
+                id=str(uuid.uuid4()),
+                filename=filename,
+                file_path=file_path,  # Local file path instead of URL
+                file_hash=file_hash,
+                upload_timestamp=datetime.now(),
+                status="uploaded"
+            )
+            await self.repository.create_problem(problem)
+            
+            if self.problem_cache:
+                self.problem_cache.put(problem.id, problem)
             
-            return problem_id
+            return problem.id
             
         except Exception as e:
             print(f"❌ Error creating homework problem: {e}")
             return str(uuid.uuid4())  # Return mock ID
     
-    async def get_homework_problem(self, problem_id: str) -> Optional[HomeworkProblem]:
-        """Retrieve homework problem by ID"""
-        try:
-            if not self.db:
-                # Mock implementation
-                return HomeworkProblem(
-                    id=problem_id,
-                    filename="mock_homework.png",
-                    file_path="mock://local-storage/mock_homework.png",
-                    upload_timestamp=datetime.now(),
-                    status="uploaded"
-                )
-            
-            loop = asyncio.get_event_loop()
-            doc = await loop.run_in_executor(
-                self.executor,
-                lambda: self.db.collection("homework_problems").document(problem_id).get()
+    async def create_homework_problems(self, stored_files: List[Tuple[StoredFile, str]]) -> List[str]:
+        """
+        Create records for several stored uploads (file, original filename) in one batch
+        
+        Returns the new problem IDs in the same order. Raises on storage errors,
+        since a bulk upload must not report IDs that were never stored.
+        """
+        await self.ensure_initialized()
+        
+        upload_timestamp = datetime.now()
+        problems = [
+            HomeworkProblem(
+                id=str(uuid.uuid4()),
+                filename=filename,
+                file_path=stored_file.file_path,
+                file_hash=stored_file.sha256,
+                upload_timestamp=upload_timestamp,
+                status="uploaded"
             )
+            for stored_file, filename in stored_files
+        ]
+        await self.repository.create_problems(problems)
+        
+        if self.problem_cache:
+            for problem in problems:
+                self.problem_cache.put(problem.id, problem)
+        
+        return [problem.id for problem in problems]
+    
+    async def get_homework_problem(self, problem_id: str, use_cache: bool = True) -> Optional[HomeworkProblem]:
+        """Retrieve homework problem by ID (use_cache=False reads through to the backend)"""
+        try:
+            await self.ensure_initialized()
             
-            if doc.exists:
-                data = doc.to_dict()
-                # Handle backward compatibility for old records with file_url
-                if "file_url" in data and "file_path" not in data:
-                    data["file_path"] = data["file_url"]
-                    del data["file_url"]
-                return HomeworkProblem(**data)
+            if self.problem_cache and use_cache:
+                cached = self.problem_cache.get(problem_id)
+                if cached is not MISSING:
+                    return cached
             
-            return None
+            problem = await self.repository.get_problem(problem_id)
+            if self.problem_cache:
+                self.problem_cache.put(problem_id, problem)
+            return problem
             
         except Exception as e:
             print(f"❌ Error retrieving homework problem: {e}")
             return None
     
+    async def delete_homework_problem(self, problem: HomeworkProblem) -> int:
+        """
+        Delete a homework problem record and drop its blob reference
+        
+        Returns the blob's remaining reference count; the file itself is left
+        for StorageCleanupService to remove. Raises on storage errors.
+        """
+        await self.ensure_initialized()
+        try:
+            return await self.repository.delete_problem(problem)
+        finally:
+            if self.problem_cache:
+                self.problem_cache.invalidate(problem.id)
+    
+    async def list_problems_uploaded_before(self, cutoff: datetime, limit: int) -> List[HomeworkProblem]:
+        """Oldest homework problems uploaded before cutoff (for retention sweeps)"""
+        await self.ensure_initialized()
+        return await self.repository.list_problems_uploaded_before(cutoff, limit)
+    
+    async def begin_solve(self, problem_id: str) -> bool:
+        """
+        Take the solve lease on a homework problem (status "processing")
+        
+        Returns False while another worker holds a fresh lease. If the backend
+        cannot be reached the solve goes ahead uncoordinated.
+        """
+        try:
+            await self.ensure_initialized()
+            acquired = await self.repository.acquire_solve_lease(problem_id, settings.SOLVE_LEASE_SECONDS)
+        except Exception as e:
+            print(f"⚠️  Could not take solve lease for {problem_id}: {e}")
+            acquired = True
+        
+        if self.problem_cache:
+            self.problem_cache.invalidate(problem_id)
+        return acquired
+    
+    async def fail_solve(self, problem_id: str):
+        """Release the solve lease after a failed solve (status "error")"""
+        try:
+            await self.ensure_initialized()
+            await self.repository.mark_solve_failed(problem_id)
+        except Exception as e:
+            print(f"⚠️  Could not record failed solve for {problem_id}: {e}")
+        
+        if self.problem_cache:
+            self.problem_cache.invalidate(problem_id)
+    
     async def update_homework_solution(self, problem_id: str, solution: Solution):
         """Update homework problem with solution"""
         try:
-            if not self.db:
-                print(f"Mock: Updated homework {problem_id} with solution")
-                return
+            await self.ensure_initialized()
+            await self.repository.update_solution(problem_id, solution)
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                self.executor,
-                lambda: self.db.collection("homework_problems").document(problem_id).update({
-                    "solution": solution.dict(),
-                    "status": "solved"
-                })
-            )
+            if self.problem_cache:
+                # Keep a cached record current rather than forcing a re-read
+                cached = self.problem_cache.peek(problem_id)
+                if cached:
+                    self.problem_cache.put(problem_id, cached.copy(update={"solution": solution, "status": "solved"}))
+                else:
+                    self.problem_cache.invalidate(problem_id)
             
         except Exception as e:
+            if self.problem_cache:
+                self.problem_cache.invalidate(problem_id)
             print(f"Error updating homework solution: {e}")
     
-    async def list_homework_problems(self, limit: int = 10, offset: int = 0) -> List[HomeworkProblem]:
-        """List recent homework problems"""
+    async def list_homework_problems(self, limit: int = 10, offset: int = 0,
+                                     cursor: Optional[str] = None,
+                                     full: bool = True) -> Union[List[HomeworkProblem], List[HomeworkSummary]]:
+        """
+        List recent homework problems, most recent first
+        
+        With full=False only summaries are read (no solution payload), so the
+        cost of a page does not grow with solution size.
+        
+        Pass the cursor of the previous page's last item (PaginationUtils.encode_cursor)
+        to continue after it. Offset is kept for backward compatibility only:
+        its cost grows with the number of skipped records.
+        
+        Errors are raised rather than returned as an empty page, which clients
+        would take for the end of the list (e.g. while the Firestore index in
+        firestore.indexes.json is missing or still building).
+        """
+        # Raises InvalidCursorError for malformed cursors
+        start_after = PaginationUtils.decode_cursor(cursor) if cursor else None
+        
         try:
-            if not self.db:
-                # Mock implementation
-                return [
-                    HomeworkProblem(
-                        id="mock-1",
-                        filename="sample_homework.png",
-                        file_path="mock://local-storage/sample_homework.png",
-                        upload_timestamp=datetime.now(),
-                        status="uploaded"
-                    )
-                ]
-            
-            loop = asyncio.get_event_loop()
-            docs = await loop.run_in_executor(
-                self.executor,
-                lambda: self.db.collection("homework_problems")
-                           .order_by("upload_timestamp", direction=firestore.Query.DESCENDING)
-                           .limit(limit)
-                           .offset(offset)
-                           .stream()
-            )
-            
-            problems = []
-            for doc in docs:
-                data = doc.to_dict()
-                problems.append(HomeworkProblem(**data))
-            
-            return problems
+            await self.ensure_initialized()
+            if full:
+                return await self.repository.list_problems(limit, offset, start_after=start_after)
+            return await self.repository.list_summaries(limit, offset, start_after=start_after)
             
         except Exception as e:
-            print(f"Error listing homework problems: {e}")
-            return []
+            print(f"❌ Error listing homework problems: {e}")
+            raise
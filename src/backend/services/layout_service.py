@@ -0,0 +1,92 @@
+import cv2
+import numpy as np
+import re
+from typing import List, Optional
+
+from models.homework_models import BoundingBox, LayoutRegion, RegionType
+
+class LayoutService:
+    """Split a preprocessed page into text blocks and figure regions"""
+
+    QUESTION_START = re.compile(r'^\s*\d+\.?\s+\S')
+    OPTION_MARKER = re.compile(r'\(([1-4A-Da-d])\)')
+
+    # Regions smaller than this fraction of the page are treated as specks of noise
+    MIN_REGION_AREA_RATIO = 0.0005
+    # Padding (in pixels) added around each tile so glyph edges are not clipped
+    TILE_PADDING = 4
+
+    def detect_regions(self, binary: np.ndarray, page_number: Optional[int] = None) -> List[LayoutRegion]:
+        """
+        Detect text blocks and figures on a binarized page (dark ink on white)
+
+        Returns regions in reading order (top to bottom, then left to right).
+        Text blocks are typed TEXT until their OCR output classifies them further.
+        """
+        page_height, page_width = binary.shape[:2]
+        ink = cv2.bitwise_not(binary)
+
+        char_height = self._estimate_char_height(ink)
+
+        # Smear glyphs horizontally into lines and lines vertically into blocks
+        kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT,
+            (max(3, char_height * 2), max(3, char_height // 2 + 1))
+        )
+        blocks = cv2.dilate(ink, kernel, iterations=1)
+        contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_area = page_width * page_height * self.MIN_REGION_AREA_RATIO
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < min_area:
+                continue
+
+            region_type = RegionType.FIGURE if self._is_figure(ink[y:y + h, x:x + w], char_height) else RegionType.TEXT
+            regions.append(LayoutRegion(
+                region_type=region_type,
+                bounding_box=BoundingBox(x=x, y=y, width=w, height=h),
+                page_number=page_number
+            ))
+
+        regions.sort(key=lambda r: (r.bounding_box.y, r.bounding_box.x))
+        return regions
+
+    def crop(self, image: np.ndarray, box: BoundingBox) -> np.ndarray:
+        """Crop a padded tile for a region"""
+        page_height, page_width = image.shape[:2]
+        top = max(0, box.y - self.TILE_PADDING)
+        left = max(0, box.x - self.TILE_PADDING)
+        bottom = min(page_height, box.y + box.height + self.TILE_PADDING)
+        right = min(page_width, box.x + box.width + self.TILE_PADDING)
+        return image[top:bottom, left:right]
+
+    def classify_text(self, text: str) -> RegionType:
+        """Classify an OCR'd text block as a question start, an option row or plain text"""
+        stripped = text.strip()
+        if self.QUESTION_START.match(stripped):
+            return RegionType.QUESTION
+        if stripped.startswith('(') and self.OPTION_MARKER.match(stripped):
+            return RegionType.OPTIONS
+        return RegionType.TEXT
+
+    def _estimate_char_height(self, ink: np.ndarray) -> int:
+        """Median height of connected components, used to scale the layout kernels"""
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]  # Skip the background label
+        heights = heights[heights > 2]
+        if count <= 1 or len(heights) == 0:
+            return 12
+        return int(np.median(heights))
+
+    def _is_figure(self, region_ink: np.ndarray, char_height: int) -> bool:
+        """Figures contain strokes much larger than any glyph (diagrams, tables, shapes)"""
+        _, _, stats, _ = cv2.connectedComponentsWithStats(region_ink, connectivity=8)
+        if len(stats) <= 1:
+            return False
+
+        large = char_height * 4
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        return bool(np.any((heights > large) & (widths > large)))
@@ -1,19 +1,30 @@
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import asyncio
 from datetime import datetime
 import time
+import uuid
 
-from models.homework_models import ExtractedContent, Solution, Question, ProblemType
+from models.homework_models import (
+    ExtractedContent, Solution, Question, PipelineReport, DerivativeManifest
+)
+from services.question_parser import QuestionParser
+from services.provider_scheduler import ProviderScheduler
 from services.ai_providers.provider_factory import AIProviderFactory
 from services.ai_providers.base_provider import AIProvider
 from config.config import settings
 
+class SolveFailedError(Exception):
+    """Raised when a file was processed but no questions could be solved from it"""
+
 class MathSolverService:
     def __init__(self, 
                  provider_name: Optional[str] = None, 
                  model: Optional[str] = None,
-                 api_key: Optional[str] = None):
+                 api_key: Optional[str] = None,
+                 ocr_service_factory: Optional[Callable[[], Any]] = None,
+                 derivative_service_factory: Optional[Callable[[], Any]] = None,
+                 provider_scheduler: Optional[ProviderScheduler] = None):
         """
         Initialize Math Solver Service with configurable AI provider
         
@@ -21,6 +32,9 @@ class MathSolverService:
             provider_name: AI provider to use ("openai", "gemini", "mock")
             model: Specific model to use
             api_key: API key for the provider
+            ocr_service_factory: Returns the shared OCR service (created on first use)
+            derivative_service_factory: Returns the service preparing upload derivatives, if used
+            provider_scheduler: Shares provider call slots fairly between concurrent solves and priority classes
         """
         # Use centralized configuration with Gemini as default
         if not provider_name:
@@ -43,21 +57,125 @@ class MathSolverService:
             api_key=api_key
         )
         
+        # OCR service is only needed for the text-layer and OCR fallback paths
+        self._ocr_service = None
+        self._ocr_service_factory = ocr_service_factory
+        self._derivative_service_factory = derivative_service_factory
+        self.scheduler = provider_scheduler or ProviderScheduler(
+            settings.PROVIDER_MAX_CONCURRENCY,
+            weights=ProviderScheduler.parse_classes(settings.PROVIDER_PRIORITY_WEIGHTS),
+            reservations=ProviderScheduler.parse_classes(settings.PROVIDER_PRIORITY_RESERVATIONS)
+        )
+        
         print(f"Initialized Math Solver with {self.provider.provider_name} provider")
     
+    @property
+    def ocr_service(self):
+        """Lazily created OCR service shared by the text-based solving paths"""
+        if self._ocr_service is None:
+            if self._ocr_service_factory:
+                self._ocr_service = self._ocr_service_factory()
+            else:
+                from services.ocr_service import OCRService
+                self._ocr_service = OCRService()
+        return self._ocr_service
+    
+    async def _get_derivatives(self, file_path: str) -> Optional[DerivativeManifest]:
+        """Artifacts precomputed at upload, waiting for them if they are still being generated"""
+        if not self._derivative_service_factory:
+            return None
+        return await self._derivative_service_factory().get_manifest(file_path)
+    
+    async def _call_provider(self, method: Callable, *args):
+        """Make a provider call once the scheduler grants a slot"""
+        async with self.scheduler.slot():
+            return await method(*args)
+    
+    @staticmethod
+    def _collect_answers(questions: List[Question], results: List[Any]) -> Tuple[List[Question], List[Exception]]:
+        """
+        Pair questions with their gathered solve results
+        
+        A question whose provider call failed keeps its place with the error
+        recorded in its explanation, so one failure does not discard the other
+        answers. Returns the answers and the errors.
+        """
+        answers, errors = [], []
+        for question, result in zip(questions, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result  # Cancellation
+                print(f"⚠️  Could not solve question {question.question_number}: {result}")
+                errors.append(result)
+                answers.append(question.model_copy(update={"explanation": f"Could not solve this question: {result}"}))
+            else:
+                answers.append(result)
+        return answers, errors
+    
+    @staticmethod
+    def _raise_if_nothing_solved(answers: List[Question], errors: List[Exception]):
+        """Fail the solve only when every question failed"""
+        if errors and len(errors) == len(answers):
+            raise errors[0]
+    
     async def solve_problems(self, extracted_content: ExtractedContent) -> Solution:
         """Solve mathematical problems using AI provider"""
         start_time = time.time()
         
         try:
-            solved_questions = []
+            # Questions are independent; the scheduler bounds how many are in flight
+            results = await asyncio.gather(*(
+                self._call_provider(self.provider.solve_single_question, question)
+                for question in extracted_content.questions
+            ), return_exceptions=True)
+            solved_questions, errors = self._collect_answers(extracted_content.questions, results)
+            self._raise_if_nothing_solved(solved_questions, errors)
             
-            for question in extracted_content.questions:
-                solved_question = await self.provider.solve_single_question(question)
-                solved_questions.append(solved_question)
+            # Generate overall explanation
+            overall_explanation = await self._call_provider(self.provider.generate_overall_explanation, solved_questions)
+            
+            processing_time = time.time() - start_time
+            
+            return Solution(
+                problem_id="",  # This will be set by the caller
+                questions_solved=solved_questions,
+                overall_explanation=overall_explanation,
+                total_questions=len(solved_questions),
+                solved_at=datetime.now(),
+                processing_time_seconds=processing_time
+            )
+            
+        except Exception as e:
+            print(f"Error solving problems with {self.provider.provider_name}: {e}")
+            raise
+    
+    async def solve_problems_streaming(self, question_queue: asyncio.Queue) -> Solution:
+        """
+        Solve questions as they arrive on a queue (terminated by None)
+        
+        Used with OCRService.extract_content(..., question_queue=...) so that solving
+        overlaps with OCR of later pages.
+        """
+        start_time = time.time()
+        questions = []
+        pending = []
+        
+        try:
+            # Each question starts solving as soon as it arrives
+            while True:
+                question = await question_queue.get()
+                if question is None:
+                    break
+                questions.append(question)
+                pending.append(asyncio.create_task(
+                    self._call_provider(self.provider.solve_single_question, question)
+                ))
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            solved_questions, errors = self._collect_answers(questions, results)
+            self._raise_if_nothing_solved(solved_questions, errors)
             
             # Generate overall explanation
-            overall_explanation = await self.provider.generate_overall_explanation(solved_questions)
+            overall_explanation = await self._call_provider(self.provider.generate_overall_explanation, solved_questions)
             
             processing_time = time.time() - start_time
             
@@ -72,22 +190,55 @@ class MathSolverService:
             
         except Exception as e:
             print(f"Error solving problems with {self.provider.provider_name}: {e}")
-            # Create a basic fallback solution
-            return self._create_fallback_solution(extracted_content, start_time)
+            for task in pending:
+                task.cancel()
+            raise
     
     async def solve_problems_from_image(self, image_path: str) -> Solution:
-        """Solve mathematical problems directly from image using AI vision (bypasses OCR)"""
+        """
+        Solve mathematical problems directly from image using AI vision (bypasses OCR)
+        
+        Failures raise (ProviderError, SolveFailedError, ...) rather than
+        returning a placeholder solution, so they are never stored as solved.
+        """
+        solution = await self._solve_file(image_path)
+        if not solution.questions_solved:
+            raise SolveFailedError("No questions were found in the file")
+        return solution
+    
+    async def _solve_file(self, image_path: str) -> Solution:
+        """Pick the cheapest pipeline for a file and solve it"""
         start_time = time.time()
         
         try:
+            # Page rasters, vision images and text layer prepared at upload time
+            # (OCR reads them transparently; without them files are prepared inline)
+            derivatives = await self._get_derivatives(image_path)
+            
+            # Born-digital PDFs: use the embedded text with text-only model calls
+            needs_text_layer = derivatives is None or derivatives.all_pages_have_text
+            if image_path.lower().endswith('.pdf') and settings.PDF_TEXT_LAYER_ENABLED and needs_text_layer:
+                extracted_content = await self.ocr_service.extract_text_layer_content(image_path)
+                if extracted_content:
+                    print(f"⚡ Solving {len(extracted_content.questions)} questions from PDF text layer")
+                    return await self.solve_problems(extracted_content)
+            
             print(f"🔍 Analyzing image directly with {self.provider.provider_name}...")
             
             # Check if provider supports image processing
             if hasattr(self.provider, 'solve_homework_from_image'):
-                solved_questions = await self.provider.solve_homework_from_image(image_path)
+                # Hybrid mode: OCR first, pay for vision only where OCR is not good enough
+                if settings.SOLVE_MODE == "hybrid" and self.ocr_service.tesseract_available:
+                    return await self._solve_hybrid(image_path, start_time, derivatives)
+                
+                # Images go to the model as their compressed vision derivative; PDFs as-is
+                vision_path = image_path
+                if derivatives and not image_path.lower().endswith('.pdf'):
+                    vision_path = derivatives.pages[0].vision_path
+                solved_questions = await self._call_provider(self.provider.solve_homework_from_image, vision_path)
                 
                 # Generate overall explanation
-                overall_explanation = await self.provider.generate_overall_explanation(solved_questions)
+                overall_explanation = await self._call_provider(self.provider.generate_overall_explanation, solved_questions)
                 
                 processing_time = time.time() - start_time
                 print(f"✅ Solved {len(solved_questions)} questions in {processing_time:.2f}s using AI Vision")
@@ -105,62 +256,150 @@ class MathSolverService:
                 print(f"⚠️  {self.provider.provider_name} doesn't support direct image processing")
                 print("📝 Falling back to OCR-based approach...")
                 
-                # Create mock extracted content and use regular solving
-                from services.ocr_service import OCRService
-                ocr_service = OCRService()
-                extracted_content = await ocr_service.extract_content(image_path)
-                return await self.solve_problems(extracted_content)
+                # Solve each question as soon as OCR completes it
+                question_queue = asyncio.Queue()
+                extraction = asyncio.create_task(
+                    self.ocr_service.extract_content(image_path, question_queue=question_queue)
+                )
+                try:
+                    return await self.solve_problems_streaming(question_queue)
+                finally:
+                    if not extraction.done():
+                        extraction.cancel()
+                    await asyncio.gather(extraction, return_exceptions=True)
                 
         except Exception as e:
             print(f"❌ Error solving problems from image: {e}")
-            # Create a fallback solution
-            processing_time = time.time() - start_time
-            return Solution(
-                problem_id="",
-                questions_solved=[Question(
-                    question_number=1,
-                    question_text="Error processing image",
-                    problem_type=ProblemType.OTHER,
-                    explanation=f"Unable to process image: {str(e)}",
-                    steps=["Please check the image format and try again"]
-                )],
-                overall_explanation=f"Unable to process homework image due to error: {str(e)}",
-                total_questions=1,
-                solved_at=datetime.now(),
-                processing_time_seconds=processing_time
-            )
-    
-    def get_provider_info(self) -> Dict[str, Any]:
-        """Get information about the current AI provider"""
-        return {
-            "provider_name": self.provider.provider_name,
-            "is_available": self.provider.is_available,
-            "supported_models": self.provider.supported_models
-        }
+            raise
     
-    def _create_fallback_solution(self, extracted_content: ExtractedContent, start_time: float) -> Solution:
-        """Create a basic fallback solution when AI provider fails"""
-        solved_questions = []
-        
-        for question in extracted_content.questions:
-            # Create a basic response indicating an error occurred
-            question.correct_answer = "Unable to solve - AI provider error"
-            question.explanation = f"There was an error processing this question with the {self.provider.provider_name} provider. Please try again or check your API configuration."
-            question.steps = [
-                "Error occurred during AI processing",
-                "Check API key configuration",
-                "Verify provider availability",
-                "Contact support if issue persists"
-            ]
-            solved_questions.append(question)
+    async def _solve_hybrid(self, file_path: str, start_time: float,
+                            derivatives: Optional[DerivativeManifest] = None) -> Solution:
+        """
+        Confidence-gated hybrid pipeline
+        
+        Pages whose OCR confidence clears HYBRID_MIN_OCR_CONFIDENCE and that have no
+        figures are solved question by question with the text model; the remaining
+        pages are escalated to the vision model.
+        """
+        pages = await self.ocr_service.extract_pages(file_path)
+        
+        text_questions = []
+        escalated_pages = []
+        for page in pages:
+            questions = []
+            if page.confidence >= settings.HYBRID_MIN_OCR_CONFIDENCE and not page.has_figures:
+                questions = QuestionParser().parse(page.regions)
+            if questions:
+                text_questions.extend(questions)
+            else:
+                escalated_pages.append(page.page_number)
+        
+        text_errors = []
+        
+        async def solve_text():
+            branch_start = time.time()
+            results = await asyncio.gather(*(
+                self._call_provider(self.provider.solve_single_question, question)
+                for question in text_questions
+            ), return_exceptions=True)
+            solved, errors = self._collect_answers(text_questions, results)
+            text_errors.extend(errors)
+            return solved, time.time() - branch_start
         
+        async def solve_vision():
+            branch_start = time.time()
+            pages_solved = await asyncio.gather(*(
+                self._solve_page_with_vision(file_path, page_number, derivatives)
+                for page_number in escalated_pages
+            ))
+            solved = []
+            for page_number, page_questions in zip(escalated_pages, pages_solved):
+                for question in page_questions:
+                    question.page_number = page_number
+                solved.extend(page_questions)
+            return solved, time.time() - branch_start
+        
+        solve_start = time.time()
+        (solved_text, text_seconds), (solved_vision, vision_seconds) = await asyncio.gather(
+            solve_text(), solve_vision()
+        )
+        solve_seconds = time.time() - solve_start
+        
+        # Restore page order (sort is stable, so order within a page is kept)
+        solved_questions = sorted(solved_text + solved_vision, key=lambda q: q.page_number or 0)
+        self._raise_if_nothing_solved(solved_questions, text_errors)
+        overall_explanation = await self._call_provider(self.provider.generate_overall_explanation, solved_questions)
+        
+        report = self._build_pipeline_report(
+            len(pages), len(escalated_pages), len(text_questions),
+            text_seconds, vision_seconds, solve_seconds
+        )
         processing_time = time.time() - start_time
+        print(f"🔀 Hybrid solve: {report.pages_text} text page(s), {report.pages_escalated} escalated "
+              f"({report.escalation_ratio:.0%}), est. saved ${report.estimated_cost_saved_usd:.4f} "
+              f"and {report.estimated_latency_saved_seconds:.1f}s")
         
         return Solution(
-            problem_id="",
+            problem_id="",  # This will be set by the caller
             questions_solved=solved_questions,
-            overall_explanation=f"Unable to process homework due to {self.provider.provider_name} provider error. Please check your configuration and try again.",
+            overall_explanation=overall_explanation,
             total_questions=len(solved_questions),
             solved_at=datetime.now(),
-            processing_time_seconds=processing_time
+            processing_time_seconds=processing_time,
+            pipeline_report=report
         )
+    
+    async def _solve_page_with_vision(self, file_path: str, page_number: int,
+                                      derivatives: Optional[DerivativeManifest] = None) -> List[Question]:
+        """Send a single page to the vision model"""
+        page = derivatives.page(page_number) if derivatives else None
+        if page:
+            return await self._call_provider(self.provider.solve_homework_from_image, page.vision_path)
+        
+        if not file_path.lower().endswith('.pdf'):
+            return await self._call_provider(self.provider.solve_homework_from_image, file_path)
+        
+        # Vision calls take a file path, so write just this page out as an image
+        image = await self.ocr_service.rasterize_pdf_page(file_path, page_number)
+        page_path = os.path.join(settings.TEMP_DIR, f"{uuid.uuid4()}.png")
+        try:
+            image.save(page_path)
+            return await self._call_provider(self.provider.solve_homework_from_image, page_path)
+        finally:
+            if os.path.exists(page_path):
+                os.remove(page_path)
+    
+    def _build_pipeline_report(self, pages_total: int, pages_escalated: int, text_question_count: int,
+                               text_seconds: float, vision_seconds: float,
+                               solve_seconds: float) -> PipelineReport:
+        """Estimate cost and latency saved against sending every page to the vision model"""
+        estimated_cost = (pages_escalated * settings.VISION_PAGE_COST_USD
+                          + text_question_count * settings.TEXT_QUESTION_COST_USD)
+        vision_only_cost = pages_total * settings.VISION_PAGE_COST_USD
+        
+        # Prefer the vision latency measured on this request over the configured estimate
+        if pages_escalated:
+            vision_page_seconds = vision_seconds / pages_escalated
+        else:
+            vision_page_seconds = settings.VISION_PAGE_LATENCY_SECONDS
+        
+        return PipelineReport(
+            mode="hybrid",
+            pages_total=pages_total,
+            pages_text=pages_total - pages_escalated,
+            pages_escalated=pages_escalated,
+            escalation_ratio=pages_escalated / pages_total if pages_total else 0.0,
+            text_seconds=text_seconds,
+            vision_seconds=vision_seconds,
+            estimated_cost_usd=estimated_cost,
+            estimated_cost_saved_usd=vision_only_cost - estimated_cost,
+            estimated_latency_saved_seconds=pages_total * vision_page_seconds - solve_seconds
+        )
+    
+    def get_provider_info(self) -> Dict[str, Any]:
+        """Get information about the current AI provider"""
+        return {
+            "provider_name": self.provider.provider_name,
+            "is_available": self.provider.is_available,
+            "supported_models": self.provider.supported_models
+        }
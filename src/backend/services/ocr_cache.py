@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+class OCRCache:
+    """
+    Persistent, size-bounded cache of per-page OCR results
+
+    Entries are keyed by a hash of the page pixels plus the preprocessing and
+    Tesseract configuration, so any change to the pipeline misses the cache.
+    The least recently used entries are evicted once either the entry or the
+    byte limit is exceeded. All methods are blocking; call them from an executor.
+    """
+
+    def __init__(self, db_path: str, max_entries: int, max_bytes: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS ocr_pages (
+                       key TEXT PRIMARY KEY,
+                       payload TEXT NOT NULL,
+                       size INTEGER NOT NULL,
+                       last_access REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_pages_access ON ocr_pages(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(pixels: np.ndarray, preprocess_config: str, tesseract_config: str) -> str:
+        """Build a cache key from page pixels and the OCR pipeline configuration"""
+        digest = hashlib.sha256()
+        digest.update(str(pixels.shape).encode())
+        digest.update(str(pixels.dtype).encode())
+        digest.update(np.ascontiguousarray(pixels).data)
+        digest.update(b"\0" + preprocess_config.encode())
+        digest.update(b"\0" + tesseract_config.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a key, or None"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT payload FROM ocr_pages WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE ocr_pages SET last_access = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            except sqlite3.Error as e:
+                print(f"⚠️  OCR cache read failed: {e}")
+                self.misses += 1
+                return None
+
+    def put(self, key: str, payload: Dict[str, Any]):
+        """Store a payload and evict least recently used entries beyond the limits"""
+        data = json.dumps(payload)
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_pages (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, data, len(data), time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  OCR cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop the oldest entries once a limit is exceeded"""
+        count, total_size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_pages").fetchone()
+        if count <= self.max_entries and total_size <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the limits so eviction is not repeated on every insert
+        target_entries = max(1, int(self.max_entries * 0.9))
+        excess_bytes = total_size - int(self.max_bytes * 0.9)
+        rows = conn.execute("SELECT key, size FROM ocr_pages ORDER BY last_access ASC").fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if count <= target_entries and excess_bytes <= 0:
+                break
+            stale_keys.append((key,))
+            count -= 1
+            excess_bytes -= size
+        conn.executemany("DELETE FROM ocr_pages WHERE key = ?", stale_keys)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM ocr_pages")
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
@@ -1,23 +1,67 @@
 import cv2
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageDraw
 import pytesseract
-import re
-from typing import List, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import os
 from pdf2image import convert_from_path
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
-from models.homework_models import ExtractedContent, Question, ProblemType
+from models.homework_models import (
+    ExtractedContent, Question, ProblemType, LayoutRegion, RegionType, BoundingBox, PageExtraction,
+    DerivativeManifest
+)
+from services.derivative_service import DerivativeService
+from services.layout_service import LayoutService
+from services.ocr_cache import OCRCache
+from services.question_parser import QuestionParser
+from utils.pdf_utils import PDFUtils
+from config.config import settings
+
+# Callback receiving questions as soon as the parser completes them
+QuestionEmitter = Callable[[List[Question]], Awaitable[None]]
 
 class OCRService:
+    # Math-friendly Tesseract configuration, applied to each text tile
+    TESSERACT_CONFIG = '--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz()[]{}+-*/=.,?!:; \n'
+    # Describes _preprocess_image; change it whenever the preprocessing changes so cached pages are invalidated
+    PREPROCESS_CONFIG = 'gray|nlmeans-denoise|adaptive-gaussian-11-2|close-1x1'
+    
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=2)
-        self.tesseract_available = self._check_tesseract_installation()
+        # Tesseract runs as a subprocess, so tiles OCR in parallel across threads
+        self.ocr_executor = ThreadPoolExecutor(max_workers=settings.OCR_MAX_WORKERS)
+        self.pdf_utils = PDFUtils()
+        self.layout_service = LayoutService()
+        self.ocr_cache = self._create_ocr_cache()
+        # Tesseract detection spawns a subprocess, so it is deferred until OCR is first needed
+        self._tesseract_available = None
+    
+    @property
+    def tesseract_available(self) -> bool:
+        """Whether Tesseract can be used (checked once, on first access)"""
+        if self._tesseract_available is None:
+            self._tesseract_available = self._check_tesseract_installation()
+            
+            # Configure tesseract path if needed
+            self._configure_tesseract_path()
+        return self._tesseract_available
+    
+    @tesseract_available.setter
+    def tesseract_available(self, value: bool):
+        self._tesseract_available = value
+    
+    def _create_ocr_cache(self) -> Optional[OCRCache]:
+        """Create the persistent OCR result cache if enabled"""
+        if not settings.OCR_CACHE_ENABLED:
+            return None
         
-        # Configure tesseract path if needed
-        self._configure_tesseract_path()
+        cache_path = settings.OCR_CACHE_PATH
+        if not os.path.isabs(cache_path):
+            cache_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), cache_path)
+        
+        return OCRCache(cache_path, settings.OCR_CACHE_MAX_ENTRIES, settings.OCR_CACHE_MAX_BYTES)
     
     def _check_tesseract_installation(self) -> bool:
         """Check if Tesseract is installed and accessible"""
@@ -76,112 +120,433 @@ class OCRService:
             
             print("❌ Tesseract not found. OCR will use mock data.")
     
-    async def extract_content(self, file_path: str) -> ExtractedContent:
-        """Extract text and mathematical content from image or PDF"""
+    async def warm_up(self) -> Dict[str, Any]:
+        """
+        Run a tiny synthetic page through the OCR pipeline
+        
+        Loads OpenCV's kernels and Tesseract's language model so the first real
+        page does not pay for them. The OCR cache is bypassed on purpose.
+        """
+        page = Image.new('RGB', (400, 120), 'white')
+        ImageDraw.Draw(page).text((20, 40), "1. 12 + 30 = ?", fill='black')
+        pixels = np.array(page)
+        
+        if not self.tesseract_available:
+            # Still initialize OpenCV preprocessing and layout analysis
+            loop = asyncio.get_event_loop()
+            processed = await loop.run_in_executor(
+                self.executor,
+                self._preprocess_image,
+                cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+            )
+            await loop.run_in_executor(self.executor, self.layout_service.detect_regions, processed)
+            return {"tesseract": False}
+        
+        regions = await self._ocr_page(pixels, 1)
+        return {"tesseract": True, "regions": len(regions)}
+    
+    async def extract_content(self, file_path: str,
+                              question_queue: Optional[asyncio.Queue] = None) -> ExtractedContent:
+        """
+        Extract text and mathematical content from image or PDF
+        
+        If question_queue is given, each Question is put on it as soon as it is
+        complete (page by page for multi-page documents), followed by None once
+        extraction has finished, so solving can start before the last page is OCR'd.
+        """
+        emitted: List[Question] = []
+        
+        async def emit(questions: List[Question]):
+            emitted.extend(questions)
+            if question_queue is not None:
+                for question in questions:
+                    await question_queue.put(question)
+        
+        try:
+            content = await self._extract_content(file_path, emit)
+            if not emitted:
+                # Mock content and the text-layer fast path produce everything at once
+                await emit(content.questions)
+            return content
+        finally:
+            if question_queue is not None:
+                await question_queue.put(None)
+    
+    async def _extract_content(self, file_path: str, emit: QuestionEmitter) -> ExtractedContent:
+        """
+        Pick the extraction path for a file
+        
+        Falls back to mock content only while nothing has been emitted: once
+        real questions are out, errors are raised so the caller never mixes
+        them with fabricated content.
+        """
+        emitted_any = False
+        
+        async def tracking_emit(questions: List[Question]):
+            nonlocal emitted_any
+            emitted_any = emitted_any or bool(questions)
+            await emit(questions)
+        
         try:
+            # Born-digital PDFs can be read from their text layer without Tesseract
+            if file_path.lower().endswith('.pdf'):
+                text_layer_content = await self.extract_text_layer_content(file_path)
+                if text_layer_content:
+                    return text_layer_content
+            
             # Check if Tesseract is available
             if not self.tesseract_available:
                 print("⚠️  Tesseract not available, using mock content")
                 print("💡 To install Tesseract: brew install tesseract")
                 return self._create_mock_content()
             
-            if file_path.endswith('.pdf'):
-                return await self._extract_from_pdf(file_path)
+            if file_path.lower().endswith('.pdf'):
+                return await self._extract_from_pdf(file_path, tracking_emit)
             else:
-                return await self._extract_from_image(file_path)
+                return await self._extract_from_image(file_path, tracking_emit)
                 
         except Exception as e:
             print(f"Error in OCR extraction: {e}")
+            if emitted_any:
+                # Questions from the real document are already being solved
+                raise
             print("⚠️  Falling back to mock content")
             # Return mock content for development
             return self._create_mock_content()
     
-    async def _extract_from_pdf(self, pdf_path: str) -> ExtractedContent:
-        """Extract content from PDF file"""
-        try:
-            loop = asyncio.get_event_loop()
-            
-            # Convert PDF to images
+    async def extract_text_layer_content(self, pdf_path: str) -> Optional[ExtractedContent]:
+        """
+        Fast path for born-digital PDFs
+        
+        Returns content built purely from the embedded text layer when every page
+        has one and questions could be parsed from it, otherwise None.
+        """
+        page_texts = await self._read_text_layer(pdf_path)
+        if not page_texts or not all(self.pdf_utils.has_text_layer(text) for text in page_texts):
+            return None
+        
+        all_text = ""
+        regions = []
+        for i, page_text in enumerate(page_texts):
+            all_text += f"Page {i+1}:\n{page_text}\n\n"
+            regions.append(LayoutRegion(region_type=RegionType.TEXT, page_number=i + 1, text=page_text))
+        
+        questions = QuestionParser().parse(regions)
+        if not questions:
+            return None
+        
+        print(f"⚡ Read {len(page_texts)} page(s) from PDF text layer (OCR skipped)")
+        return ExtractedContent(
+            raw_text=all_text,
+            questions=questions,
+            images_found=len(page_texts),
+            confidence_score=1.0  # Embedded text is exact
+        )
+    
+    async def _load_derivatives(self, file_path: str) -> Optional[DerivativeManifest]:
+        """Derivatives precomputed at upload time, if any"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, DerivativeService.load_manifest, file_path)
+    
+    async def _open_image(self, image_path: str) -> Image.Image:
+        """Open an uploaded image, preferring its precomputed normalized raster"""
+        manifest = await self._load_derivatives(image_path)
+        if manifest and manifest.pages:
+            return Image.open(manifest.pages[0].raster_path)
+        return Image.open(image_path)
+    
+    async def _read_text_layer(self, pdf_path: str) -> List[str]:
+        """Read the per-page embedded text of a PDF (empty list if unavailable)"""
+        if not settings.PDF_TEXT_LAYER_ENABLED:
+            return []
+        
+        manifest = await self._load_derivatives(pdf_path)
+        if manifest:
+            return [page.text for page in manifest.pages]
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self.pdf_utils.extract_text_layer,
+            pdf_path
+        )
+    
+    async def extract_pages(self, file_path: str) -> List[PageExtraction]:
+        """
+        Extract every page's regions with its OCR confidence and figure presence
+        
+        Used by the hybrid pipeline to decide, page by page, whether the text is
+        good enough for a text-only model or the page needs the vision model.
+        """
+        if file_path.lower().endswith('.pdf'):
+            pages = []
+            async for page_number, regions, from_text_layer in self._iter_pdf_pages(file_path):
+                pages.append(self._page_extraction(page_number, regions, from_text_layer))
+            return pages
+        
+        image = await self._open_image(file_path)
+        regions = await self._process_image(image, 1)
+        return [self._page_extraction(1, regions, False)]
+    
+    def _page_extraction(self, page_number: int, regions: List[LayoutRegion], from_text_layer: bool) -> PageExtraction:
+        """Summarize one page's regions"""
+        return PageExtraction(
+            page_number=page_number,
+            regions=regions,
+            from_text_layer=from_text_layer,
+            confidence=1.0 if from_text_layer else self._regions_confidence(regions),
+            has_figures=any(region.region_type == RegionType.FIGURE for region in regions)
+        )
+    
+    def _regions_confidence(self, regions: List[LayoutRegion]) -> float:
+        """Mean per-word OCR confidence over a page's regions (0 when nothing was read)"""
+        confidences = [c for region in regions for c in region.word_confidences]
+        if not confidences:
+            return 0.0
+        return sum(confidences) / len(confidences)
+    
+    async def _iter_pdf_pages(self, pdf_path: str):
+        """
+        Yield (page_number, regions, from_text_layer) for each PDF page in order
+        
+        Pages with an embedded text layer are read directly; only scanned pages
+        are rasterized and OCR'd.
+        """
+        loop = asyncio.get_event_loop()
+        
+        page_texts = await self._read_text_layer(pdf_path)
+        
+        if not page_texts:
+            # Text layer unreadable - convert every page to an image
             images = await loop.run_in_executor(
                 self.executor,
                 lambda: convert_from_path(pdf_path, dpi=200)
             )
+            page_texts = ["" for _ in images]
+        else:
+            images = [None for _ in page_texts]
+        
+        for i, embedded_text in enumerate(page_texts):
+            page_number = i + 1
+            if self.pdf_utils.has_text_layer(embedded_text):
+                yield page_number, [LayoutRegion(
+                    region_type=RegionType.TEXT,
+                    page_number=page_number,
+                    text=embedded_text
+                )], True
+                continue
             
+            # Scanned page - rasterize just this page and OCR it
+            image = images[i]
+            if image is None:
+                image = await self.rasterize_pdf_page(pdf_path, page_number)
+            yield page_number, await self._process_image(image, page_number), False
+    
+    async def rasterize_pdf_page(self, pdf_path: str, page_number: int) -> Image.Image:
+        """Rasterize a single PDF page at OCR resolution (or load its precomputed raster)"""
+        manifest = await self._load_derivatives(pdf_path)
+        page = manifest.page(page_number) if manifest else None
+        if page:
+            return Image.open(page.raster_path)
+        
+        loop = asyncio.get_event_loop()
+        page_images = await loop.run_in_executor(
+            self.executor,
+            lambda: convert_from_path(
+                pdf_path, dpi=200, first_page=page_number, last_page=page_number
+            )
+        )
+        return page_images[0]
+    
+    async def _extract_from_pdf(self, pdf_path: str, emit: Optional[QuestionEmitter] = None) -> ExtractedContent:
+        """
+        Extract content from PDF file, rasterizing only pages without a text layer
+        
+        Questions are parsed page by page and handed to emit as they complete.
+        """
+        try:
             all_text = ""
-            total_images = len(images)
+            questions = []
+            page_confidences = []
+            parser = QuestionParser()
             
-            for i, image in enumerate(images):
-                # Process each page
-                page_text = await self._process_image(image)
-                all_text += f"Page {i+1}:\n{page_text}\n\n"
+            async for page_number, page_regions, from_text_layer in self._iter_pdf_pages(pdf_path):
+                all_text += f"Page {page_number}:\n{self._regions_text(page_regions)}\n\n"
+                page_confidences.append(1.0 if from_text_layer else self._regions_confidence(page_regions))
+                
+                # Dispatch the questions this page completed
+                completed = parser.feed(page_regions)
+                questions.extend(completed)
+                await self._emit(emit, completed)
             
-            # Parse questions from extracted text
-            questions = self._parse_questions(all_text)
+            completed = parser.close()
+            questions.extend(completed)
+            await self._emit(emit, completed)
             
             return ExtractedContent(
                 raw_text=all_text,
                 questions=questions,
-                images_found=total_images,
-                confidence_score=0.85  # Estimate confidence
+                images_found=len(page_confidences),
+                confidence_score=sum(page_confidences) / len(page_confidences) if page_confidences else 0.0
             )
             
         except Exception as e:
             print(f"Error extracting from PDF: {e}")
             return self._create_mock_content()
     
-    async def _extract_from_image(self, image_path: str) -> ExtractedContent:
+    async def _extract_from_image(self, image_path: str, emit: Optional[QuestionEmitter] = None) -> ExtractedContent:
         """Extract content from single image file"""
         try:
             # Load and preprocess image
-            image = Image.open(image_path)
-            processed_text = await self._process_image(image)
+            image = await self._open_image(image_path)
+            regions = await self._process_image(image)
             
-            # Parse questions from extracted text
-            questions = self._parse_questions(processed_text)
+            # Parse questions from extracted regions
+            questions = QuestionParser().parse(regions)
+            await self._emit(emit, questions)
             
             return ExtractedContent(
-                raw_text=processed_text,
+                raw_text=self._regions_text(regions),
                 questions=questions,
                 images_found=1,
-                confidence_score=0.80
+                confidence_score=self._regions_confidence(regions)
             )
             
         except Exception as e:
             print(f"Error extracting from image: {e}")
             return self._create_mock_content()
     
-    async def _process_image(self, image: Image.Image) -> str:
-        """Process a single image and extract text using OCR"""
+    async def _process_image(self, image: Image.Image, page_number: Optional[int] = None) -> List[LayoutRegion]:
+        """
+        Process a single page image and extract its text regions using OCR
+        
+        Results are cached by page pixels and OCR configuration, so re-processing
+        the same page (re-solve, provider switch, duplicate upload) skips OCR.
+        """
         try:
             loop = asyncio.get_event_loop()
+            pixels = np.array(image.convert('RGB'))
             
-            # Convert PIL image to OpenCV format for preprocessing
-            opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Preprocess image for better OCR results
-            processed_image = await loop.run_in_executor(
-                self.executor,
-                self._preprocess_image,
-                opencv_image
-            )
+            cache_key = None
+            if self.ocr_cache:
+                cache_key = await loop.run_in_executor(
+                    self.executor,
+                    OCRCache.make_key,
+                    pixels,
+                    self._preprocess_config(),
+                    self.TESSERACT_CONFIG
+                )
+                cached = await loop.run_in_executor(self.executor, self.ocr_cache.get, cache_key)
+                if cached is not None:
+                    return [
+                        LayoutRegion(**region, page_number=page_number)
+                        for region in cached["regions"]
+                    ]
             
-            # Convert back to PIL Image
-            pil_image = Image.fromarray(processed_image)
+            regions = await self._ocr_page(pixels, page_number)
             
-            # Extract text using Tesseract with math-friendly configuration
-            text = await loop.run_in_executor(
-                self.executor,
-                lambda: pytesseract.image_to_string(
-                    pil_image,
-                    config='--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz()[]{}+-*/=.,?!:; \n'
-                )
-            )
+            if cache_key:
+                payload = {"regions": [region.dict(exclude={"page_number"}) for region in regions]}
+                await loop.run_in_executor(self.executor, self.ocr_cache.put, cache_key, payload)
             
-            return text.strip()
+            return regions
             
         except Exception as e:
             print(f"Error processing image: {e}")
-            return "Error processing image"
+            return [LayoutRegion(region_type=RegionType.TEXT, page_number=page_number, text="Error processing image")]
+    
+    def _preprocess_config(self) -> str:
+        """Cache-key component describing everything that shapes the OCR input"""
+        return f"{self.PREPROCESS_CONFIG}|layout={settings.OCR_LAYOUT_ENABLED}"
+    
+    async def _ocr_page(self, pixels: np.ndarray, page_number: Optional[int]) -> List[LayoutRegion]:
+        """
+        Segment a page and OCR its text regions
+        
+        The page is segmented into text blocks and figures; text blocks are OCR'd
+        concurrently as tiles and figures are skipped. Falls back to a single
+        whole-page pass when layout analysis is disabled or finds nothing.
+        """
+        loop = asyncio.get_event_loop()
+        
+        # Convert to OpenCV format for preprocessing
+        opencv_image = cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+        
+        # Preprocess image for better OCR results
+        processed_image = await loop.run_in_executor(
+            self.executor,
+            self._preprocess_image,
+            opencv_image
+        )
+        
+        regions = []
+        if settings.OCR_LAYOUT_ENABLED:
+            regions = await loop.run_in_executor(
+                self.executor,
+                self.layout_service.detect_regions,
+                processed_image,
+                page_number
+            )
+        
+        text_regions = [r for r in regions if r.region_type != RegionType.FIGURE]
+        if not text_regions:
+            height, width = processed_image.shape[:2]
+            text, confidences = await self._ocr_tile(processed_image)
+            return [LayoutRegion(
+                region_type=self.layout_service.classify_text(text),
+                bounding_box=BoundingBox(x=0, y=0, width=width, height=height),
+                page_number=page_number,
+                text=text,
+                word_confidences=confidences
+            )]
+        
+        # OCR all text tiles concurrently
+        results = await asyncio.gather(*[
+            self._ocr_tile(self.layout_service.crop(processed_image, region.bounding_box))
+            for region in text_regions
+        ])
+        for region, (text, confidences) in zip(text_regions, results):
+            region.text = text
+            region.word_confidences = confidences
+            region.region_type = self.layout_service.classify_text(text)
+        
+        # Keep figures (for question bounding boxes) but drop tiles with no text
+        return [r for r in regions if r.region_type == RegionType.FIGURE or r.text]
+    
+    async def _ocr_tile(self, tile: np.ndarray) -> Tuple[str, List[float]]:
+        """Run Tesseract on one preprocessed tile, returning its text and per-word confidences"""
+        loop = asyncio.get_event_loop()
+        pil_image = Image.fromarray(tile)
+        
+        # Extract words using Tesseract with math-friendly configuration
+        data = await loop.run_in_executor(
+            self.ocr_executor,
+            lambda: pytesseract.image_to_data(
+                pil_image,
+                config=self.TESSERACT_CONFIG,
+                output_type=pytesseract.Output.DICT
+            )
+        )
+        
+        # Rebuild the text line by line from the recognized words
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            word = word.strip()
+            if not word:
+                continue
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(line_key, []).append(word)
+            confidence = float(data["conf"][i])
+            if confidence >= 0:
+                confidences.append(confidence / 100.0)
+        
+        text = "\n".join(" ".join(words) for words in lines.values())
+        return text.strip(), confidences
+    
+    def _regions_text(self, regions: List[LayoutRegion]) -> str:
+        """Join the text of a page's regions in reading order"""
+        return "\n".join(region.text for region in regions if region.text).strip()
     
     def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """Preprocess image to improve OCR accuracy"""
@@ -204,75 +569,13 @@ class OCRService:
     
     def _parse_questions(self, text: str) -> List[Question]:
         """Parse questions from extracted text"""
-        questions = []
-        
-        # Split text into lines and process
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        current_question = None
-        current_options = []
-        question_number = 0
-        
-        for line in lines:
-            # Check if line starts with a number (potential question)
-            question_match = re.match(r'^(\d+)\.?\s*(.+)', line)
-            if question_match:
-                # Save previous question if exists
-                if current_question:
-                    questions.append(self._create_question(
-                        question_number, current_question, current_options
-                    ))
-                
-                # Start new question
-                question_number = int(question_match.group(1))
-                current_question = question_match.group(2)
-                current_options = []
-            
-            # Check if line is an option (1), (2), (3), (4) or (A), (B), (C), (D)
-            option_match = re.match(r'^\(([1-4A-Da-d])\)\s*(.+)', line)
-            if option_match and current_question:
-                current_options.append(option_match.group(2))
-            
-            # If not a question start or option, might be continuation of question
-            elif current_question and not option_match:
-                current_question += " " + line
-        
-        # Don't forget the last question
-        if current_question:
-            questions.append(self._create_question(
-                question_number, current_question, current_options
-            ))
-        
-        return questions
+        parser = QuestionParser()
+        return parser.feed_text(text) + parser.close()
     
-    def _create_question(self, number: int, text: str, options: List[str]) -> Question:
-        """Create a Question object from parsed data"""
-        # Determine problem type based on content
-        problem_type = self._determine_problem_type(text, options)
-        
-        return Question(
-            question_number=number,
-            question_text=text,
-            problem_type=problem_type,
-            options=options if options else None
-        )
-    
-    def _determine_problem_type(self, text: str, options: List[str]) -> ProblemType:
-        """Determine the type of mathematical problem"""
-        text_lower = text.lower()
-        
-        if options:
-            return ProblemType.MULTIPLE_CHOICE
-        elif any(word in text_lower for word in ['percent', 'percentage', '%']):
-            return ProblemType.CALCULATION
-        elif any(word in text_lower for word in ['rectangle', 'square', 'circle', 'triangle', 'area', 'perimeter']):
-            return ProblemType.GEOMETRY
-        elif any(word in text_lower for word in ['solve', 'equation', 'x', 'y', 'variable']):
-            return ProblemType.ALGEBRA
-        elif any(word in text_lower for word in ['word', 'story', 'john', 'mary', 'total', 'altogether']):
-            return ProblemType.WORD_PROBLEM
-        else:
-            return ProblemType.OTHER
+    async def _emit(self, emit: Optional[QuestionEmitter], questions: List[Question]):
+        """Hand completed questions to the caller's emitter, if any"""
+        if emit is not None and questions:
+            await emit(questions)
     
     def _create_mock_content(self) -> ExtractedContent:
         """Create mock content for development/testing"""
@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+# The problem on whose behalf provider calls are made; set by SolveCoordinator for each solve
+# and inherited by every task the solve creates
+solve_owner: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("solve_owner", default=None)
+
+# Priority class of the solve: "interactive" (someone is waiting), "batch" or "speculative";
+# set by the batch route and by speculative solves, inherited like solve_owner
+solve_priority: contextvars.ContextVar[str] = contextvars.ContextVar("solve_priority", default="interactive")
+
+class Waiter:
+    """A queued provider call and the class it is accounted to"""
+
+    __slots__ = ("future", "priority")
+
+    def __init__(self, future: asyncio.Future, priority: str):
+        self.future = future
+        self.priority = priority
+
+class ProviderScheduler:
+    """
+    Global, fair admission of AI provider calls
+
+    Every provider call made while solving (vision pages, single questions,
+    overall explanations) takes one of PROVIDER_MAX_CONCURRENCY slots, so many
+    concurrent solves cannot exceed the provider's quota. When calls have to
+    wait, freed slots go round-robin to the problems with waiting calls, so a
+    40-question paper cannot starve a one-page worksheet queued behind it.
+
+    Calls are also split into priority classes, each with its own queue. A
+    freed slot goes to a class in proportion to PROVIDER_PRIORITY_WEIGHTS
+    (among the classes with waiting calls), and PROVIDER_PRIORITY_RESERVATIONS
+    keeps slots that only their class may use. With the defaults, a student's
+    interactive solve always finds a slot at once, while batch and speculative
+    work soak up whatever capacity is left.
+    """
+
+    DEFAULT_OWNER = "default"
+    # Highest priority first; also the order promotions follow
+    PRIORITIES = ("interactive", "batch", "speculative")
+    # Wait samples kept per class for the p95 in get_stats
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, max_concurrency: int, weights: Optional[Dict[str, int]] = None,
+                 reservations: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        weights = weights or {}
+        reservations = reservations or {}
+        self.weights = {priority: max(1, weights.get(priority, 1)) for priority in self.PRIORITIES}
+        self.reservations = {priority: max(0, reservations.get(priority, 0)) for priority in self.PRIORITIES}
+        if sum(self.reservations.values()) >= self.max_concurrency:
+            print(f"⚠️  Provider slot reservations {self.reservations} leave no shared slots "
+                  f"out of {self.max_concurrency}; unreserved classes will wait for reserved ones")
+
+        self._active = 0
+        self._active_by_priority = {priority: 0 for priority in self.PRIORITIES}
+        # Waiting calls per class, and within a class per owner in round-robin order
+        self._waiting: Dict[str, "OrderedDict[str, Deque[Waiter]]"] = {
+            priority: OrderedDict() for priority in self.PRIORITIES
+        }
+        # Smooth weighted round-robin state between classes
+        self._credit = {priority: 0 for priority in self.PRIORITIES}
+        # Owners whose calls run at a higher class than they started with
+        self._promotions: Dict[str, str] = {}
+        self.calls = 0
+        self.queued_calls = 0
+        self.total_wait_seconds = 0.0
+        self._calls_by_priority = {priority: 0 for priority in self.PRIORITIES}
+        self._waits: Dict[str, Deque[float]] = {
+            priority: deque(maxlen=self.WAIT_SAMPLES) for priority in self.PRIORITIES
+        }
+
+    @classmethod
+    def parse_classes(cls, spec: str) -> Dict[str, int]:
+        """
+        Parse "interactive:6,batch:3" into {"interactive": 6, "batch": 3}
+
+        Malformed entries and unknown class names are skipped with a warning,
+        so a typo in the settings falls back to the defaults instead of
+        failing every solve.
+        """
+        values = {}
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            name, _, value = item.partition(":")
+            name = name.strip().lower()
+            if name not in cls.PRIORITIES:
+                print(f"⚠️  Ignoring unknown provider priority class {name!r} in {spec!r} "
+                      f"(expected one of {', '.join(cls.PRIORITIES)})")
+                continue
+            try:
+                values[name] = int(value)
+            except ValueError:
+                print(f"⚠️  Ignoring malformed provider priority entry {item.strip()!r} in {spec!r} "
+                      f"(expected class:number)")
+        return values
+
+    def _priority_of(self, owner: str, priority: Optional[str]) -> str:
+        """The caller's class, raised if the owner was promoted"""
+        priority = priority or solve_priority.get()
+        if priority not in self.PRIORITIES:
+            priority = self.PRIORITIES[0]
+        promoted = self._promotions.get(owner)
+        if promoted and self.PRIORITIES.index(promoted) < self.PRIORITIES.index(priority):
+            return promoted
+        return priority
+
+    def promote(self, owner: str, priority: str):
+        """
+        Run an owner's calls at a higher class from now on
+
+        Used when someone starts waiting on a solve that began as batch or
+        speculative work; its queued calls move to the new class too.
+        """
+        if priority not in self.PRIORITIES or owner == self.DEFAULT_OWNER:
+            return
+        current = self._promotions.get(owner)
+        if current and self.PRIORITIES.index(current) <= self.PRIORITIES.index(priority):
+            return
+        self._promotions[owner] = priority
+
+        target = self._waiting[priority]
+        for lower in self.PRIORITIES[self.PRIORITIES.index(priority) + 1:]:
+            queue = self._waiting[lower].pop(owner, None)
+            if queue:
+                for waiter in queue:
+                    waiter.priority = priority
+                target.setdefault(owner, deque()).extend(queue)
+        # Newly eligible calls may fit in the promoted class's reserved slots
+        self._dispatch()
+
+    def clear_promotion(self, owner: str):
+        """Forget an owner's promotion once its solve is over"""
+        self._promotions.pop(owner, None)
+
+    @asynccontextmanager
+    async def slot(self, owner: Optional[str] = None, priority: Optional[str] = None):
+        """Hold a provider call slot for the duration of the block"""
+        owner = owner or solve_owner.get() or self.DEFAULT_OWNER
+        priority = await self._acquire(owner, self._priority_of(owner, priority))
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _can_start(self, priority: str) -> bool:
+        """Whether a call of this class fits without using slots reserved for other classes"""
+        reserved_for_others = sum(
+            max(0, self.reservations[other] - self._active_by_priority[other])
+            for other in self.PRIORITIES if other != priority
+        )
+        return self._active + reserved_for_others < self.max_concurrency
+
+    def _start(self, priority: str):
+        self._active += 1
+        self._active_by_priority[priority] += 1
+
+    async def _acquire(self, owner: str, priority: str) -> str:
+        """Wait for a slot; returns the class the call is accounted to"""
+        self.calls += 1
+        self._calls_by_priority[priority] += 1
+        if not self._waiting[priority] and self._can_start(priority):
+            self._start(priority)
+            self._waits[priority].append(0.0)
+            return priority
+
+        waiter = Waiter(asyncio.get_event_loop().create_future(), priority)
+        self._waiting[priority].setdefault(owner, deque()).append(waiter)
+        self.queued_calls += 1
+        queued_at = time.perf_counter()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed over just as the caller gave up; pass it on
+                self._release(waiter.priority)
+            else:
+                self._discard(owner, waiter)
+            raise
+        finally:
+            waited = time.perf_counter() - queued_at
+            self.total_wait_seconds += waited
+            self._waits[waiter.priority].append(waited)
+        return waiter.priority
+
+    def _discard(self, owner: str, waiter: Waiter):
+        """Remove a cancelled waiter"""
+        waiting = self._waiting[waiter.priority]
+        queue = waiting.get(owner)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del waiting[owner]
+
+    def _release(self, priority: str):
+        self._active -= 1
+        self._active_by_priority[priority] -= 1
+        self._dispatch()
+
+    def _next_priority(self) -> Optional[str]:
+        """Pick the class to serve next, by smooth weighted round-robin over those that can start"""
+        eligible = [priority for priority in self.PRIORITIES
+                    if self._waiting[priority] and self._can_start(priority)]
+        if not eligible:
+            return None
+        for priority in eligible:
+            self._credit[priority] += self.weights[priority]
+        chosen = max(eligible, key=lambda priority: self._credit[priority])
+        self._credit[chosen] -= sum(self.weights[priority] for priority in eligible)
+        return chosen
+
+    def _dispatch(self):
+        """Hand free slots to waiting calls"""
+        while True:
+            priority = self._next_priority()
+            if priority is None:
+                return
+            # Within a class, the next owner in turn; it goes to the back of the line
+            waiting = self._waiting[priority]
+            owner, queue = waiting.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                waiting[owner] = queue
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                self._start(priority)
+
+    @staticmethod
+    def _p95(samples: Deque[float]) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Slot usage for /health/stats"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active_calls": self._active,
+            "waiting_calls": sum(len(queue) for waiting in self._waiting.values() for queue in waiting.values()),
+            "waiting_problems": sum(len(waiting) for waiting in self._waiting.values()),
+            "calls": self.calls,
+            "queued_calls": self.queued_calls,
+            "mean_wait_seconds": self.total_wait_seconds / self.queued_calls if self.queued_calls else 0.0,
+            "priorities": {
+                priority: {
+                    "weight": self.weights[priority],
+                    "reserved_slots": self.reservations[priority],
+                    "active_calls": self._active_by_priority[priority],
+                    "waiting_calls": sum(len(queue) for queue in self._waiting[priority].values()),
+                    "calls": self._calls_by_priority[priority],
+                    "p95_wait_seconds": self._p95(self._waits[priority])
+                }
+                for priority in self.PRIORITIES
+            }
+        }
@@ -0,0 +1,136 @@
+import re
+from typing import Iterable, List, Optional
+
+from models.homework_models import BoundingBox, LayoutRegion, ProblemType, Question, RegionType
+
+# Line patterns, compiled once and shared by every parser instance
+QUESTION_START = re.compile(r'^(\d+)\.?\s*(.+)')
+OPTION_LINE = re.compile(r'^\(([1-4A-Da-d])\)\s*(.+)')
+OPTION_SPLIT = re.compile(r'(?:^|\s+)\(([1-4A-Da-d])\)\s*')
+
+# Problem type keywords, checked in priority order (substring matches, case-insensitive)
+PERCENTAGE_KEYWORDS = re.compile(r'percent|%', re.IGNORECASE)
+GEOMETRY_KEYWORDS = re.compile(r'rectangle|square|circle|triangle|area|perimeter', re.IGNORECASE)
+ALGEBRA_KEYWORDS = re.compile(r'solve|equation|variable|x|y', re.IGNORECASE)
+WORD_PROBLEM_KEYWORDS = re.compile(r'word|story|john|mary|total|altogether', re.IGNORECASE)
+
+class QuestionParser:
+    """
+    Incremental question parser
+
+    Page text is fed in as it becomes available. A question is complete once the
+    next question starts, so each feed returns the questions it closed and the
+    last open question is only returned by close().
+    """
+
+    def __init__(self):
+        self._question_number = 0
+        self._text: Optional[str] = None
+        self._options: List[str] = []
+        self._page: Optional[int] = None
+        self._box: Optional[BoundingBox] = None
+
+    def feed_text(self, text: str, page_number: Optional[int] = None) -> List[Question]:
+        """Feed plain text (e.g. a page's text layer) and return completed questions"""
+        return self.feed([LayoutRegion(region_type=RegionType.TEXT, page_number=page_number, text=text)])
+
+    def feed(self, regions: Iterable[LayoutRegion]) -> List[Question]:
+        """Feed page regions in reading order and return completed questions"""
+        completed = []
+
+        for region in regions:
+            if region.region_type == RegionType.FIGURE:
+                # A figure below a question belongs to it
+                if self._text is not None and region.page_number == self._page:
+                    self._box = self._extend_box(self._box, region.bounding_box)
+                continue
+
+            for line in region.text.split('\n'):
+                line = line.strip()
+                if not line:
+                    continue
+
+                # Check if line starts with a number (potential question)
+                question_match = QUESTION_START.match(line)
+                if question_match:
+                    # Save previous question if exists
+                    if self._text is not None:
+                        completed.append(self._build_question())
+
+                    # Start new question
+                    self._question_number = int(question_match.group(1))
+                    self._text = question_match.group(2)
+                    self._options = []
+                    self._page = region.page_number
+                    self._box = region.bounding_box
+                    continue
+
+                if self._text is None:
+                    continue
+
+                # Option rows: (1), (2), (3), (4) or (A), (B), (C), (D), possibly several per line
+                if OPTION_LINE.match(line):
+                    self._options.extend(self.split_option_row(line))
+                else:
+                    # Continuation of the current question
+                    self._text += " " + line
+
+                if region.page_number == self._page:
+                    self._box = self._extend_box(self._box, region.bounding_box)
+
+        return completed
+
+    def close(self) -> List[Question]:
+        """Flush the last open question"""
+        if self._text is None:
+            return []
+        question = self._build_question()
+        self._text = None
+        return [question]
+
+    def parse(self, regions: Iterable[LayoutRegion]) -> List[Question]:
+        """Parse a complete document in one go"""
+        return self.feed(regions) + self.close()
+
+    @staticmethod
+    def split_option_row(line: str) -> List[str]:
+        """Split a row such as "(A) 42   (B) 52" into its individual options"""
+        parts = OPTION_SPLIT.split(line)
+        # re.split yields [prefix, marker, option, marker, option, ...]
+        return [option.strip() for option in parts[2::2] if option.strip()]
+
+    @staticmethod
+    def determine_problem_type(text: str, options: List[str]) -> ProblemType:
+        """Determine the type of mathematical problem"""
+        if options:
+            return ProblemType.MULTIPLE_CHOICE
+        elif PERCENTAGE_KEYWORDS.search(text):
+            return ProblemType.CALCULATION
+        elif GEOMETRY_KEYWORDS.search(text):
+            return ProblemType.GEOMETRY
+        elif ALGEBRA_KEYWORDS.search(text):
+            return ProblemType.ALGEBRA
+        elif WORD_PROBLEM_KEYWORDS.search(text):
+            return ProblemType.WORD_PROBLEM
+        else:
+            return ProblemType.OTHER
+
+    def _build_question(self) -> Question:
+        """Create a Question object from the parser's current state"""
+        return Question(
+            question_number=self._question_number,
+            question_text=self._text,
+            problem_type=self.determine_problem_type(self._text, self._options),
+            options=self._options if self._options else None,
+            page_number=self._page,
+            bounding_box=self._box
+        )
+
+    @staticmethod
+    def _extend_box(box: Optional[BoundingBox], other: Optional[BoundingBox]) -> Optional[BoundingBox]:
+        """Union two optional bounding boxes"""
+        if box is None:
+            return other
+        if other is None:
+            return box
+        return box.union(other)
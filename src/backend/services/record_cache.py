@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Distinguishes "not cached" from a cached "does not exist"
+MISSING = object()
+
+class RecordCache(Generic[T]):
+    """
+    In-process read-through cache with a TTL and an LRU size bound
+
+    Missing records can be cached too (negative caching) with their own,
+    usually shorter, TTL; a negative_ttl of 0 disables it. Pydantic models
+    are copied on the way in and out, so callers never share (and mutate)
+    the cached instance. Not thread-safe: use it from the event loop only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[T]]]" = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _copy(value: Optional[T]) -> Optional[T]:
+        return value.model_copy(deep=True) if hasattr(value, "model_copy") else value
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value (None for a cached miss), or MISSING"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        if entry[1] is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return self._copy(entry[1])
+
+    def peek(self, key: Hashable) -> Optional[T]:
+        """Return a live cached value without touching LRU order or counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return self._copy(entry[1])
+
+    def put(self, key: Hashable, value: Optional[T]):
+        """Cache a value, or None to remember that the record does not exist"""
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, self._copy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a cached entry"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1 @@
+# Homework repositories package initialization
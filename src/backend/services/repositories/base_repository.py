@@ -0,0 +1,126 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.homework_models import HomeworkProblem, HomeworkSummary, Solution
+
+class HomeworkRepository(ABC):
+    """
+    Abstract base class for homework record storage backends
+
+    A repository persists HomeworkProblem records (including their Solution)
+    and the reference counts of content-addressed upload blobs. Methods raise
+    on storage errors; FirebaseService decides how to degrade.
+    """
+
+    @property
+    @abstractmethod
+    def repository_name(self) -> str:
+        """Return the name of the storage backend"""
+        pass
+
+    @abstractmethod
+    def initialize(self):
+        """Connect to the backend (blocking, called once from an executor); raise on failure"""
+        pass
+
+    @abstractmethod
+    async def create_problem(self, problem: HomeworkProblem):
+        """Store a new record and take a reference on its blob (problem.file_hash), atomically"""
+        pass
+
+    async def create_problems(self, problems: List[HomeworkProblem]):
+        """
+        Store several new records (bulk uploads)
+
+        Backends override this to write them in one batch; the default creates
+        them one at a time.
+        """
+        for problem in problems:
+            await self.create_problem(problem)
+
+    @abstractmethod
+    async def get_problem(self, problem_id: str) -> Optional[HomeworkProblem]:
+        """Return a record, or None if it does not exist"""
+        pass
+
+    @abstractmethod
+    async def update_solution(self, problem_id: str, solution: Solution):
+        """Attach a solution to a record and mark it solved"""
+        pass
+
+    @abstractmethod
+    async def delete_problem(self, problem: HomeworkProblem) -> int:
+        """
+        Delete a record and drop its blob reference, atomically
+
+        Returns the blob's remaining reference count (0 for records without a
+        file_hash), so the caller knows whether the file can be removed.
+        """
+        pass
+
+    async def acquire_solve_lease(self, problem_id: str, lease_seconds: float) -> bool:
+        """
+        Mark a record as processing unless another worker holds a fresh lease
+
+        Returns whether the caller now owns the solve. Backends shared between
+        workers override this with an atomic check-and-set; the default lets
+        every caller solve.
+        """
+        return True
+
+    async def mark_solve_failed(self, problem_id: str):
+        """Record that the solve holding the lease failed"""
+        pass
+
+    @abstractmethod
+    async def list_problems(self, limit: int, offset: int = 0,
+                            start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkProblem]:
+        """
+        List records by (upload_timestamp, id), most recent first
+
+        start_after is the sort key of the previous page's last record.
+        """
+        pass
+
+    async def list_summaries(self, limit: int, offset: int = 0,
+                             start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkSummary]:
+        """
+        List record summaries in the same order as list_problems
+
+        Backends override this to read only the summary fields; the default
+        projects full records.
+        """
+        problems = await self.list_problems(limit, offset, start_after=start_after)
+        return [HomeworkSummary.from_problem(problem) for problem in problems]
+
+    @abstractmethod
+    async def list_problems_uploaded_before(self, cutoff: datetime, limit: int) -> List[HomeworkProblem]:
+        """List records uploaded before cutoff, oldest first (for retention sweeps)"""
+        pass
+
+    @abstractmethod
+    async def release_blob_reference(self, file_hash: str) -> int:
+        """Drop one reference to a blob and return the remaining count"""
+        pass
+
+    @abstractmethod
+    async def get_blob_reference_count(self, file_hash: str) -> int:
+        """Number of records referencing a blob (0 if unknown)"""
+        pass
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """Prime the backend's connection before the first real request"""
+        return {"connected": False, "detail": "nothing to warm up"}
+
+    async def flush(self):
+        """Persist any buffered writes"""
+        pass
+
+    async def close(self):
+        """Flush and release resources (called at shutdown)"""
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Backend-specific counters for /health/stats"""
+        return {}
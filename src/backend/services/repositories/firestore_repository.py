@@ -0,0 +1,317 @@
+import itertools
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import settings
+from models.homework_models import HomeworkProblem, HomeworkSummary, Solution
+from services.write_buffer import PendingWrite, WriteBehindBuffer, WriteDroppedError
+from utils.serialization_utils import solution_serializer
+from .base_repository import HomeworkRepository
+
+class FirestoreRepository(HomeworkRepository):
+    """
+    Homework records in Cloud Firestore, optionally with write-behind batching
+
+    Uses the native async Firestore client, so the number of operations in
+    flight is bounded by the backend rather than by a thread pool. Requests
+    are spread round-robin over FIRESTORE_CHANNEL_POOL_SIZE clients, each with
+    its own gRPC channel, to avoid queueing behind one channel's stream limit.
+    """
+
+    PROBLEMS_COLLECTION = "homework_problems"
+    BLOBS_COLLECTION = "upload_blobs"
+    MAX_BATCH_WRITES = 500  # Firestore limit on writes per batch
+    # Field mask for summary lists; question_count and solved_at are denormalized from the solution
+    SUMMARY_FIELDS = ["id", "filename", "status", "upload_timestamp", "solved_at", "question_count"]
+
+    def __init__(self, pool_size: int = 1, **kwargs):
+        self.pool_size = max(1, pool_size)
+        self.clients = []
+        self._client_cycle = None
+        self.write_buffer: Optional[WriteBehindBuffer] = None
+
+    @property
+    def repository_name(self) -> str:
+        return "Firestore"
+
+    def initialize(self):
+        """Initialize Firebase Admin SDK (Firestore only) and the async client pool"""
+        # Deferred import: firebase_admin and the gRPC stack are slow to load
+        import firebase_admin
+        from firebase_admin import credentials, firestore_async
+        from google.cloud import firestore
+
+        # Initialize Firebase Admin for Firestore only
+        if not firebase_admin._apps:
+            if os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH"):
+                cred = credentials.Certificate(os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH"))
+                firebase_admin.initialize_app(cred)
+            else:
+                # For local development without service account
+                firebase_admin.initialize_app()
+
+        # Channels are opened lazily on the first call from the event loop
+        primary = firestore_async.client()
+        self.clients = [primary]
+        app_credentials = firebase_admin.get_app().credential.get_credential()
+        for _ in range(self.pool_size - 1):
+            self.clients.append(firestore.AsyncClient(project=primary.project, credentials=app_credentials))
+        self._client_cycle = itertools.cycle(self.clients)
+        print(f"✅ Firebase Firestore connected successfully ({self.pool_size} channel(s))")
+
+        if settings.FIRESTORE_WRITE_BEHIND_ENABLED:
+            self.write_buffer = WriteBehindBuffer(
+                self._client,
+                batch_size=settings.FIRESTORE_WRITE_BATCH_SIZE,
+                flush_interval=settings.FIRESTORE_WRITE_FLUSH_INTERVAL_MS / 1000
+            )
+            print("✅ Firestore write-behind buffering enabled")
+
+    def _client(self):
+        """Next client from the channel pool"""
+        return next(self._client_cycle)
+
+    async def create_problem(self, problem: HomeworkProblem):
+        await self.create_problems([problem])
+        print(f"✅ Homework problem {'queued for' if self.write_buffer else 'created in'} Firestore: {problem.id}")
+
+    async def create_problems(self, problems: List[HomeworkProblem]):
+        writes = []
+        for problem in problems:
+            writes.append(PendingWrite(self.PROBLEMS_COLLECTION, problem.id, problem.dict()))
+            if problem.file_hash:
+                # One marker per record rather than an Increment: a batch retried after an
+                # ambiguous failure may be applied twice, and must not count the record twice
+                blob_data = {"file_path": problem.file_path, "refs": {problem.id: True}}
+                writes.append(PendingWrite(self.BLOBS_COLLECTION, problem.file_hash, blob_data, merge=True))
+
+        if self.write_buffer:
+            for write in writes:
+                self.write_buffer.enqueue(write)
+            return
+
+        # Each record is committed in the same batch as its blob reference
+        client = self._client()
+        start = 0
+        while start < len(writes):
+            chunk = writes[start:start + self.MAX_BATCH_WRITES]
+            end = start + len(chunk)
+            if end < len(writes) and writes[end].collection == self.BLOBS_COLLECTION:
+                # Do not split a record from its blob reference
+                chunk = chunk[:-1]
+            start += len(chunk)
+            batch = client.batch()
+            for write in chunk:
+                batch.set(client.collection(write.collection).document(write.document_id), write.data, merge=write.merge)
+            await batch.commit()
+
+    async def get_problem(self, problem_id: str) -> Optional[HomeworkProblem]:
+        # Read-your-writes: a buffered full record needs no round trip
+        overlay = self.write_buffer.overlay(self.PROBLEMS_COLLECTION, problem_id) if self.write_buffer else None
+        if overlay and overlay[0]:
+            return HomeworkProblem(**overlay[1])
+
+        doc = await self._client().collection(self.PROBLEMS_COLLECTION).document(problem_id).get()
+
+        if doc.exists:
+            data = doc.to_dict()
+            if overlay:
+                data.update(overlay[1])
+            # Handle backward compatibility for old records with file_url
+            if "file_url" in data and "file_path" not in data:
+                data["file_path"] = data["file_url"]
+                del data["file_url"]
+            return HomeworkProblem(**data)
+
+        return None
+
+    async def update_solution(self, problem_id: str, solution: Solution):
+        update = {
+            # Shared with the HTTP response for this solution version
+            "solution": solution_serializer.serialize(solution).data,
+            "status": "solved",
+            "solved_at": solution.solved_at,
+            "question_count": solution.total_questions
+        }
+
+        if self.write_buffer:
+            self.write_buffer.enqueue(PendingWrite(self.PROBLEMS_COLLECTION, problem_id, update, kind="update"))
+            return
+
+        await self._client().collection(self.PROBLEMS_COLLECTION).document(problem_id).update(update)
+
+    @staticmethod
+    def _reference_count(blob: Optional[Dict[str, Any]]) -> int:
+        """References to a blob: one marker per record, plus the counter older records were counted in"""
+        if not blob:
+            return 0
+        return max(0, blob.get("ref_count", 0)) + len(blob.get("refs") or {})
+
+    async def delete_problem(self, problem: HomeworkProblem) -> int:
+        from google.cloud import firestore
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        # The record or its blob reference may still be buffered
+        await self._flush_writes((self.PROBLEMS_COLLECTION, problem.id), (self.BLOBS_COLLECTION, problem.file_hash))
+
+        client = self._client()
+        problem_ref = client.collection(self.PROBLEMS_COLLECTION).document(problem.id)
+        if not problem.file_hash:
+            await problem_ref.delete()
+            print(f"✅ Homework problem deleted from Firestore: {problem.id}")
+            return 0
+        blob_ref = client.collection(self.BLOBS_COLLECTION).document(problem.file_hash)
+
+        @firestore.async_transactional
+        async def delete(transaction) -> int:
+            snapshot = await blob_ref.get(transaction=transaction)
+            blob = snapshot.to_dict() if snapshot.exists else {}
+            transaction.delete(problem_ref)
+            if problem.id in (blob.get("refs") or {}):
+                transaction.update(blob_ref, {FieldPath("refs", problem.id).to_api_repr(): firestore.DELETE_FIELD})
+                return self._reference_count(blob) - 1
+            if blob.get("ref_count", 0) > 0:
+                # A record created before per-record markers
+                transaction.update(blob_ref, {"ref_count": firestore.Increment(-1)})
+                return self._reference_count(blob) - 1
+            return self._reference_count(blob)
+
+        remaining = await delete(client.transaction())
+        print(f"✅ Homework problem deleted from Firestore: {problem.id}")
+        return remaining
+
+    async def acquire_solve_lease(self, problem_id: str, lease_seconds: float) -> bool:
+        from google.cloud import firestore
+
+        # The transaction reads the server copy, so buffered writes must land first
+        await self._flush_writes((self.PROBLEMS_COLLECTION, problem_id))
+
+        client = self._client()
+        doc_ref = client.collection(self.PROBLEMS_COLLECTION).document(problem_id)
+        now = datetime.now(timezone.utc)
+
+        @firestore.async_transactional
+        async def claim(transaction) -> bool:
+            snapshot = await doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            data = snapshot.to_dict()
+            started_at = data.get("processing_started_at")
+            if data.get("status") == "processing" and started_at and started_at > now - timedelta(seconds=lease_seconds):
+                return False
+            transaction.update(doc_ref, {"status": "processing", "processing_started_at": now})
+            return True
+
+        return await claim(client.transaction())
+
+    async def mark_solve_failed(self, problem_id: str):
+        from google.cloud import firestore
+
+        # Like the lease, decided on the server copy: a solution another worker stored
+        # meanwhile must not be overwritten with "error"
+        await self._flush_writes((self.PROBLEMS_COLLECTION, problem_id))
+
+        client = self._client()
+        doc_ref = client.collection(self.PROBLEMS_COLLECTION).document(problem_id)
+
+        @firestore.async_transactional
+        async def fail(transaction):
+            snapshot = await doc_ref.get(transaction=transaction)
+            if snapshot.exists and snapshot.to_dict().get("status") == "processing":
+                transaction.update(doc_ref, {"status": "error"})
+
+        await fail(client.transaction())
+
+    def _list_query(self, limit: int, offset: int, start_after: Optional[Tuple[datetime, str]]):
+        """Most-recent-first query for one page of records"""
+        from firebase_admin import firestore
+
+        # The id tie-breaker keeps the order stable for records uploaded at the same instant
+        query = (self._client().collection(self.PROBLEMS_COLLECTION)
+                 .order_by("upload_timestamp", direction=firestore.Query.DESCENDING)
+                 .order_by("id", direction=firestore.Query.DESCENDING))
+        if start_after:
+            upload_timestamp, problem_id = start_after
+            query = query.start_after({"upload_timestamp": upload_timestamp, "id": problem_id})
+        elif offset:
+            # Firestore reads and bills every skipped document
+            query = query.offset(offset)
+        return query.limit(limit)
+
+    async def list_problems(self, limit: int, offset: int = 0,
+                            start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkProblem]:
+        query = self._list_query(limit, offset, start_after)
+        return [HomeworkProblem(**doc.to_dict()) async for doc in query.stream()]
+
+    async def list_summaries(self, limit: int, offset: int = 0,
+                             start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkSummary]:
+        # The field mask keeps the solution payload on the server
+        query = self._list_query(limit, offset, start_after).select(self.SUMMARY_FIELDS)
+        return [HomeworkSummary(**doc.to_dict()) async for doc in query.stream()]
+
+    async def list_problems_uploaded_before(self, cutoff: datetime, limit: int) -> List[HomeworkProblem]:
+        from firebase_admin import firestore
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = (self._client().collection(self.PROBLEMS_COLLECTION)
+                 .where(filter=FieldFilter("upload_timestamp", "<", cutoff))
+                 .order_by("upload_timestamp", direction=firestore.Query.ASCENDING)
+                 .limit(limit))
+        return [HomeworkProblem(**doc.to_dict()) async for doc in query.stream()]
+
+    async def release_blob_reference(self, file_hash: str) -> int:
+        from firebase_admin import firestore
+
+        # Drops a counted reference; per-record markers are removed by delete_problem
+        await self._flush_writes((self.BLOBS_COLLECTION, file_hash))
+
+        blob_ref = self._client().collection(self.BLOBS_COLLECTION).document(file_hash)
+        await blob_ref.update({"ref_count": firestore.Increment(-1)})
+        doc = await blob_ref.get()
+        return self._reference_count(doc.to_dict() if doc.exists else None)
+
+    async def get_blob_reference_count(self, file_hash: str) -> int:
+        # A buffered increment must land first, or a just-reuploaded blob would look orphaned
+        await self._flush_writes((self.BLOBS_COLLECTION, file_hash))
+        doc = await self._client().collection(self.BLOBS_COLLECTION).document(file_hash).get()
+        return self._reference_count(doc.to_dict() if doc.exists else None)
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """Open every pooled gRPC channel with a single document read"""
+        for client in self.clients:
+            await client.collection(self.PROBLEMS_COLLECTION).document("__warmup__").get()
+        return {"connected": True, "channels": len(self.clients)}
+
+    async def flush(self):
+        if self.write_buffer:
+            await self.write_buffer.flush()
+
+    async def _flush_writes(self, *documents: Tuple[str, Optional[str]]):
+        """
+        Commit buffered writes before going to the server directly
+
+        Fails only when writes to the given (collection, document id) pairs
+        were dropped; other drops are already counted in the buffer's stats.
+        """
+        try:
+            await self.flush()
+        except WriteDroppedError as e:
+            if any((write.collection, write.document_id) in documents for write in e.writes):
+                raise
+
+    async def close(self):
+        try:
+            if self.write_buffer:
+                # Retries through a transient outage; raises for writes that could not be saved
+                await self.write_buffer.close()
+                print(f"✅ Firestore write buffer flushed: {self.write_buffer.get_stats()}")
+        finally:
+            for client in self.clients:
+                client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"channels": len(self.clients)}
+        if self.write_buffer:
+            stats["write_buffer"] = self.write_buffer.get_stats()
+        return stats
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.homework_models import HomeworkProblem, Solution
+from .base_repository import HomeworkRepository
+
+class MockRepository(HomeworkRepository):
+    """
+    Mock repository for development without a database
+
+    Records are kept in memory for the lifetime of the process, so unknown ids
+    are reported as missing just like the real backends. Nothing is persisted.
+    """
+
+    def __init__(self, **kwargs):
+        self._problems: Dict[str, HomeworkProblem] = {}
+        # Blob reference counts, kept for the lifetime of the process
+        self._blob_refs: Dict[str, int] = {}
+
+    @property
+    def repository_name(self) -> str:
+        return "Mock"
+
+    def initialize(self):
+        """Nothing to connect to"""
+        pass
+
+    @staticmethod
+    def _sort_key(upload_timestamp: datetime, problem_id: str) -> Tuple[str, str]:
+        """Sortable (upload_timestamp, id) key; text avoids comparing naive and aware datetimes"""
+        return upload_timestamp.isoformat(timespec="microseconds"), problem_id
+
+    async def create_problem(self, problem: HomeworkProblem):
+        # Stored and returned as copies, so callers cannot change records behind the repository's back
+        self._problems[problem.id] = problem.model_copy(deep=True)
+        if problem.file_hash:
+            self._blob_refs[problem.file_hash] = self._blob_refs.get(problem.file_hash, 0) + 1
+        print(f"⚠️  Mock: Created homework problem {problem.id}")
+
+    async def get_problem(self, problem_id: str) -> Optional[HomeworkProblem]:
+        problem = self._problems.get(problem_id)
+        return problem.model_copy(deep=True) if problem else None
+
+    async def update_solution(self, problem_id: str, solution: Solution):
+        problem = self._problems.get(problem_id)
+        if problem is None:
+            return
+        self._problems[problem_id] = problem.model_copy(update={"solution": solution, "status": "solved"})
+        print(f"Mock: Updated homework {problem_id} with solution")
+
+    async def acquire_solve_lease(self, problem_id: str, lease_seconds: float) -> bool:
+        # A single process needs no lease; only the status is tracked
+        problem = self._problems.get(problem_id)
+        if problem is None:
+            return False
+        self._problems[problem_id] = problem.model_copy(update={"status": "processing", "processing_started_at": datetime.now()})
+        return True
+
+    async def mark_solve_failed(self, problem_id: str):
+        problem = self._problems.get(problem_id)
+        if problem and problem.status == "processing":
+            self._problems[problem_id] = problem.model_copy(update={"status": "error"})
+
+    async def delete_problem(self, problem: HomeworkProblem) -> int:
+        deleted = self._problems.pop(problem.id, None) is not None
+        if deleted:
+            print(f"⚠️  Mock: Deleted homework problem {problem.id}")
+        if not problem.file_hash:
+            return 0
+        if not deleted:
+            # Already gone; its reference was dropped then
+            return await self.get_blob_reference_count(problem.file_hash)
+        return await self.release_blob_reference(problem.file_hash)
+
+    async def list_problems(self, limit: int, offset: int = 0,
+                            start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkProblem]:
+        problems = sorted(self._problems.values(),
+                          key=lambda problem: self._sort_key(problem.upload_timestamp, problem.id), reverse=True)
+        if start_after:
+            after = self._sort_key(*start_after)
+            problems = [problem for problem in problems
+                        if self._sort_key(problem.upload_timestamp, problem.id) < after]
+        else:
+            problems = problems[offset:]
+        return [problem.model_copy(deep=True) for problem in problems[:limit]]
+
+    async def list_problems_uploaded_before(self, cutoff: datetime, limit: int) -> List[HomeworkProblem]:
+        before = self._sort_key(cutoff, "")
+        problems = sorted((problem for problem in self._problems.values()
+                           if self._sort_key(problem.upload_timestamp, "") < before),
+                          key=lambda problem: self._sort_key(problem.upload_timestamp, problem.id))
+        return [problem.model_copy(deep=True) for problem in problems[:limit]]
+
+    async def release_blob_reference(self, file_hash: str) -> int:
+        remaining = max(0, self._blob_refs.get(file_hash, 0) - 1)
+        self._blob_refs[file_hash] = remaining
+        return remaining
+
+    async def get_blob_reference_count(self, file_hash: str) -> int:
+        return self._blob_refs.get(file_hash, 0)
@@ -0,0 +1,84 @@
+import importlib
+import os
+from concurrent.futures import Executor
+from typing import Dict, Type, Union
+
+from config.config import settings
+from .base_repository import HomeworkRepository
+from .mock_repository import MockRepository
+
+class RepositoryFactory:
+    """Factory class to create homework repositories"""
+
+    # Registry of available storage backends
+    # The Firestore backend is registered as "module:Class" so firebase_admin is only imported when used
+    _repositories: Dict[str, Union[Type[HomeworkRepository], str]] = {
+        "firestore": ".firestore_repository:FirestoreRepository",
+        "sqlite": ".sqlite_repository:SQLiteRepository",
+        "mock": MockRepository
+    }
+
+    @classmethod
+    def _get_repository_class(cls, backend: str) -> Type[HomeworkRepository]:
+        """Resolve a registered backend, importing its module if needed"""
+        repository_class = cls._repositories[backend]
+        if isinstance(repository_class, str):
+            module_name, class_name = repository_class.split(":")
+            module = importlib.import_module(module_name, package=__package__)
+            repository_class = getattr(module, class_name)
+            cls._repositories[backend] = repository_class
+        return repository_class
+
+    @classmethod
+    def create_repository(cls, backend: str, executor: Executor) -> HomeworkRepository:
+        """
+        Create and initialize a repository (blocking; call from an executor)
+
+        Falls back to the mock repository only for the default Firestore
+        backend with no credentials configured, so development works without a
+        database. An explicitly chosen backend (STORAGE_BACKEND set, or Firebase
+        credentials given) that fails to initialize raises instead of silently
+        losing every record.
+        """
+        backend = (backend or "firestore").lower()
+        if backend not in cls._repositories:
+            available_backends = ", ".join(cls._repositories.keys())
+            raise ValueError(f"Unknown storage backend '{backend}'. Available backends: {available_backends}")
+
+        try:
+            repository_class = cls._get_repository_class(backend)
+            repository = repository_class(
+                executor=executor,
+                db_path=cls._get_sqlite_path(),
+                pool_size=settings.FIRESTORE_CHANNEL_POOL_SIZE
+            )
+            repository.initialize()
+            return repository
+        except Exception as e:
+            print(f"❌ {backend.title()} initialization error: {e}")
+            if not cls._is_unconfigured_default(backend):
+                raise
+            print("⚠️  Running with mock storage for development (set STORAGE_BACKEND to require a database)")
+            return MockRepository()
+
+    @staticmethod
+    def _is_unconfigured_default(backend: str) -> bool:
+        """Whether Firestore is only in use by default, with no credentials configured"""
+        return (backend == "firestore"
+                and not os.getenv("STORAGE_BACKEND")
+                and not settings.FIREBASE_SERVICE_ACCOUNT_PATH
+                and not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
+
+    @staticmethod
+    def _get_sqlite_path() -> str:
+        """SQLite database location (relative paths are relative to the backend directory)"""
+        db_path = settings.SQLITE_DB_PATH
+        if not os.path.isabs(db_path):
+            backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            db_path = os.path.join(backend_dir, db_path)
+        return db_path
+
+    @classmethod
+    def register_repository(cls, name: str, repository_class: Type[HomeworkRepository]):
+        """Register a new custom storage backend"""
+        cls._repositories[name.lower()] = repository_class
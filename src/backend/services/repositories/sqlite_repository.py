@@ -0,0 +1,280 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.homework_models import HomeworkProblem, HomeworkSummary, Solution
+from utils.serialization_utils import solution_serializer
+from .base_repository import HomeworkRepository
+
+class SQLiteRepository(HomeworkRepository):
+    """
+    Homework records in an embedded SQLite database (WAL mode)
+
+    For single-node and offline deployments: no network hop, and metadata
+    operations take well under a millisecond. Writes go through one connection
+    serialized by a lock; reads use a connection per executor thread, which WAL
+    lets run concurrently with the writer.
+    """
+
+    def __init__(self, executor: Executor, db_path: str, **kwargs):
+        self.executor = executor
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+
+    @property
+    def repository_name(self) -> str:
+        return "SQLite"
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection with the pragmas every connection needs"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def initialize(self):
+        """Create the database file and schema"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._writer = self._open()
+        with self._write_lock, self._writer:
+            self._writer.executescript(
+                """CREATE TABLE IF NOT EXISTS homework_problems (
+                       id TEXT PRIMARY KEY,
+                       upload_timestamp TEXT NOT NULL,
+                       status TEXT NOT NULL,
+                       file_hash TEXT,
+                       data TEXT NOT NULL,
+                       filename TEXT,
+                       solved_at TEXT,
+                       question_count INTEGER
+                   );
+                   CREATE INDEX IF NOT EXISTS idx_homework_problems_upload
+                       ON homework_problems(upload_timestamp DESC, id DESC);
+                   CREATE TABLE IF NOT EXISTS upload_blobs (
+                       file_hash TEXT PRIMARY KEY,
+                       file_path TEXT NOT NULL,
+                       ref_count INTEGER NOT NULL DEFAULT 0
+                   );"""
+            )
+            self._add_summary_columns()
+        print(f"✅ SQLite database ready: {self.db_path}")
+
+    def _add_summary_columns(self):
+        """Add and backfill the summary columns on databases created without them"""
+        columns = {row[1] for row in self._writer.execute("PRAGMA table_info(homework_problems)")}
+        if "filename" in columns:
+            return
+        self._writer.executescript(
+            """ALTER TABLE homework_problems ADD COLUMN filename TEXT;
+               ALTER TABLE homework_problems ADD COLUMN solved_at TEXT;
+               ALTER TABLE homework_problems ADD COLUMN question_count INTEGER;
+               UPDATE homework_problems SET
+                   filename = json_extract(data, '$.filename'),
+                   solved_at = json_extract(data, '$.solution.solved_at'),
+                   question_count = json_extract(data, '$.solution.total_questions');"""
+        )
+
+    def _reader(self) -> sqlite3.Connection:
+        """Connection for the current executor thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _timestamp_key(timestamp: datetime) -> str:
+        """Sortable text form of an upload timestamp"""
+        return timestamp.isoformat(timespec="microseconds")
+
+    async def _run(self, func, *args):
+        """Run a blocking database call on the executor"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _create_problems(self, problems: List[HomeworkProblem]):
+        # One transaction for the whole batch
+        with self._write_lock, self._writer:
+            self._writer.executemany(
+                """INSERT INTO homework_problems (id, upload_timestamp, status, file_hash, data, filename)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [(problem.id, self._timestamp_key(problem.upload_timestamp), problem.status,
+                  problem.file_hash, problem.model_dump_json(), problem.filename)
+                 for problem in problems]
+            )
+            self._writer.executemany(
+                """INSERT INTO upload_blobs (file_hash, file_path, ref_count) VALUES (?, ?, 1)
+                   ON CONFLICT(file_hash) DO UPDATE SET ref_count = ref_count + 1""",
+                [(problem.file_hash, problem.file_path) for problem in problems if problem.file_hash]
+            )
+
+    async def create_problem(self, problem: HomeworkProblem):
+        await self._run(self._create_problems, [problem])
+        print(f"✅ Homework problem created in SQLite: {problem.id}")
+
+    async def create_problems(self, problems: List[HomeworkProblem]):
+        await self._run(self._create_problems, problems)
+        print(f"✅ {len(problems)} homework problems created in SQLite")
+
+    def _get_problem(self, problem_id: str) -> Optional[HomeworkProblem]:
+        row = self._reader().execute("SELECT data FROM homework_problems WHERE id = ?", (problem_id,)).fetchone()
+        return HomeworkProblem.model_validate_json(row[0]) if row else None
+
+    async def get_problem(self, problem_id: str) -> Optional[HomeworkProblem]:
+        return await self._run(self._get_problem, problem_id)
+
+    def _update_solution(self, problem_id: str, solution: Solution, solution_json: str):
+        with self._write_lock, self._writer:
+            self._writer.execute(
+                """UPDATE homework_problems
+                   SET status = 'solved',
+                       solved_at = ?,
+                       question_count = ?,
+                       data = json_set(data, '$.solution', json(?), '$.status', 'solved')
+                   WHERE id = ?""",
+                (solution.solved_at.isoformat(), solution.total_questions, solution_json, problem_id)
+            )
+
+    async def update_solution(self, problem_id: str, solution: Solution):
+        # Shared with the HTTP response for this solution version
+        solution_json = solution_serializer.serialize(solution).json.decode()
+        await self._run(self._update_solution, problem_id, solution, solution_json)
+
+    def _delete_problem(self, problem: HomeworkProblem) -> int:
+        with self._write_lock, self._writer:
+            cursor = self._writer.execute("DELETE FROM homework_problems WHERE id = ?", (problem.id,))
+            if not problem.file_hash:
+                return 0
+            if cursor.rowcount:
+                self._writer.execute(
+                    "UPDATE upload_blobs SET ref_count = MAX(ref_count - 1, 0) WHERE file_hash = ?",
+                    (problem.file_hash,)
+                )
+            row = self._writer.execute(
+                "SELECT ref_count FROM upload_blobs WHERE file_hash = ?", (problem.file_hash,)
+            ).fetchone()
+            remaining = row[0] if row else 0
+            if remaining == 0:
+                self._writer.execute("DELETE FROM upload_blobs WHERE file_hash = ?", (problem.file_hash,))
+            return remaining
+
+    async def delete_problem(self, problem: HomeworkProblem) -> int:
+        return await self._run(self._delete_problem, problem)
+
+    def _acquire_solve_lease(self, problem_id: str, lease_seconds: float) -> bool:
+        now = datetime.now()
+        with self._write_lock, self._writer:
+            cursor = self._writer.execute(
+                """UPDATE homework_problems
+                   SET status = 'processing',
+                       data = json_set(data, '$.status', 'processing', '$.processing_started_at', ?)
+                   WHERE id = ?
+                     AND NOT (status = 'processing'
+                              AND COALESCE(json_extract(data, '$.processing_started_at'), '') > ?)""",
+                (self._timestamp_key(now), problem_id,
+                 self._timestamp_key(now - timedelta(seconds=lease_seconds)))
+            )
+            return cursor.rowcount == 1
+
+    async def acquire_solve_lease(self, problem_id: str, lease_seconds: float) -> bool:
+        return await self._run(self._acquire_solve_lease, problem_id, lease_seconds)
+
+    def _mark_solve_failed(self, problem_id: str):
+        with self._write_lock, self._writer:
+            self._writer.execute(
+                """UPDATE homework_problems
+                   SET status = 'error', data = json_set(data, '$.status', 'error')
+                   WHERE id = ? AND status = 'processing'""",
+                (problem_id,)
+            )
+
+    async def mark_solve_failed(self, problem_id: str):
+        await self._run(self._mark_solve_failed, problem_id)
+
+    def _select_page(self, columns: str, limit: int, offset: int,
+                     start_after: Optional[Tuple[datetime, str]]) -> List[tuple]:
+        """Fetch one most-recent-first page of the given columns"""
+        if start_after:
+            upload_timestamp, problem_id = start_after
+            return self._reader().execute(
+                f"""SELECT {columns} FROM homework_problems
+                    WHERE (upload_timestamp, id) < (?, ?)
+                    ORDER BY upload_timestamp DESC, id DESC LIMIT ?""",
+                (self._timestamp_key(upload_timestamp), problem_id, limit)
+            ).fetchall()
+        return self._reader().execute(
+            f"SELECT {columns} FROM homework_problems ORDER BY upload_timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        ).fetchall()
+
+    def _list_problems(self, limit: int, offset: int,
+                       start_after: Optional[Tuple[datetime, str]]) -> List[HomeworkProblem]:
+        rows = self._select_page("data", limit, offset, start_after)
+        return [HomeworkProblem.model_validate_json(row[0]) for row in rows]
+
+    async def list_problems(self, limit: int, offset: int = 0,
+                            start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkProblem]:
+        return await self._run(self._list_problems, limit, offset, start_after)
+
+    def _list_summaries(self, limit: int, offset: int,
+                        start_after: Optional[Tuple[datetime, str]]) -> List[HomeworkSummary]:
+        # Only the summary columns are read; the JSON document (and its solution) is never touched
+        rows = self._select_page(
+            "id, filename, status, upload_timestamp, solved_at, question_count", limit, offset, start_after
+        )
+        return [
+            HomeworkSummary(
+                id=row[0], filename=row[1], status=row[2], upload_timestamp=row[3],
+                solved_at=row[4], question_count=row[5]
+            )
+            for row in rows
+        ]
+
+    async def list_summaries(self, limit: int, offset: int = 0,
+                             start_after: Optional[Tuple[datetime, str]] = None) -> List[HomeworkSummary]:
+        return await self._run(self._list_summaries, limit, offset, start_after)
+
+    def _list_problems_uploaded_before(self, cutoff: datetime, limit: int) -> List[HomeworkProblem]:
+        rows = self._reader().execute(
+            """SELECT data FROM homework_problems WHERE upload_timestamp < ?
+               ORDER BY upload_timestamp ASC, id ASC LIMIT ?""",
+            (self._timestamp_key(cutoff), limit)
+        ).fetchall()
+        return [HomeworkProblem.model_validate_json(row[0]) for row in rows]
+
+    async def list_problems_uploaded_before(self, cutoff: datetime, limit: int) -> List[HomeworkProblem]:
+        return await self._run(self._list_problems_uploaded_before, cutoff, limit)
+
+    def _release_blob_reference(self, file_hash: str) -> int:
+        with self._write_lock, self._writer:
+            self._writer.execute(
+                "UPDATE upload_blobs SET ref_count = MAX(ref_count - 1, 0) WHERE file_hash = ?",
+                (file_hash,)
+            )
+            row = self._writer.execute("SELECT ref_count FROM upload_blobs WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row[0] if row else 0
+
+    async def release_blob_reference(self, file_hash: str) -> int:
+        return await self._run(self._release_blob_reference, file_hash)
+
+    def _get_blob_reference_count(self, file_hash: str) -> int:
+        row = self._reader().execute("SELECT ref_count FROM upload_blobs WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row[0] if row else 0
+
+    async def get_blob_reference_count(self, file_hash: str) -> int:
+        return await self._run(self._get_blob_reference_count, file_hash)
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """Open this thread's read connection"""
+        await self._run(lambda: self._reader().execute("SELECT 1").fetchone())
+        return {"connected": True}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"db_path": self.db_path}
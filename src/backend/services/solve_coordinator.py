@@ -0,0 +1,275 @@
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.config import settings
+from models.homework_models import HomeworkProblem, Solution
+from services.admission_controller import AdmissionController
+from services.provider_scheduler import solve_owner, solve_priority
+
+class SpeculativeSolve:
+    """A background solve started at upload time, waiting to be claimed"""
+
+    def __init__(self, task: asyncio.Task, expiry: asyncio.TimerHandle):
+        self.task = task
+        self.expiry = expiry
+        self.started_at = time.time()
+
+class SolveCoordinator:
+    """
+    Runs each solve once, however many requests ask for it
+
+    Concurrent solve requests for a problem await the same task, and problems
+    uploaded from identical files (same file_hash) share one call to the
+    solver. Across workers, the record's "processing" status acts as a lease
+    (SOLVE_LEASE_SECONDS): a worker that finds a fresh lease waits for the
+    other worker's solution instead of solving again.
+
+    Solves can also start speculatively at upload time: clients call
+    /homework/solve right after uploading, so with SPECULATIVE_SOLVE_ENABLED the
+    solve starts as soon as the file is stored and the solve request attaches
+    to it. At most SPECULATIVE_SOLVE_MAX_CONCURRENCY speculative solves run at
+    once (further uploads are simply not speculated); results not claimed
+    within SPECULATIVE_SOLVE_TTL_SECONDS are discarded, and deleting a problem
+    cancels its speculative solve.
+    """
+
+    def __init__(self, math_solver_factory: Callable[[], Any], firebase_service_factory: Callable[[], Any]):
+        self._math_solver_factory = math_solver_factory
+        self._firebase_service_factory = firebase_service_factory
+        self._problem_solves: Dict[str, asyncio.Task] = {}
+        self._file_solves: Dict[str, asyncio.Task] = {}
+        self._speculative: Dict[str, SpeculativeSolve] = {}
+        self.coalesced_requests = 0
+        self.coalesced_files = 0
+        self.waited_on_other_workers = 0
+        self.started = 0
+        self.skipped = 0
+        self.claimed = 0
+        self.expired = 0
+        self.cancelled = 0
+
+    @staticmethod
+    def _single_flight(tasks: Dict[str, asyncio.Task], key: str, factory: Callable[[], Any]) -> Tuple[asyncio.Task, bool]:
+        """Return the in-flight task for key, starting one if there is none"""
+        task = tasks.get(key)
+        if task is not None:
+            return task, True
+
+        task = asyncio.create_task(factory())
+        tasks[key] = task
+        task.add_done_callback(lambda t: tasks.pop(key, None) if tasks.get(key) is t else None)
+        # Retrieve failures so a solve every caller gave up on is not reported as never retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task, False
+
+    async def solve(self, problem: HomeworkProblem, file_path: str,
+                    admission: Optional[AdmissionController] = None) -> Solution:
+        """
+        Solve a homework problem and store the solution, once
+
+        A caller that arrives while the problem is being solved waits for that
+        solve. Callers are shielded from each other: one disconnecting does not
+        cancel the solve for the rest.
+
+        Only joining work already under way (an in-flight or speculative solve)
+        bypasses admission; any new solve, including a re-solve after a failed
+        speculative one, takes a slot from admission first and raises
+        AdmissionRejectedError when none is available.
+        """
+        task, coalesced = self._single_flight(
+            self._problem_solves, problem.id, lambda: self._solve_problem(problem, file_path, admission)
+        )
+        if coalesced:
+            self.coalesced_requests += 1
+            print(f"🔗 Joining in-flight solve of {problem.id}")
+            # A student joining a batch solve should not wait at batch priority
+            self._scheduler().promote(problem.id, solve_priority.get())
+        return await asyncio.shield(task)
+
+    def _scheduler(self):
+        return self._math_solver_factory().scheduler
+
+    def is_solving(self, problem_id: str) -> bool:
+        """Whether a solve request for the problem would join work already under way"""
+        return problem_id in self._problem_solves or problem_id in self._speculative
+
+    @staticmethod
+    def _admitted(admission: Optional[AdmissionController]):
+        return admission.admit() if admission else nullcontext()
+
+    async def _solve_problem(self, problem: HomeworkProblem, file_path: str,
+                             admission: Optional[AdmissionController]) -> Solution:
+        """Admit the solve unless it only joins a speculative one, then lease, solve and persist it"""
+        # Provider calls made by this solve (and the tasks it starts) share a fair-scheduling slot queue
+        solve_owner.set(problem.id)
+        if problem.id in self._speculative:
+            # Claiming costs no new capacity; a re-solve after a failed speculation is admitted then
+            return await self._lease_and_solve(problem, file_path, admission)
+        async with self._admitted(admission):
+            return await self._lease_and_solve(problem, file_path, None)
+
+    async def _lease_and_solve(self, problem: HomeworkProblem, file_path: str,
+                               admission: Optional[AdmissionController]) -> Solution:
+        """Take the solve lease, solve (or reuse a solve) and persist the solution"""
+        firebase_service = self._firebase_service_factory()
+
+        while not await firebase_service.begin_solve(problem.id):
+            # Another worker is solving this problem; wait for its result or for its lease to lapse
+            self.waited_on_other_workers += 1
+            solution = await self._wait_for_other_worker(problem.id)
+            if solution is not None:
+                return solution
+
+        try:
+            solution = await self.claim(problem.id)
+            if solution is None:
+                async with self._admitted(admission):
+                    solution = await self._solve_file(problem.file_hash, file_path)
+            # Solutions shared between identical uploads are copied before they are addressed
+            solution = solution.model_copy(update={"problem_id": problem.id})
+            await firebase_service.update_homework_solution(problem.id, solution)
+            return solution
+        except Exception:
+            await firebase_service.fail_solve(problem.id)
+            raise
+        finally:
+            self._scheduler().clear_promotion(problem.id)
+
+    async def _wait_for_other_worker(self, problem_id: str) -> Optional[Solution]:
+        """
+        Poll a record another worker is solving
+
+        Returns its solution once stored, or None when the record is no longer
+        held (the lease lapsed or the solve failed) and may be taken over.
+        """
+        print(f"⏳ {problem_id} is being solved by another worker, waiting")
+        firebase_service = self._firebase_service_factory()
+        while True:
+            await asyncio.sleep(settings.SOLVE_LEASE_POLL_SECONDS)
+            record = await firebase_service.get_homework_problem(problem_id, use_cache=False)
+            if record is None:
+                raise ValueError(f"Homework problem {problem_id} no longer exists")
+            if record.status == "solved" and record.solution:
+                return record.solution
+            if record.status != "processing" or record.processing_started_at is None:
+                return None
+            started_at = record.processing_started_at.timestamp()
+            if time.time() - started_at > settings.SOLVE_LEASE_SECONDS:
+                return None
+
+    async def _solve_file(self, file_hash: Optional[str], file_path: str) -> Solution:
+        """Solve a file, sharing the solver call with identical uploads being solved now"""
+        if not file_hash:
+            return await self._math_solver_factory().solve_problems_from_image(file_path)
+
+        task, coalesced = self._single_flight(
+            self._file_solves, file_hash,
+            lambda: self._math_solver_factory().solve_problems_from_image(file_path)
+        )
+        if coalesced:
+            self.coalesced_files += 1
+            print(f"🔗 Sharing the solve of identical file {file_hash[:12]}")
+        return await asyncio.shield(task)
+
+    def _running_count(self) -> int:
+        return sum(1 for entry in self._speculative.values() if not entry.task.done())
+
+    def speculate(self, problem_id: str, file_path: str) -> bool:
+        """Start solving an upload in the background; returns whether it was started"""
+        if not settings.SPECULATIVE_SOLVE_ENABLED or problem_id in self._speculative:
+            return False
+        if self._running_count() >= settings.SPECULATIVE_SOLVE_MAX_CONCURRENCY:
+            self.skipped += 1
+            return False
+
+        task = asyncio.create_task(self._solve_speculatively(problem_id, file_path))
+        # Retrieve failures so an unclaimed failed solve is not reported as never retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        expiry = asyncio.get_event_loop().call_later(
+            settings.SPECULATIVE_SOLVE_TTL_SECONDS, self._expire, problem_id
+        )
+        self._speculative[problem_id] = SpeculativeSolve(task, expiry)
+        self.started += 1
+        print(f"🔮 Speculatively solving {problem_id}")
+        return True
+
+    async def _solve_speculatively(self, problem_id: str, file_path: str) -> Solution:
+        solve_owner.set(problem_id)
+        solve_priority.set("speculative")
+        return await self._math_solver_factory().solve_problems_from_image(file_path)
+
+    async def claim(self, problem_id: str) -> Optional[Solution]:
+        """
+        Join the speculative solve of a problem, waiting if still running
+
+        Only ever joins: returns None when there is none or it failed, and the
+        caller then starts a new solve, admitted like any other.
+        """
+        entry = self._speculative.pop(problem_id, None)
+        if entry is None:
+            return None
+        entry.expiry.cancel()
+        # Its remaining provider calls now have someone waiting on them
+        self._scheduler().promote(problem_id, solve_priority.get())
+        try:
+            solution = await entry.task
+        except asyncio.CancelledError:
+            if entry.task.cancelled():
+                return None
+            raise
+        except Exception as e:
+            print(f"⚠️  Speculative solve of {problem_id} failed, solving again: {e}")
+            return None
+        self.claimed += 1
+        print(f"🔮 Using speculative solve of {problem_id} "
+              f"(started {time.time() - entry.started_at:.1f}s ago)")
+        return solution
+
+    def cancel(self, problem_id: str):
+        """Abandon a problem's speculative solve (e.g. the problem was deleted)"""
+        entry = self._speculative.pop(problem_id, None)
+        if entry is None:
+            return
+        entry.expiry.cancel()
+        if not entry.task.done():
+            entry.task.cancel()
+        self.cancelled += 1
+
+    def _expire(self, problem_id: str):
+        """Drop a speculative solve nobody claimed"""
+        entry = self._speculative.pop(problem_id, None)
+        if entry is None:
+            return
+        if not entry.task.done():
+            entry.task.cancel()
+        self.expired += 1
+        print(f"⌛ Discarded unclaimed speculative solve of {problem_id}")
+
+    async def close(self):
+        """Cancel all speculative and in-flight solves (called at shutdown)"""
+        for problem_id in list(self._speculative):
+            self.cancel(problem_id)
+        # Interrupted records keep their lease, which lapses after SOLVE_LEASE_SECONDS
+        for task in list(self._problem_solves.values()) + list(self._file_solves.values()):
+            task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Coordination and speculation counters for this process"""
+        return {
+            "in_flight": len(self._problem_solves),
+            "coalesced_requests": self.coalesced_requests,
+            "coalesced_files": self.coalesced_files,
+            "waited_on_other_workers": self.waited_on_other_workers,
+            "speculative": {
+                "enabled": settings.SPECULATIVE_SOLVE_ENABLED,
+                "running": self._running_count(),
+                "waiting_to_be_claimed": len(self._speculative),
+                "started": self.started,
+                "skipped": self.skipped,
+                "claimed": self.claimed,
+                "expired": self.expired,
+                "cancelled": self.cancelled
+            }
+        }
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.config import settings
+from models.homework_models import HomeworkProblem
+from services.derivative_service import DerivativeService
+
+# Content-addressed blob names: 64 hex digits plus the original extension
+BLOB_NAME = re.compile(r'^([0-9a-f]{64})(\.[A-Za-z0-9]+)?$')
+
+class StorageCleanupService:
+    """
+    Removes deleted and expired homework from storage
+
+    Deleting a homework problem removes its record at once; its upload and
+    derivatives are queued and removed by a background task once no other
+    record references the blob. With RETENTION_SWEEP_ENABLED a periodic sweep
+    also deletes problems older than HOMEWORK_RETENTION_DAYS and clears
+    orphaned blobs, derivatives and staging leftovers. Sweeps work in batches
+    of RETENTION_SWEEP_BATCH_SIZE with a pause in between, and all filesystem
+    work runs on the storage executor.
+    """
+
+    def __init__(self, firebase_service_factory: Callable[[], Any]):
+        self._firebase_service_factory = firebase_service_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self.problems_deleted = 0
+        self.problems_expired = 0
+        self.files_removed = 0
+        self.orphans_removed = 0
+        self.sweeps = 0
+        self.last_sweep: Optional[Dict[str, Any]] = None
+
+    async def delete_problem(self, problem: HomeworkProblem):
+        """Delete a homework problem's record and queue its files for removal"""
+        firebase_service = self._firebase_service_factory()
+        remaining = await firebase_service.delete_homework_problem(problem)
+        self.problems_deleted += 1
+        if remaining == 0:
+            self.enqueue(problem.file_path, problem.file_hash)
+        else:
+            print(f"♻️  Keeping {problem.file_path}: still used by {remaining} other upload(s)")
+
+    def enqueue(self, file_path: str, file_hash: Optional[str] = None):
+        """Queue an upload (and its derivatives) for removal"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._remove_queued_files())
+        self._queue.put_nowait((file_path, file_hash))
+
+    async def _remove_queued_files(self):
+        """Background task draining the removal queue"""
+        while True:
+            file_path, file_hash = await self._queue.get()
+            try:
+                await self._remove_upload(file_path, file_hash)
+            except Exception as e:
+                print(f"⚠️  Could not remove {file_path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _remove_upload(self, file_path: str, file_hash: Optional[str]):
+        """Remove an upload unless a record took a new reference on it meanwhile"""
+        firebase_service = self._firebase_service_factory()
+        if not self._is_managed_path(file_path):
+            return
+        if file_hash and await firebase_service.get_blob_reference_count(file_hash) > 0:
+            print(f"♻️  Keeping {file_path}: it was uploaded again")
+            return
+
+        loop = asyncio.get_event_loop()
+        removed = await loop.run_in_executor(firebase_service.executor, self._remove_files, file_path)
+        if removed:
+            self.files_removed += 1
+            print(f"🗑️  Removed {file_path}")
+
+    def _is_managed_path(self, file_path: str) -> bool:
+        """Only files inside the uploads directory are ever removed"""
+        uploads_dir = os.path.realpath(self._firebase_service_factory().uploads_dir)
+        return os.path.realpath(file_path).startswith(uploads_dir + os.sep)
+
+    @staticmethod
+    def _remove_files(file_path: str) -> bool:
+        """Delete an upload and its derivatives directory (blocking)"""
+        shutil.rmtree(DerivativeService.derivatives_dir(file_path), ignore_errors=True)
+        try:
+            os.remove(file_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def start(self):
+        """Start the periodic retention sweep (called from the lifespan)"""
+        if settings.RETENTION_SWEEP_ENABLED and self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_periodically())
+            print(f"🧹 Retention sweep every {settings.RETENTION_SWEEP_INTERVAL_SECONDS:.0f}s "
+                  f"(keeping homework for {settings.HOMEWORK_RETENTION_DAYS or 'unlimited'} days)")
+
+    async def _sweep_periodically(self):
+        while True:
+            await asyncio.sleep(settings.RETENTION_SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"⚠️  Retention sweep failed: {e}")
+
+    async def sweep(self) -> Dict[str, Any]:
+        """Delete expired homework problems and orphaned files, batch by batch"""
+        started_at = time.perf_counter()
+        expired = await self._sweep_expired_problems() if settings.HOMEWORK_RETENTION_DAYS > 0 else 0
+        orphans = await self._sweep_orphans()
+
+        self.sweeps += 1
+        self.last_sweep = {
+            "finished_at": datetime.now().isoformat(),
+            "seconds": time.perf_counter() - started_at,
+            "problems_expired": expired,
+            "orphans_removed": orphans
+        }
+        if expired or orphans:
+            print(f"🧹 Retention sweep: {expired} expired problem(s), {orphans} orphaned file(s)")
+        return self.last_sweep
+
+    async def _sweep_expired_problems(self) -> int:
+        """Delete problems uploaded more than HOMEWORK_RETENTION_DAYS ago"""
+        firebase_service = self._firebase_service_factory()
+        cutoff = datetime.now() - timedelta(days=settings.HOMEWORK_RETENTION_DAYS)
+        expired = 0
+
+        while True:
+            batch = await firebase_service.list_problems_uploaded_before(cutoff, settings.RETENTION_SWEEP_BATCH_SIZE)
+            for problem in batch:
+                await self.delete_problem(problem)
+            expired += len(batch)
+            self.problems_expired += len(batch)
+            if len(batch) < settings.RETENTION_SWEEP_BATCH_SIZE:
+                return expired
+            await asyncio.sleep(settings.RETENTION_SWEEP_BATCH_PAUSE_SECONDS)
+
+    async def _sweep_orphans(self) -> int:
+        """Remove blobs no record references, and derivatives and staged files left behind"""
+        firebase_service = self._firebase_service_factory()
+        await firebase_service.ensure_initialized()
+        if firebase_service.repository.repository_name == "Mock":
+            # Mock reference counts do not survive restarts; every blob would look orphaned
+            return 0
+
+        loop = asyncio.get_event_loop()
+        blobs, leftovers = await loop.run_in_executor(
+            firebase_service.executor, self._scan_uploads, firebase_service.uploads_dir, settings.ORPHAN_GRACE_SECONDS
+        )
+        removed = await loop.run_in_executor(firebase_service.executor, self._remove_leftovers, leftovers)
+
+        batch_size = settings.RETENTION_SWEEP_BATCH_SIZE
+        for start in range(0, len(blobs), batch_size):
+            if start:
+                await asyncio.sleep(settings.RETENTION_SWEEP_BATCH_PAUSE_SECONDS)
+            for file_path, file_hash in blobs[start:start + batch_size]:
+                if await firebase_service.get_blob_reference_count(file_hash) == 0:
+                    if await loop.run_in_executor(firebase_service.executor, self._remove_files, file_path):
+                        removed += 1
+
+        self.orphans_removed += removed
+        return removed
+
+    @staticmethod
+    def _scan_uploads(uploads_dir: str, grace_seconds: float) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        Find removal candidates in the blob store (blocking)
+
+        Returns the content-addressed blobs older than the grace period, and
+        leftovers: derivatives whose upload is gone, abandoned derivative
+        builds and staged uploads. Files outside the hashed layout are ignored.
+        """
+        cutoff = time.time() - grace_seconds
+        blobs, leftovers = [], []
+
+        for dirpath, dirnames, filenames in os.walk(uploads_dir):
+            if os.path.basename(dirpath) == ".staging":
+                leftovers.extend(os.path.join(dirpath, name) for name in filenames
+                                 if os.path.getmtime(os.path.join(dirpath, name)) < cutoff)
+                dirnames[:] = []
+                continue
+            if os.path.relpath(dirpath, uploads_dir).count(os.sep) != 1:
+                # Only the two-level fan-out directories (ab/cd) hold blobs
+                continue
+
+            for name in filenames:
+                match = BLOB_NAME.match(name)
+                path = os.path.join(dirpath, name)
+                if match and os.path.getmtime(path) < cutoff:
+                    blobs.append((path, match.group(1)))
+            for name in dirnames:
+                path = os.path.join(dirpath, name)
+                if name.endswith(DerivativeService.DERIVATIVES_SUFFIX):
+                    source = path[:-len(DerivativeService.DERIVATIVES_SUFFIX)]
+                    if not os.path.exists(source):
+                        leftovers.append(path)
+                elif name.endswith(".tmp") and os.path.getmtime(path) < cutoff:
+                    leftovers.append(path)
+            dirnames[:] = []
+
+        return blobs, leftovers
+
+    @staticmethod
+    def _remove_leftovers(paths: List[str]) -> int:
+        """Delete files and directories (blocking)"""
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return len(paths)
+
+    async def close(self):
+        """Stop the sweep and let queued removals finish (called at shutdown)"""
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self._queue is not None and self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Deletion and sweep counters for this process"""
+        return {
+            "sweep_enabled": settings.RETENTION_SWEEP_ENABLED,
+            "pending_removals": self._queue.qsize() if self._queue else 0,
+            "problems_deleted": self.problems_deleted,
+            "problems_expired": self.problems_expired,
+            "files_removed": self.files_removed,
+            "orphans_removed": self.orphans_removed,
+            "sweeps": self.sweeps,
+            "last_sweep": self.last_sweep
+        }
@@ -0,0 +1,289 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class WriteDroppedError(Exception):
+    """Raised by flush when buffered writes were given up on; writes holds them"""
+
+    def __init__(self, writes: List["PendingWrite"]):
+        self.writes = writes
+        documents = ", ".join(f"{write.collection}/{write.document_id}" for write in writes[:5])
+        super().__init__(f"Dropped {len(writes)} buffered Firestore writes ({documents}): {writes[0].error}")
+
+class PendingWrite:
+    """A single buffered Firestore document write"""
+
+    def __init__(self, collection: str, document_id: str, data: Dict[str, Any],
+                 kind: str = "set", merge: bool = False):
+        self.collection = collection
+        self.document_id = document_id
+        self.data = data
+        self.kind = kind  # "set" or "update"
+        self.merge = merge
+        self.attempts = 0
+        self.error: Optional[str] = None  # Why the last commit attempt failed
+
+    def absorb(self, other: "PendingWrite") -> bool:
+        """
+        Fold a later update to the same document into this write
+
+        Only plain field updates are folded; merge-sets (which may carry
+        server-side transforms such as Increment) are kept as separate writes.
+        """
+        if other.kind != "update" or (self.kind == "set" and self.merge):
+            return False
+        self.data = {**self.data, **other.data}
+        return True
+
+class WriteBehindBuffer:
+    """
+    Write-behind buffer for Firestore document writes
+
+    Writes are queued and committed in batches, either once batch_size writes
+    are pending or flush_interval seconds after the first one, whichever comes
+    first. Consecutive updates to the same document are coalesced into one
+    write. Pending and in-flight writes can be overlaid on reads so a worker
+    always sees its own writes.
+
+    A batch that fails with a transient error (unavailable, deadline,
+    contention) is retried whole, backing off exponentially between attempts.
+    Such a batch may already have been applied (a deadline is ambiguous), so
+    every buffered write must be idempotent: sets, field updates, and no
+    server-side transforms such as Increment.
+    A batch rejected outright is split in halves until the writes Firestore
+    rejects are isolated; the rest still commit. Writes that are rejected, or
+    still failing after MAX_ATTEMPTS, are dropped: flush raises
+    WriteDroppedError for them and get_stats counts them.
+    """
+
+    # Firestore rejects batches with more than 500 writes
+    MAX_BATCH_SIZE = 500
+    MAX_ATTEMPTS = 5
+    # Delay before the first retry of a failed batch; doubles with each attempt
+    RETRY_BASE_DELAY = 0.5
+
+    def __init__(self, get_client: Callable[[], Any], batch_size: int, flush_interval: float):
+        # Returns an async Firestore client (possibly a different pooled one per call)
+        self.get_client = get_client
+        self.batch_size = max(1, min(batch_size, self.MAX_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self._pending: List[PendingWrite] = []
+        self._inflight: List[PendingWrite] = []
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self.batches_committed = 0
+        self.writes_committed = 0
+        self.writes_coalesced = 0
+        self.writes_retried = 0
+        self.writes_dropped = 0
+        self.last_error: Optional[str] = None
+
+    def enqueue(self, write: PendingWrite):
+        """Queue a write for the next batch commit"""
+        # Coalesce with the latest pending write to the same document, if possible
+        latest = next(
+            (pending for pending in reversed(self._pending)
+             if (pending.collection, pending.document_id) == (write.collection, write.document_id)),
+            None
+        )
+        if latest is not None and latest.absorb(write):
+            self.writes_coalesced += 1
+        else:
+            self._pending.append(write)
+
+        self._has_pending.set()
+        if len(self._pending) >= self.batch_size:
+            self._batch_full.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def overlay(self, collection: str, document_id: str) -> Optional[Tuple[bool, Dict[str, Any]]]:
+        """
+        Buffered state of a document that has not been committed yet
+
+        Returns None when nothing is pending, otherwise (complete, fields):
+        complete is True when a full set is pending, so the fields are the
+        whole document; otherwise they must be merged over the stored document.
+        """
+        complete = False
+        fields: Dict[str, Any] = {}
+        found = False
+        for write in self._inflight + self._pending:
+            if (write.collection, write.document_id) != (collection, document_id):
+                continue
+            found = True
+            if write.kind == "set" and not write.merge:
+                complete = True
+                fields = dict(write.data)
+            else:
+                fields.update(write.data)
+        return (complete, fields) if found else None
+
+    async def _run(self):
+        """Flush whenever the batch fills up or the interval after the first write elapses"""
+        while True:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            # Back off after a failed commit instead of retrying on the next interval
+            delay = self._retry_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.flush()
+            except WriteDroppedError as e:
+                # No caller to raise to; the drop is counted in get_stats
+                print(f"❌ {e}")
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Whether a failed commit may succeed if retried unchanged"""
+        # Deferred import: only reached after the Firestore client has failed a commit
+        from google.api_core import exceptions as google_exceptions
+        if isinstance(error, (google_exceptions.TooManyRequests, google_exceptions.Conflict)):
+            return True  # Quota exhausted or contention (Aborted)
+        return not isinstance(error, google_exceptions.ClientError)
+
+    async def flush(self):
+        """
+        Commit all pending writes in batches
+
+        Raises WriteDroppedError once done if any writes had to be dropped.
+        """
+        dropped: List[PendingWrite] = []
+        async with self._flush_lock:
+            while self._pending:
+                writes = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                self._inflight.extend(writes)
+                if len(self._pending) < self.batch_size:
+                    self._batch_full.clear()
+                if not self._pending:
+                    self._has_pending.clear()
+
+                started_at = time.perf_counter()
+                committed_before = self.writes_committed
+                for write in writes:
+                    write.attempts += 1
+                try:
+                    retry = await self._commit_isolating(writes, dropped)
+                finally:
+                    for write in writes:
+                        self._inflight.remove(write)
+                if not retry:
+                    print(f"✅ Committed {self.writes_committed - committed_before} buffered writes in "
+                          f"{(time.perf_counter() - started_at) * 1000:.0f} ms")
+                    continue
+
+                self.writes_retried += len(retry)
+                attempts = max(write.attempts for write in retry)
+                self._retry_at = time.monotonic() + self.RETRY_BASE_DELAY * 2 ** (attempts - 1)
+                print(f"⚠️  Retrying {len(retry)} buffered writes (attempt {attempts + 1} of {self.MAX_ATTEMPTS})")
+                # Retry on a later flush, keeping the original order
+                self._pending[:0] = retry
+                self._has_pending.set()
+                break
+
+        if dropped:
+            self.writes_dropped += len(dropped)
+            self.last_error = dropped[-1].error
+            raise WriteDroppedError(dropped)
+
+    async def _commit_isolating(self, writes: List[PendingWrite], dropped: List[PendingWrite]) -> List[PendingWrite]:
+        """
+        Commit writes, splitting rejected batches to isolate the writes at fault
+
+        Rejected writes, and writes out of attempts, are added to dropped.
+        Returns the writes to retry after a transient failure.
+        """
+        if not writes:
+            return []
+        try:
+            await self._commit(writes)
+            self.batches_committed += 1
+            self.writes_committed += len(writes)
+            return []
+        except Exception as e:
+            for write in writes:
+                write.error = f"{type(e).__name__}: {e}"
+            if self._is_transient(e):
+                print(f"❌ Error committing buffered writes: {e}")
+                dropped.extend(write for write in writes if write.attempts >= self.MAX_ATTEMPTS)
+                return [write for write in writes if write.attempts < self.MAX_ATTEMPTS]
+            if len(writes) == 1:
+                print(f"❌ Firestore rejected the write to {writes[0].collection}/{writes[0].document_id}: {e}")
+                dropped.extend(writes)
+                return []
+
+        middle = len(writes) // 2
+        retry = await self._commit_isolating(writes[:middle], dropped)
+        if retry:
+            # Transient failure: later writes may depend on these, so they wait too
+            return retry + writes[middle:]
+        # Later writes to a document whose earlier write was rejected would apply without it
+        rejected = {(write.collection, write.document_id) for write in dropped}
+        held = [write for write in writes[middle:] if (write.collection, write.document_id) in rejected]
+        for write in held:
+            write.error = "an earlier write to the same document was rejected"
+        dropped.extend(held)
+        return await self._commit_isolating(
+            [write for write in writes[middle:] if write not in held], dropped
+        )
+
+    async def _commit(self, writes: List[PendingWrite]):
+        """Commit one Firestore batch"""
+        client = self.get_client()
+        batch = client.batch()
+        for write in writes:
+            document = client.collection(write.collection).document(write.document_id)
+            if write.kind == "update":
+                batch.update(document, write.data)
+            else:
+                batch.set(document, write.data, merge=write.merge)
+        await batch.commit()
+
+    async def close(self):
+        """
+        Stop the background flusher and commit everything still pending
+
+        Transient failures are retried with the usual backoff until every
+        write is committed or out of attempts, so a brief outage at shutdown
+        does not lose records. Raises WriteDroppedError for writes given up on.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        dropped: List[PendingWrite] = []
+        while self._pending:
+            delay = self._retry_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.flush()
+            except WriteDroppedError as e:
+                dropped.extend(e.writes)
+        if dropped:
+            raise WriteDroppedError(dropped)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer counters for this process"""
+        return {
+            "pending": len(self._pending),
+            "inflight": len(self._inflight),
+            "batches_committed": self.batches_committed,
+            "writes_committed": self.writes_committed,
+            "writes_coalesced": self.writes_coalesced,
+            "writes_retried": self.writes_retried,
+            "writes_dropped": self.writes_dropped,
+            "last_error": self.last_error,
+        }
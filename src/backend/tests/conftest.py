@@ -0,0 +1,13 @@
+"""
+Shared setup for the backend unit tests
+
+Run from the backend directory with `uv run pytest` (or `python -m pytest`).
+These tests need no network, API keys or Firebase project; the scripts in
+test/ exercise a running server and real providers instead.
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
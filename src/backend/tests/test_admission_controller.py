@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from services.admission_controller import AdmissionController, AdmissionRejectedError
+
+async def hold(controller: AdmissionController, release: asyncio.Event, order: list = None, name: str = None):
+    """An admitted solve that runs until release is set"""
+    async with controller.admit():
+        if order is not None:
+            order.append(name)
+        await release.wait()
+
+async def test_requests_beyond_the_queue_are_rejected_at_once():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    queued = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+    assert controller.get_stats()["active"] == 1
+    assert controller.get_stats()["queue_depth"] == 1
+
+    with pytest.raises(AdmissionRejectedError) as excinfo:
+        async with controller.admit():
+            pass
+    assert excinfo.value.retry_after >= 1
+    assert controller.get_stats()["rejected_queue_full"] == 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    stats = controller.get_stats()
+    assert stats["active"] == 0
+    assert stats["admitted"] == 2
+
+async def test_queued_requests_time_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedError):
+        async with controller.admit():
+            pass
+    stats = controller.get_stats()
+    assert stats["rejected_queue_timeout"] == 1
+    assert stats["queue_depth"] == 0
+
+    release.set()
+    await running
+    assert controller.get_stats()["active"] == 0
+
+async def test_queued_requests_are_admitted_in_order():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+    release = asyncio.Event()
+    order = []
+    tasks = []
+    for name in ["first", "second", "third"]:
+        tasks.append(asyncio.create_task(hold(controller, release, order, name)))
+        await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["first", "second", "third"]
+
+async def test_cancelled_requests_leave_the_queue():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    queued = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+
+    queued.cancel()
+    await asyncio.gather(queued, return_exceptions=True)
+    assert controller.get_stats()["queue_depth"] == 0
+
+    release.set()
+    await running
+    assert controller.get_stats()["active"] == 0
+
+async def test_zero_concurrency_disables_admission_control():
+    controller = AdmissionController(max_concurrent=0, max_queue=0, queue_timeout=0)
+    async with controller.admit():
+        async with controller.admit():
+            pass
+    assert controller.get_stats()["rejected_queue_full"] == 0
@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+from models.homework_models import StoredFile
+from services.blob_store import BlobStore
+
+def stage(store: BlobStore, content: bytes) -> StoredFile:
+    digest = hashlib.sha256(content).hexdigest()
+    path = os.path.join(store.staging_dir, f"{digest}.upload")
+    with open(path, "wb") as f:
+        f.write(content)
+    return StoredFile(file_path=path, sha256=digest, size_bytes=len(content))
+
+def test_commit_moves_the_staged_file_to_its_content_address(tmp_path):
+    store = BlobStore(str(tmp_path))
+    stored = store.commit(stage(store, b"page"), ".PNG")
+
+    assert stored.file_path == store.path_for(stored.sha256, ".png")
+    assert not stored.deduplicated
+    assert os.listdir(store.staging_dir) == []
+
+def test_duplicate_upload_refreshes_the_blob_mtime(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first = store.commit(stage(store, b"page"), ".png")
+    os.utime(first.file_path, (0, 0))
+
+    second = store.commit(stage(store, b"page"), ".png")
+
+    assert second.deduplicated
+    assert second.file_path == first.file_path
+    # An old mtime would let the orphan sweep delete the blob the new record points at
+    assert os.path.getmtime(second.file_path) > 0
+    assert os.listdir(store.staging_dir) == []
+
+def test_same_content_under_another_extension_shares_one_blob(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first = store.commit(stage(store, b"photo"), ".jpg")
+    os.makedirs(first.file_path + ".derivatives")
+
+    for extension in (".jpeg", ".JPG", ".png"):
+        again = store.commit(stage(store, b"photo"), extension)
+        assert again.deduplicated
+        assert again.file_path == first.file_path
+
+    assert sorted(os.listdir(os.path.dirname(first.file_path))) == [
+        os.path.basename(first.file_path), os.path.basename(first.file_path) + ".derivatives"
+    ]
+
+def test_jpeg_is_stored_as_jpg(tmp_path):
+    store = BlobStore(str(tmp_path))
+    stored = store.commit(stage(store, b"photo"), ".JPEG")
+    assert stored.file_path.endswith(".jpg")
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from models.homework_models import HomeworkProblem
+from utils.etag_utils import EtagUtils
+
+def make_problem(status: str = "uploaded") -> HomeworkProblem:
+    return HomeworkProblem(id="p1", filename="p1.png", file_path="uploads/p1.png",
+                           upload_timestamp=datetime(2026, 3, 1), status=status)
+
+def test_tags_are_weak_and_follow_the_record_version():
+    etag = EtagUtils.for_problem(make_problem())
+
+    # Gzip and identity bodies share the tag, so it must not claim byte equality
+    assert etag.startswith('W/"')
+    assert etag == EtagUtils.for_problem(make_problem())
+    assert etag != EtagUtils.for_problem(make_problem(status="solved"))
+
+def test_matches_compares_weakly():
+    etag = EtagUtils.for_problem(make_problem())
+    opaque = etag.removeprefix("W/")
+
+    assert EtagUtils.matches(etag, etag)
+    assert EtagUtils.matches(opaque, etag)
+    assert EtagUtils.matches(f'"other", {etag}', etag)
+    assert EtagUtils.matches("*", etag)
+    assert not EtagUtils.matches('W/"other"', etag)
+    assert not EtagUtils.matches(None, etag)
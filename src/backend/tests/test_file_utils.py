@@ -0,0 +1,72 @@
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from models.homework_models import StoredFile
+from utils.file_utils import FileUtils, TooManyFilesError
+
+def make_archive(path, entries: dict) -> str:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    return str(path)
+
+@pytest.fixture
+def destination(tmp_path):
+    directory = tmp_path / "staging"
+    directory.mkdir()
+    return directory
+
+def test_extracts_homework_files_and_rejects_the_rest(tmp_path, destination):
+    archive = make_archive(tmp_path / "bulk.zip", {
+        "week1/page1.png": b"png bytes",
+        "week1/worksheet.pdf": b"pdf bytes",
+        "week1/notes.txt": b"not homework",
+        "__MACOSX/week1/._page1.png": b"resource fork",
+        ".DS_Store": b"finder",
+    })
+
+    results = dict(FileUtils().extract_archive(archive, str(destination), max_files=10, max_size=1024))
+
+    assert set(results) == {"page1.png", "worksheet.pdf", "notes.txt"}
+    assert isinstance(results["notes.txt"], str)
+    stored = results["page1.png"]
+    assert isinstance(stored, StoredFile)
+    assert stored.sha256 == hashlib.sha256(b"png bytes").hexdigest()
+    assert stored.size_bytes == len(b"png bytes")
+    with open(stored.file_path, "rb") as f:
+        assert f.read() == b"png bytes"
+    assert len(os.listdir(destination)) == 2
+
+def test_too_many_files_rejects_the_archive(tmp_path, destination):
+    archive = make_archive(tmp_path / "bulk.zip", {f"page{i}.png": b"x" for i in range(4)})
+
+    with pytest.raises(TooManyFilesError):
+        FileUtils().extract_archive(archive, str(destination), max_files=3, max_size=1024)
+    assert os.listdir(destination) == []
+
+def test_hidden_files_do_not_count_towards_the_limit(tmp_path, destination):
+    archive = make_archive(tmp_path / "bulk.zip", {
+        "page1.png": b"x", "page2.png": b"x", "__MACOSX/._page1.png": b"x", ".hidden.png": b"x"
+    })
+
+    results = FileUtils().extract_archive(archive, str(destination), max_files=2, max_size=1024)
+    assert len(results) == 2
+
+def test_oversized_entries_are_rejected_without_leaving_files(tmp_path, destination):
+    archive = make_archive(tmp_path / "bulk.zip", {"small.png": b"x" * 10, "large.png": b"x" * 100})
+
+    results = dict(FileUtils().extract_archive(archive, str(destination), max_files=10, max_size=50))
+
+    assert isinstance(results["small.png"], StoredFile)
+    assert "maximum upload size" in results["large.png"]
+    assert len(os.listdir(destination)) == 1
+
+def test_corrupt_archives_raise(tmp_path, destination):
+    archive = tmp_path / "bulk.zip"
+    archive.write_bytes(b"this is not a zip file")
+
+    with pytest.raises(zipfile.BadZipFile):
+        FileUtils().extract_archive(str(archive), str(destination), max_files=10, max_size=1024)
@@ -0,0 +1,83 @@
+from typing import List
+
+import pytest
+
+from config.config import settings
+from models.homework_models import ExtractedContent, ProblemType, Question
+from services.ai_providers.base_provider import ProviderError
+from services.ai_providers.mock_provider import MockProvider
+from services.math_solver_service import MathSolverService, SolveFailedError
+from services.provider_scheduler import ProviderScheduler
+
+def make_question(number: int) -> Question:
+    return Question(question_number=number, question_text=f"What is {number} + {number}?",
+                    problem_type=ProblemType.CALCULATION)
+
+class VisionProvider(MockProvider):
+    """Mock provider with a vision endpoint returning fixed questions, or failing"""
+
+    def __init__(self, questions: List[Question] = None, error: Exception = None):
+        super().__init__()
+        self.questions = questions or []
+        self.error = error
+
+    async def solve_homework_from_image(self, file_path: str) -> List[Question]:
+        if self.error:
+            raise self.error
+        return self.questions
+
+class FailingProvider(MockProvider):
+    """Mock provider that cannot solve one of the questions"""
+
+    async def solve_single_question(self, question: Question) -> Question:
+        if question.question_number == 2:
+            raise ProviderError("quota exceeded")
+        return await super().solve_single_question(question)
+
+def make_solver(provider) -> MathSolverService:
+    solver = MathSolverService(provider_name="mock", provider_scheduler=ProviderScheduler(4))
+    solver.provider = provider
+    return solver
+
+@pytest.fixture(autouse=True)
+def vision_mode(monkeypatch):
+    monkeypatch.setattr(settings, "SOLVE_MODE", "vision")
+
+async def test_solves_from_the_vision_provider():
+    solver = make_solver(VisionProvider([make_question(1), make_question(2)]))
+
+    solution = await solver.solve_problems_from_image("uploads/page.png")
+    assert solution.total_questions == 2
+
+async def test_provider_errors_are_raised_not_returned_as_solutions():
+    solver = make_solver(VisionProvider(error=ProviderError("file unreadable")))
+
+    with pytest.raises(ProviderError):
+        await solver.solve_problems_from_image("uploads/page.png")
+
+async def test_files_without_questions_fail():
+    solver = make_solver(VisionProvider([]))
+
+    with pytest.raises(SolveFailedError):
+        await solver.solve_problems_from_image("uploads/page.png")
+
+def make_content(*numbers: int) -> ExtractedContent:
+    return ExtractedContent(raw_text="", questions=[make_question(n) for n in numbers],
+                            images_found=1, confidence_score=0.9)
+
+async def test_one_failed_question_keeps_the_other_answers():
+    solver = make_solver(FailingProvider())
+
+    solution = await solver.solve_problems(make_content(1, 2, 3))
+
+    assert [question.question_number for question in solution.questions_solved] == [1, 2, 3]
+    failed = solution.questions_solved[1]
+    assert failed.correct_answer is None
+    assert "quota exceeded" in failed.explanation
+    assert solution.questions_solved[0].correct_answer is not None
+
+async def test_the_solve_fails_when_no_question_was_solved():
+    solver = make_solver(FailingProvider())
+
+    with pytest.raises(ProviderError):
+        await solver.solve_problems(make_content(2))
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from models.homework_models import HomeworkProblem
+from services.repositories.mock_repository import MockRepository
+from utils.pagination_utils import PaginationUtils
+
+def make_problem(problem_id: str, upload_timestamp: datetime, file_hash: str = None) -> HomeworkProblem:
+    return HomeworkProblem(
+        id=problem_id, filename=f"{problem_id}.png", file_path=f"uploads/{problem_id}.png",
+        file_hash=file_hash, upload_timestamp=upload_timestamp
+    )
+
+async def test_unknown_ids_are_missing():
+    repository = MockRepository()
+    assert await repository.get_problem("never-uploaded") is None
+    assert await repository.acquire_solve_lease("never-uploaded", 60) is False
+
+async def test_records_are_kept_until_deleted():
+    repository = MockRepository()
+    problem = make_problem("p1", datetime(2026, 3, 1), file_hash="abc")
+    await repository.create_problem(problem)
+
+    stored = await repository.get_problem("p1")
+    assert stored == problem
+    # Callers get copies; changing one does not change the stored record
+    stored.status = "solved"
+    assert (await repository.get_problem("p1")).status == "uploaded"
+
+    assert await repository.delete_problem(problem) == 0
+    assert await repository.get_problem("p1") is None
+    # Deleting again does not drop a reference a new upload may hold
+    await repository.create_problem(make_problem("p2", datetime(2026, 3, 2), file_hash="abc"))
+    assert await repository.delete_problem(problem) == 1
+
+async def test_failed_solve_only_marks_processing_records():
+    repository = MockRepository()
+    await repository.create_problem(make_problem("p1", datetime(2026, 3, 1)))
+
+    await repository.mark_solve_failed("p1")
+    assert (await repository.get_problem("p1")).status == "uploaded"
+
+    assert await repository.acquire_solve_lease("p1", 60)
+    await repository.mark_solve_failed("p1")
+    assert (await repository.get_problem("p1")).status == "error"
+
+async def test_list_pages_most_recent_first():
+    repository = MockRepository()
+    base = datetime(2026, 3, 1, 9, 0)
+    for i in range(5):
+        await repository.create_problem(make_problem(f"p{i}", base + timedelta(minutes=i // 2)))
+
+    first = await repository.list_problems(limit=3)
+    assert [problem.id for problem in first] == ["p4", "p3", "p2"]
+    start_after = PaginationUtils.decode_cursor(PaginationUtils.encode_cursor(first[-1]))
+    second = await repository.list_problems(limit=3, start_after=start_after)
+    assert [problem.id for problem in second] == ["p1", "p0"]
+
+    expired = await repository.list_problems_uploaded_before(base + timedelta(minutes=1), limit=10)
+    assert [problem.id for problem in expired] == ["p0", "p1"]
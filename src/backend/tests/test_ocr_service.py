@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from models.homework_models import ProblemType, Question
+from services.ocr_service import OCRService
+
+def make_question(number: int) -> Question:
+    return Question(question_number=number, question_text=f"What is {number} + {number}?",
+                    problem_type=ProblemType.CALCULATION)
+
+def drain(queue: asyncio.Queue):
+    questions = []
+    while not queue.empty():
+        question = queue.get_nowait()
+        if question is None:
+            break
+        questions.append(question)
+    return questions
+
+async def test_failure_before_any_question_falls_back_to_mock_content():
+    ocr = OCRService()
+    ocr.tesseract_available = True
+
+    async def fail(image_path, emit=None):
+        raise RuntimeError("tesseract crashed")
+    ocr._extract_from_image = fail
+
+    queue = asyncio.Queue()
+    content = await ocr.extract_content("page.png", queue)
+
+    assert content.questions
+    assert drain(queue) == content.questions
+
+async def test_failure_after_questions_were_emitted_is_raised():
+    ocr = OCRService()
+    ocr.tesseract_available = True
+
+    async def fail_midway(image_path, emit=None):
+        await ocr._emit(emit, [make_question(1)])
+        raise RuntimeError("tesseract crashed")
+    ocr._extract_from_image = fail_midway
+
+    queue = asyncio.Queue()
+    with pytest.raises(RuntimeError, match="tesseract crashed"):
+        await ocr.extract_content("page.png", queue)
+
+    # Only the real question went out, followed by the end-of-stream marker
+    assert drain(queue) == [make_question(1)]
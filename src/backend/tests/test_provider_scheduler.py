@@ -0,0 +1,176 @@
+import asyncio
+
+from services.provider_scheduler import ProviderScheduler, solve_owner, solve_priority
+
+async def hold_slot(scheduler: ProviderScheduler, release: asyncio.Event, **kwargs):
+    """Take a slot and keep it until release is set"""
+    async with scheduler.slot(**kwargs):
+        await release.wait()
+
+async def call(scheduler: ProviderScheduler, order: list, owner: str, priority: str = "interactive"):
+    """A provider call that records when it was granted its slot"""
+    async with scheduler.slot(owner=owner, priority=priority):
+        order.append(owner)
+        await asyncio.sleep(0)
+
+async def queue_calls(scheduler: ProviderScheduler, order: list, calls: list) -> list:
+    """Start calls one after another so they join the queue in this order"""
+    tasks = []
+    for owner, priority in calls:
+        tasks.append(asyncio.create_task(call(scheduler, order, owner, priority)))
+        await asyncio.sleep(0)
+    return tasks
+
+async def test_slots_go_round_robin_between_problems():
+    scheduler = ProviderScheduler(1)
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold_slot(scheduler, release, owner="blocker"))
+    await asyncio.sleep(0)
+
+    order = []
+    tasks = await queue_calls(scheduler, order, [("big", "interactive")] * 3 + [("small", "interactive")])
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    # The one-call problem is not stuck behind every call of the big one
+    assert order == ["big", "small", "big", "big"]
+
+async def test_calls_beyond_capacity_wait_and_all_slots_are_returned():
+    scheduler = ProviderScheduler(2)
+    release = asyncio.Event()
+    holders = [asyncio.create_task(hold_slot(scheduler, release, owner=f"p{i}")) for i in range(5)]
+    await asyncio.sleep(0)
+
+    stats = scheduler.get_stats()
+    assert stats["active_calls"] == 2
+    assert stats["waiting_calls"] == 3
+
+    release.set()
+    await asyncio.gather(*holders)
+    stats = scheduler.get_stats()
+    assert stats["active_calls"] == 0
+    assert stats["waiting_calls"] == 0
+    assert stats["queued_calls"] == 3
+
+async def test_reserved_slots_are_kept_for_their_class():
+    scheduler = ProviderScheduler(2, reservations={"interactive": 1})
+    release = asyncio.Event()
+    batch = [asyncio.create_task(hold_slot(scheduler, release, owner=f"b{i}", priority="batch")) for i in range(2)]
+    await asyncio.sleep(0)
+
+    # Only one batch call runs; the other slot is held back for interactive work
+    assert scheduler.get_stats()["priorities"]["batch"]["active_calls"] == 1
+    assert scheduler.get_stats()["priorities"]["batch"]["waiting_calls"] == 1
+
+    interactive = asyncio.create_task(hold_slot(scheduler, release, owner="student"))
+    await asyncio.sleep(0)
+    assert scheduler.get_stats()["priorities"]["interactive"]["active_calls"] == 1
+
+    release.set()
+    await asyncio.gather(interactive, *batch)
+    assert scheduler.get_stats()["active_calls"] == 0
+
+async def test_unused_reservations_do_not_block_their_own_class():
+    scheduler = ProviderScheduler(2, reservations={"interactive": 1})
+    release = asyncio.Event()
+    holders = [asyncio.create_task(hold_slot(scheduler, release, owner=f"s{i}")) for i in range(2)]
+    await asyncio.sleep(0)
+
+    assert scheduler.get_stats()["priorities"]["interactive"]["active_calls"] == 2
+    release.set()
+    await asyncio.gather(*holders)
+
+async def test_freed_slots_are_shared_between_classes_by_weight():
+    scheduler = ProviderScheduler(1, weights={"interactive": 3, "batch": 1})
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold_slot(scheduler, release, owner="blocker"))
+    await asyncio.sleep(0)
+
+    order = []
+    calls = [(f"b{i}", "batch") for i in range(8)] + [(f"i{i}", "interactive") for i in range(8)]
+    tasks = await queue_calls(scheduler, order, calls)
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    first_eight = order[:8]
+    assert sum(owner.startswith("i") for owner in first_eight) == 6
+    assert sum(owner.startswith("b") for owner in first_eight) == 2
+
+async def test_promotion_moves_queued_calls_ahead():
+    scheduler = ProviderScheduler(1)
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold_slot(scheduler, release, owner="blocker"))
+    await asyncio.sleep(0)
+
+    order = []
+    tasks = await queue_calls(scheduler, order, [("bulk", "batch"), ("upload", "speculative")])
+    scheduler.promote("upload", "interactive")
+
+    priorities = scheduler.get_stats()["priorities"]
+    assert priorities["interactive"]["waiting_calls"] == 1
+    assert priorities["speculative"]["waiting_calls"] == 0
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+    assert order == ["upload", "bulk"]
+
+async def test_promotion_applies_to_later_calls_until_cleared():
+    scheduler = ProviderScheduler(4)
+    scheduler.promote("upload", "interactive")
+
+    async with scheduler.slot(owner="upload", priority="speculative"):
+        assert scheduler.get_stats()["priorities"]["interactive"]["active_calls"] == 1
+
+    scheduler.clear_promotion("upload")
+    async with scheduler.slot(owner="upload", priority="speculative"):
+        assert scheduler.get_stats()["priorities"]["speculative"]["active_calls"] == 1
+
+async def test_promotion_never_lowers_a_class():
+    scheduler = ProviderScheduler(4)
+    scheduler.promote("upload", "interactive")
+    scheduler.promote("upload", "speculative")
+
+    async with scheduler.slot(owner="upload", priority="batch"):
+        assert scheduler.get_stats()["priorities"]["interactive"]["active_calls"] == 1
+
+async def test_cancelled_waiters_leave_the_queue():
+    scheduler = ProviderScheduler(1)
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold_slot(scheduler, release, owner="blocker"))
+    await asyncio.sleep(0)
+
+    waiter = asyncio.create_task(hold_slot(scheduler, release, owner="gone"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert scheduler.get_stats()["waiting_calls"] == 0
+
+    release.set()
+    await blocker
+    assert scheduler.get_stats()["active_calls"] == 0
+
+async def test_owner_and_class_come_from_the_solve_context():
+    scheduler = ProviderScheduler(4)
+
+    async def batch_solve():
+        solve_owner.set("problem-1")
+        solve_priority.set("batch")
+        async with scheduler.slot():
+            pass
+
+    await asyncio.create_task(batch_solve())
+    priorities = scheduler.get_stats()["priorities"]
+    assert priorities["batch"]["calls"] == 1
+    assert priorities["interactive"]["calls"] == 0
+
+def test_parse_classes():
+    assert ProviderScheduler.parse_classes("interactive:6, Batch:3,,") == {"interactive": 6, "batch": 3}
+
+def test_parse_classes_skips_malformed_and_unknown_entries(capsys):
+    values = ProviderScheduler.parse_classes("interactive:six,batch:3,interactve:2,speculative")
+
+    assert values == {"batch": 3}
+    warnings = capsys.readouterr().out
+    assert "'interactive:six'" in warnings
+    assert "'interactve'" in warnings
+    assert "'speculative'" in warnings
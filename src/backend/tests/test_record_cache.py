@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from models.homework_models import HomeworkProblem
+from services.record_cache import MISSING, RecordCache
+
+def make_problem() -> HomeworkProblem:
+    return HomeworkProblem(id="p1", filename="p1.png", file_path="uploads/p1.png",
+                           upload_timestamp=datetime(2026, 3, 1))
+
+def test_callers_get_copies_of_cached_records():
+    cache = RecordCache(max_entries=10, ttl=60)
+    problem = make_problem()
+    cache.put("p1", problem)
+
+    # Neither the caller that stored the record nor one that read it can change the cached copy
+    problem.status = "processing"
+    first = cache.get("p1")
+    first.status = "solved"
+
+    assert cache.get("p1").status == "uploaded"
+    assert cache.peek("p1").status == "uploaded"
+    assert cache.get("p1") is not cache.get("p1")
+
+def test_entries_expire_and_misses_are_only_cached_with_a_negative_ttl():
+    cache = RecordCache(max_entries=10, ttl=0)
+    cache.put("p1", make_problem())
+    assert cache.get("p1") is MISSING
+
+    cache = RecordCache(max_entries=10, ttl=60, negative_ttl=60)
+    cache.put("gone", None)
+    assert cache.get("gone") is None
+    assert cache.get_stats()["negative_hits"] == 1
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.config import settings
+from services.repositories.mock_repository import MockRepository
+from services.repositories.repository_factory import RepositoryFactory
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+def test_sqlite_initialization_errors_are_raised(monkeypatch, tmp_path, executor):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(settings, "SQLITE_DB_PATH", str(blocker / "homework.sqlite3"))
+
+    with pytest.raises(Exception):
+        RepositoryFactory.create_repository("sqlite", executor)
+
+def test_only_unconfigured_default_firestore_falls_back_to_mock(monkeypatch):
+    monkeypatch.delenv("STORAGE_BACKEND", raising=False)
+    monkeypatch.delenv("GOOGLE_APPLICATION_CREDENTIALS", raising=False)
+    monkeypatch.setattr(settings, "FIREBASE_SERVICE_ACCOUNT_PATH", None)
+    assert RepositoryFactory._is_unconfigured_default("firestore")
+    assert not RepositoryFactory._is_unconfigured_default("sqlite")
+
+    monkeypatch.setenv("STORAGE_BACKEND", "firestore")
+    assert not RepositoryFactory._is_unconfigured_default("firestore")
+
+    monkeypatch.delenv("STORAGE_BACKEND")
+    monkeypatch.setattr(settings, "FIREBASE_SERVICE_ACCOUNT_PATH", "service-account.json")
+    assert not RepositoryFactory._is_unconfigured_default("firestore")
+
+def test_mock_backend_is_used_when_chosen(executor):
+    assert isinstance(RepositoryFactory.create_repository("mock", executor), MockRepository)
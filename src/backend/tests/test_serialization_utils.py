@@ -0,0 +1,53 @@
+import json
+from datetime import datetime, timezone
+
+import orjson
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+from models.homework_models import HomeworkProblem, ProblemType, Question, Solution
+from utils.serialization_utils import SolutionSerializer
+
+def make_problem(timestamp: datetime) -> HomeworkProblem:
+    solution = Solution(
+        problem_id="problem",
+        questions_solved=[Question(
+            question_number=1, question_text="What is 2 + 2?", problem_type=ProblemType.MULTIPLE_CHOICE,
+            options=["(1) 3", "(2) 4"], correct_answer="(2)", explanation="2 + 2 = 4", steps=["Add"]
+        )],
+        overall_explanation="Addition", total_questions=1, solved_at=timestamp, processing_time_seconds=1.5
+    )
+    return HomeworkProblem(
+        id="problem", filename="page.png", file_path="uploads/page.png",
+        upload_timestamp=timestamp, solution=solution, status="solved"
+    )
+
+def assert_same_record(body: bytes, problem: HomeworkProblem):
+    """The body decodes to the same record pydantic would produce"""
+    assert HomeworkProblem.model_validate_json(body) == HomeworkProblem.model_validate_json(problem.model_dump_json())
+
+def test_records_read_from_firestore_serialize():
+    # Firestore returns its own datetime subclass for every timestamp field
+    timestamp = DatetimeWithNanoseconds(2026, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    problem = make_problem(timestamp)
+    serializer = SolutionSerializer()
+
+    assert_same_record(serializer.dumps_model(problem), problem)
+    solution = json.loads(serializer.serialize(problem.solution).json)
+    assert datetime.fromisoformat(solution["solved_at"]) == timestamp
+
+    (listed,) = orjson.loads(serializer.dumps_models([problem]))
+    assert datetime.fromisoformat(listed["upload_timestamp"]) == timestamp
+
+def test_plain_records_serialize():
+    problem = make_problem(datetime(2026, 3, 1, 9, 30, 15, 123456))
+    assert_same_record(SolutionSerializer().dumps_model(problem), problem)
+
+def test_each_solution_version_is_serialized_once():
+    problem = make_problem(datetime(2026, 3, 1, 9, 30))
+    serializer = SolutionSerializer()
+
+    first = serializer.serialize(problem.solution)
+    assert serializer.serialize(problem.solution.model_copy()) is first
+    newer = problem.solution.model_copy(update={"solved_at": datetime(2026, 3, 2)})
+    assert serializer.serialize(newer) is not first
+    assert serializer.get_stats()["hits"] == 1
@@ -0,0 +1,266 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from config.config import settings
+from models.homework_models import HomeworkProblem, Solution
+from services.ai_providers.base_provider import ProviderError
+from services.admission_controller import AdmissionController, AdmissionRejectedError
+from services.ai_providers.mock_provider import MockProvider
+from services.math_solver_service import MathSolverService
+from services.provider_scheduler import ProviderScheduler
+from services.solve_coordinator import SolveCoordinator
+
+def make_solution(problem_id: str = "") -> Solution:
+    return Solution(
+        problem_id=problem_id, questions_solved=[], overall_explanation="Solved",
+        total_questions=0, solved_at=datetime.now(), processing_time_seconds=0.1
+    )
+
+def make_problem(problem_id: str, file_hash: str = None) -> HomeworkProblem:
+    return HomeworkProblem(
+        id=problem_id, filename="page.png", file_path=f"uploads/{problem_id}.png",
+        file_hash=file_hash, upload_timestamp=datetime.now()
+    )
+
+class FakeSolver:
+    """Math solver whose solves finish when release is set"""
+
+    def __init__(self, error: Exception = None):
+        self.scheduler = ProviderScheduler(4)
+        self.release = asyncio.Event()
+        self.calls = 0
+        self.error = error
+
+    async def solve_problems_from_image(self, file_path: str) -> Solution:
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return make_solution()
+
+class FakeFirebase:
+    """Record store holding solve leases like the repositories do"""
+
+    def __init__(self):
+        self.records = {}
+        self.leases_refused = 0
+        self.stored = {}
+        self.failed = []
+
+    async def begin_solve(self, problem_id: str) -> bool:
+        if self.leases_refused:
+            self.leases_refused -= 1
+            return False
+        return True
+
+    async def get_homework_problem(self, problem_id: str, use_cache: bool = True):
+        return self.records.get(problem_id)
+
+    async def update_homework_solution(self, problem_id: str, solution: Solution):
+        self.stored[problem_id] = solution
+
+    async def fail_solve(self, problem_id: str):
+        self.failed.append(problem_id)
+
+@pytest.fixture
+def solver():
+    return FakeSolver()
+
+@pytest.fixture
+def firebase():
+    return FakeFirebase()
+
+@pytest.fixture
+def coordinator(solver, firebase):
+    return SolveCoordinator(lambda: solver, lambda: firebase)
+
+async def test_concurrent_requests_share_one_solve(coordinator, solver, firebase):
+    problem = make_problem("problem")
+    requests = [asyncio.create_task(coordinator.solve(problem, problem.file_path)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert coordinator.is_solving("problem")
+
+    solver.release.set()
+    solutions = await asyncio.gather(*requests)
+
+    assert solver.calls == 1
+    assert coordinator.get_stats()["coalesced_requests"] == 2
+    assert all(solution is solutions[0] for solution in solutions)
+    assert firebase.stored["problem"].problem_id == "problem"
+    assert not coordinator.is_solving("problem")
+
+async def test_identical_files_share_one_solver_call(coordinator, solver, firebase):
+    first, second = make_problem("first", "same-hash"), make_problem("second", "same-hash")
+    requests = [asyncio.create_task(coordinator.solve(p, p.file_path)) for p in (first, second)]
+    await asyncio.sleep(0)
+
+    solver.release.set()
+    solutions = await asyncio.gather(*requests)
+
+    assert solver.calls == 1
+    assert coordinator.get_stats()["coalesced_files"] == 1
+    # Each problem stores its own copy of the shared solution
+    assert [solution.problem_id for solution in solutions] == ["first", "second"]
+    assert set(firebase.stored) == {"first", "second"}
+
+async def test_a_caller_disconnecting_does_not_cancel_the_solve(coordinator, solver, firebase):
+    problem = make_problem("problem")
+    leaving = asyncio.create_task(coordinator.solve(problem, problem.file_path))
+    staying = asyncio.create_task(coordinator.solve(problem, problem.file_path))
+    await asyncio.sleep(0)
+
+    leaving.cancel()
+    await asyncio.gather(leaving, return_exceptions=True)
+    solver.release.set()
+
+    assert (await staying).problem_id == "problem"
+    assert "problem" in firebase.stored
+
+async def test_failed_solves_release_the_lease_and_can_be_retried(firebase):
+    solver = FakeSolver(error=RuntimeError("provider down"))
+    coordinator = SolveCoordinator(lambda: solver, lambda: firebase)
+    problem = make_problem("problem")
+    solver.release.set()
+
+    with pytest.raises(RuntimeError):
+        await coordinator.solve(problem, problem.file_path)
+    assert firebase.failed == ["problem"]
+    assert "problem" not in firebase.stored
+
+    solver.error = None
+    await coordinator.solve(problem, problem.file_path)
+    assert solver.calls == 2
+    assert "problem" in firebase.stored
+
+async def test_waits_for_the_worker_holding_the_lease(coordinator, solver, firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SOLVE_LEASE_POLL_SECONDS", 0.01)
+    problem = make_problem("problem")
+    firebase.leases_refused = 1
+    firebase.records["problem"] = problem.model_copy(
+        update={"status": "processing", "processing_started_at": datetime.now()}
+    )
+
+    request = asyncio.create_task(coordinator.solve(problem, problem.file_path))
+    await asyncio.sleep(0.03)
+    assert not request.done()
+
+    # The other worker stores its solution
+    other_solution = make_solution("problem")
+    firebase.records["problem"] = problem.model_copy(update={"status": "solved", "solution": other_solution})
+
+    assert await request == other_solution
+    assert solver.calls == 0
+    assert coordinator.get_stats()["waited_on_other_workers"] == 1
+
+async def test_takes_over_when_the_other_worker_fails(coordinator, solver, firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SOLVE_LEASE_POLL_SECONDS", 0.01)
+    problem = make_problem("problem")
+    firebase.leases_refused = 1
+    firebase.records["problem"] = problem.model_copy(update={"status": "error"})
+    solver.release.set()
+
+    solution = await coordinator.solve(problem, problem.file_path)
+
+    assert solver.calls == 1
+    assert firebase.stored["problem"] is solution
+
+async def test_takes_over_an_expired_lease(coordinator, solver, firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SOLVE_LEASE_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "SOLVE_LEASE_SECONDS", 60)
+    problem = make_problem("problem")
+    firebase.leases_refused = 1
+    firebase.records["problem"] = problem.model_copy(
+        update={"status": "processing", "processing_started_at": datetime(2020, 1, 1)}
+    )
+    solver.release.set()
+
+    await coordinator.solve(problem, problem.file_path)
+    assert solver.calls == 1
+
+async def test_waiting_on_a_deleted_problem_fails(coordinator, firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SOLVE_LEASE_POLL_SECONDS", 0.01)
+    problem = make_problem("problem")
+    firebase.leases_refused = 1
+
+    with pytest.raises(ValueError):
+        await coordinator.solve(problem, problem.file_path)
+
+class BrokenVisionProvider(MockProvider):
+    """Mock provider whose vision calls fail"""
+
+    async def solve_homework_from_image(self, file_path: str):
+        raise ProviderError("quota exceeded")
+
+async def test_provider_failures_are_not_stored_as_solutions(firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SOLVE_MODE", "vision")
+    solver = MathSolverService(provider_name="mock", provider_scheduler=ProviderScheduler(4))
+    solver.provider = BrokenVisionProvider()
+    coordinator = SolveCoordinator(lambda: solver, lambda: firebase)
+    problem = make_problem("problem")
+
+    with pytest.raises(ProviderError):
+        await coordinator.solve(problem, "uploads/problem.png")
+    assert firebase.failed == ["problem"]
+    assert firebase.stored == {}
+
+async def hold_admission(admission: AdmissionController, release: asyncio.Event):
+    async with admission.admit():
+        await release.wait()
+
+async def test_new_solves_need_an_admission_slot(coordinator, solver, firebase):
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold_admission(admission, release))
+    await asyncio.sleep(0)
+
+    problem = make_problem("problem")
+    with pytest.raises(AdmissionRejectedError):
+        await coordinator.solve(problem, problem.file_path, admission=admission)
+    assert solver.calls == 0
+    # Rejected before the lease was taken, so the record is not marked failed
+    assert firebase.failed == []
+
+    release.set()
+    await holder
+
+async def test_a_failed_speculative_solve_is_admitted_before_solving_again(coordinator, solver, firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_SOLVE_ENABLED", True)
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold_admission(admission, release))
+    await asyncio.sleep(0)
+
+    problem = make_problem("problem")
+    solver.error = RuntimeError("provider down")
+    assert coordinator.speculate("problem", problem.file_path)
+    request = asyncio.create_task(coordinator.solve(problem, problem.file_path, admission=admission))
+    await asyncio.sleep(0)
+    solver.release.set()
+
+    # Joining the speculation needed no slot, but the re-solve does and none is free
+    with pytest.raises(AdmissionRejectedError):
+        await request
+    assert solver.calls == 1
+
+    release.set()
+    await holder
+
+async def test_joining_a_speculative_solve_needs_no_admission_slot(coordinator, solver, firebase, monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_SOLVE_ENABLED", True)
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold_admission(admission, release))
+    await asyncio.sleep(0)
+
+    problem = make_problem("problem")
+    assert coordinator.speculate("problem", problem.file_path)
+    solver.release.set()
+
+    solution = await coordinator.solve(problem, problem.file_path, admission=admission)
+    assert solution.problem_id == "problem"
+    assert solver.calls == 1
+
+    release.set()
+    await holder
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.homework_models import HomeworkProblem, Solution
+from services.repositories.sqlite_repository import SQLiteRepository
+from utils.pagination_utils import PaginationUtils
+
+@pytest.fixture
+def repository(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=2)
+    repository = SQLiteRepository(executor, str(tmp_path / "homework.sqlite3"))
+    repository.initialize()
+    yield repository
+    executor.shutdown(wait=True)
+
+def make_problem(problem_id: str, upload_timestamp: datetime, file_hash: str = None) -> HomeworkProblem:
+    return HomeworkProblem(
+        id=problem_id, filename=f"{problem_id}.png", file_path=f"uploads/{problem_id}.png",
+        file_hash=file_hash, upload_timestamp=upload_timestamp
+    )
+
+async def collect_pages(list_page, page_size: int) -> list:
+    """Follow cursors until a short page, returning every page"""
+    pages = []
+    start_after = None
+    while True:
+        page = await list_page(limit=page_size, start_after=start_after)
+        pages.append(page)
+        if len(page) < page_size:
+            return pages
+        start_after = PaginationUtils.decode_cursor(PaginationUtils.encode_cursor(page[-1]))
+
+async def test_cursor_pages_cover_every_record_once_in_order(repository):
+    base = datetime(2026, 3, 1, 9, 0)
+    # Groups of records share a timestamp, so pages must break ties on id
+    problems = [make_problem(f"problem-{i:02d}", base + timedelta(minutes=i // 4)) for i in range(23)]
+    await repository.create_problems(problems)
+
+    pages = await collect_pages(repository.list_problems, page_size=5)
+
+    listed = [problem.id for page in pages for problem in page]
+    expected = [problem.id for problem in sorted(problems, key=lambda p: (p.upload_timestamp, p.id), reverse=True)]
+    assert listed == expected
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+
+async def test_summary_pages_match_full_pages(repository):
+    base = datetime(2026, 3, 1, 9, 0)
+    await repository.create_problems([make_problem(f"problem-{i:02d}", base + timedelta(seconds=i % 3)) for i in range(12)])
+
+    full = await collect_pages(repository.list_problems, page_size=4)
+    summaries = await collect_pages(repository.list_summaries, page_size=4)
+
+    assert [[p.id for p in page] for page in summaries] == [[p.id for p in page] for page in full]
+
+async def test_cursor_pages_are_stable_when_records_are_added(repository):
+    base = datetime(2026, 3, 1, 9, 0)
+    await repository.create_problems([make_problem(f"problem-{i:02d}", base + timedelta(minutes=i)) for i in range(6)])
+
+    first_page = await repository.list_problems(limit=3)
+    await repository.create_problem(make_problem("newest", base + timedelta(days=1)))
+    cursor = PaginationUtils.decode_cursor(PaginationUtils.encode_cursor(first_page[-1]))
+    second_page = await repository.list_problems(limit=3, start_after=cursor)
+
+    assert [p.id for p in first_page] == ["problem-05", "problem-04", "problem-03"]
+    assert [p.id for p in second_page] == ["problem-02", "problem-01", "problem-00"]
+
+async def test_offset_pagination_still_works(repository):
+    base = datetime(2026, 3, 1, 9, 0)
+    await repository.create_problems([make_problem(f"problem-{i:02d}", base + timedelta(minutes=i)) for i in range(5)])
+
+    page = await repository.list_problems(limit=2, offset=2)
+    assert [p.id for p in page] == ["problem-02", "problem-01"]
+
+async def test_solve_lease_is_exclusive_until_it_expires(repository):
+    await repository.create_problem(make_problem("problem", datetime(2026, 3, 1)))
+
+    assert await repository.acquire_solve_lease("problem", lease_seconds=60)
+    assert not await repository.acquire_solve_lease("problem", lease_seconds=60)
+    # An abandoned lease can be taken over once it is older than the lease time
+    assert await repository.acquire_solve_lease("problem", lease_seconds=0)
+
+async def test_failed_solves_only_mark_processing_records(repository):
+    await repository.create_problem(make_problem("problem", datetime(2026, 3, 1)))
+    await repository.acquire_solve_lease("problem", lease_seconds=60)
+    solution = Solution(
+        problem_id="problem", questions_solved=[], overall_explanation="", total_questions=0,
+        solved_at=datetime(2026, 3, 1, 10), processing_time_seconds=1.0
+    )
+    await repository.update_solution("problem", solution)
+
+    # A late failure from another worker must not overwrite the solution
+    await repository.mark_solve_failed("problem")
+    problem = await repository.get_problem("problem")
+    assert problem.status == "solved"
+    assert problem.solution.solved_at == solution.solved_at
+
+async def test_blob_references_follow_deletes(repository):
+    base = datetime(2026, 3, 1)
+    first, second = make_problem("first", base, "abc"), make_problem("second", base, "abc")
+    await repository.create_problems([first, second])
+    assert await repository.get_blob_reference_count("abc") == 2
+
+    assert await repository.delete_problem(first) == 1
+    # Deleting the same record twice does not release the blob again
+    assert await repository.delete_problem(first) == 1
+    assert await repository.delete_problem(second) == 0
@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from services.write_buffer import PendingWrite, WriteBehindBuffer, WriteDroppedError
+
+class FakeBatch:
+    def __init__(self, client: "FakeClient"):
+        self.client = client
+        self.writes = []
+
+    def set(self, document, data, merge=False):
+        self.writes.append((document, data))
+
+    def update(self, document, data):
+        self.writes.append((document, data))
+
+    async def commit(self):
+        self.client.commits += 1
+        if self.client.outages:
+            self.client.outages -= 1
+            raise google_exceptions.ServiceUnavailable("Firestore unavailable")
+        if any(document in self.client.rejected for document, _ in self.writes):
+            raise google_exceptions.InvalidArgument("Invalid document data")
+        self.client.stored.extend(self.writes)
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+
+    def document(self, document_id: str) -> str:
+        return f"{self.name}/{document_id}"
+
+class FakeClient:
+    """Async Firestore client stand-in; rejected documents fail every batch they are in"""
+
+    def __init__(self, rejected=(), outages: int = 0):
+        self.rejected = set(rejected)
+        self.outages = outages
+        self.commits = 0
+        self.stored = []
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(name)
+
+def make_buffer(client: FakeClient, batch_size: int = 100) -> WriteBehindBuffer:
+    return WriteBehindBuffer(lambda: client, batch_size=batch_size, flush_interval=60)
+
+def enqueue(buffer: WriteBehindBuffer, *document_ids: str):
+    for document_id in document_ids:
+        buffer.enqueue(PendingWrite("homework_problems", document_id, {"status": "solved"}, kind="update"))
+
+async def test_writes_are_committed_in_one_batch():
+    client = FakeClient()
+    buffer = make_buffer(client)
+    enqueue(buffer, "a", "b", "c")
+
+    await buffer.flush()
+
+    assert client.commits == 1
+    assert [document for document, _ in client.stored] == [f"homework_problems/{d}" for d in "abc"]
+    assert buffer.get_stats()["writes_committed"] == 3
+    await buffer.close()
+
+async def test_a_rejected_write_does_not_take_the_batch_down():
+    client = FakeClient(rejected={"homework_problems/bad"})
+    buffer = make_buffer(client)
+    enqueue(buffer, "a", "b", "bad", "c", "d", "e")
+
+    with pytest.raises(WriteDroppedError) as excinfo:
+        await buffer.flush()
+
+    assert [write.document_id for write in excinfo.value.writes] == ["bad"]
+    assert "InvalidArgument" in str(excinfo.value)
+    assert sorted(document for document, _ in client.stored) == [f"homework_problems/{d}" for d in "abcde"]
+    stats = buffer.get_stats()
+    assert stats["writes_dropped"] == 1
+    assert stats["pending"] == 0
+    assert "InvalidArgument" in stats["last_error"]
+    await buffer.close()
+
+async def test_later_writes_to_a_rejected_document_are_dropped_with_it():
+    client = FakeClient(rejected={"homework_problems/bad"})
+    buffer = make_buffer(client)
+    buffer.enqueue(PendingWrite("homework_problems", "bad", {"id": "bad"}, merge=True))
+    enqueue(buffer, "ok", "bad")
+
+    with pytest.raises(WriteDroppedError) as excinfo:
+        await buffer.flush()
+
+    assert [write.document_id for write in excinfo.value.writes] == ["bad", "bad"]
+    assert [document for document, _ in client.stored] == ["homework_problems/ok"]
+    await buffer.close()
+
+async def test_transient_failures_are_retried_with_backoff():
+    client = FakeClient(outages=2)
+    buffer = make_buffer(client)
+    buffer.RETRY_BASE_DELAY = 0.05
+    buffer.flush_interval = 0.01
+    enqueue(buffer, "a", "b")
+
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    while buffer.get_stats()["writes_committed"] < 2:
+        await asyncio.sleep(0.01)
+        assert loop.time() - started_at < 2
+
+    # Two failed attempts back off 0.05s then 0.1s, and the batch is retried whole
+    assert loop.time() - started_at >= 0.15
+    assert client.commits == 3
+    assert buffer.get_stats()["writes_retried"] == 4
+    assert buffer.get_stats()["writes_dropped"] == 0
+    await buffer.close()
+
+async def test_writes_are_dropped_after_max_attempts():
+    client = FakeClient(outages=WriteBehindBuffer.MAX_ATTEMPTS)
+    buffer = make_buffer(client)
+    enqueue(buffer, "a")
+
+    for _ in range(WriteBehindBuffer.MAX_ATTEMPTS - 1):
+        await buffer.flush()
+    with pytest.raises(WriteDroppedError):
+        await buffer.flush()
+
+    assert buffer.get_stats()["pending"] == 0
+    assert buffer.get_stats()["writes_dropped"] == 1
+    await buffer.close()
+
+async def test_pending_writes_are_overlaid_until_committed():
+    client = FakeClient()
+    buffer = make_buffer(client)
+    buffer.enqueue(PendingWrite("homework_problems", "a", {"id": "a", "status": "uploaded"}))
+    enqueue(buffer, "a")
+
+    assert buffer.overlay("homework_problems", "a") == (True, {"id": "a", "status": "solved"})
+    assert buffer.get_stats()["writes_coalesced"] == 1
+
+    await buffer.flush()
+    assert buffer.overlay("homework_problems", "a") is None
+    await buffer.close()
+
+async def test_close_retries_through_a_transient_outage():
+    client = FakeClient(outages=2)
+    buffer = make_buffer(client)
+    buffer.RETRY_BASE_DELAY = 0.01
+    enqueue(buffer, "a", "b")
+
+    await buffer.close()
+
+    assert client.commits == 3
+    assert buffer.get_stats()["writes_committed"] == 2
+    assert buffer.get_stats()["pending"] == 0
+
+async def test_close_raises_for_writes_out_of_attempts():
+    client = FakeClient(outages=WriteBehindBuffer.MAX_ATTEMPTS)
+    buffer = make_buffer(client)
+    buffer.RETRY_BASE_DELAY = 0.001
+    enqueue(buffer, "a")
+
+    with pytest.raises(WriteDroppedError):
+        await buffer.close()
+
+    assert client.commits == WriteBehindBuffer.MAX_ATTEMPTS
+    assert buffer.get_stats()["writes_dropped"] == 1
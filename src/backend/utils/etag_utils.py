@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+from models.homework_models import HomeworkProblem
+
+class EtagUtils:
+    """
+    Entity tags for conditional GETs of homework records
+
+    The tag is derived from the record's version (the fields that change when
+    it is solved, leased or fails), so it can be computed without serializing
+    the record and a poll that finds nothing new costs only headers.
+
+    Tags are weak: the same record is sent gzip-compressed or not depending on
+    the client, and a strong tag would claim the two bodies are byte-identical.
+    """
+
+    @staticmethod
+    def for_problem(problem: HomeworkProblem) -> str:
+        """Weak ETag for a homework record"""
+        digest = hashlib.sha256(f"{problem.id}\0{problem.record_version}".encode()).hexdigest()
+        return f'W/"{digest[:32]}"'
+
+    @staticmethod
+    def matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Whether an If-None-Match header matches the current ETag (weak comparison)"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        candidates = (tag.strip() for tag in if_none_match.split(","))
+        return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
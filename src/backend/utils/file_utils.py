@@ -1,16 +1,37 @@
 import os
 import uuid
+import hashlib
+import zipfile
 import aiofiles
 from fastapi import UploadFile
-from typing import List
+from typing import List, Optional, Tuple, Union
 import mimetypes
 
+from config.config import settings
+from models.homework_models import StoredFile
+
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File exceeds the maximum upload size of {FileUtils.format_file_size(max_size)}")
+
+class TooManyFilesError(Exception):
+    """Raised when a bulk upload contains more files than allowed"""
+    
+    def __init__(self, max_files: int):
+        self.max_files = max_files
+        super().__init__(f"Bulk uploads are limited to {max_files} files")
+
 class FileUtils:
     ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf'}
+    ARCHIVE_EXTENSIONS = {'.zip'}
     ALLOWED_MIME_TYPES = {
         'image/png', 'image/jpeg', 'image/jpg', 'application/pdf'
     }
     TEMP_DIR = '/tmp'
+    CHUNK_SIZE = 1024 * 1024  # Bytes read from the upload per iteration
     
     def is_valid_file_type(self, filename: str) -> bool:
         """Check if the uploaded file type is allowed"""
@@ -24,23 +45,124 @@ class FileUtils:
         
         return True
     
+    def is_archive(self, filename: str) -> bool:
+        """Check if the uploaded file is a ZIP archive of homework files"""
+        return bool(filename) and os.path.splitext(filename)[1].lower() in self.ARCHIVE_EXTENSIONS
+    
     def is_valid_mime_type(self, mime_type: str) -> bool:
         """Check if the MIME type is allowed"""
         return mime_type in self.ALLOWED_MIME_TYPES
     
-    async def save_temp_file(self, upload_file: UploadFile) -> str:
-        """Save uploaded file to temporary location"""
+    async def save_upload(self, upload_file: UploadFile, destination_dir: str,
+                          max_size: Optional[int] = None) -> StoredFile:
+        """
+        Stream an upload to its final location in fixed-size chunks
+        
+        The SHA-256 digest and size are computed on the fly, so memory use is
+        constant regardless of file size and the file is written exactly once.
+        Data goes to a ".part" file that is renamed into place only when the
+        whole upload has been received, so readers never see a partial file.
+        
+        Raises FileTooLargeError as soon as more than max_size bytes have been
+        read (defaults to settings.MAX_FILE_SIZE).
+        """
+        max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+        
+        # Reject early when the multipart parser already knows the size
+        if upload_file.size is not None and upload_file.size > max_size:
+            raise FileTooLargeError(max_size)
+        
         # Generate unique filename
-        file_extension = os.path.splitext(upload_file.filename)[1].lower()
-        temp_filename = f"{uuid.uuid4()}{file_extension}"
-        temp_file_path = os.path.join(self.TEMP_DIR, temp_filename)
+        file_extension = os.path.splitext(upload_file.filename or "")[1].lower()
+        file_path = os.path.join(destination_dir, f"{uuid.uuid4()}{file_extension}")
+        part_path = file_path + ".part"
+        
+        digest = hashlib.sha256()
+        size_bytes = 0
+        try:
+            async with aiofiles.open(part_path, 'wb') as f:
+                while True:
+                    chunk = await upload_file.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size_bytes += len(chunk)
+                    if size_bytes > max_size:
+                        raise FileTooLargeError(max_size)
+                    digest.update(chunk)
+                    await f.write(chunk)
+            os.replace(part_path, file_path)
+        except BaseException:
+            # Never leave partial uploads behind (size limit, client disconnect, cancellation)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        
+        return StoredFile(file_path=file_path, sha256=digest.hexdigest(), size_bytes=size_bytes)
+    
+    def extract_archive(self, archive_path: str, destination_dir: str, max_files: int,
+                        max_size: Optional[int] = None) -> List[Tuple[str, Union[StoredFile, str]]]:
+        """
+        Stream the homework files out of a ZIP archive (blocking)
+        
+        Each entry is decompressed in chunks straight to a staged file and
+        hashed on the way, like save_upload. Returns (entry name, StoredFile)
+        for extracted entries and (entry name, reason) for rejected ones.
+        Directories and hidden files (e.g. __MACOSX) are skipped. Entry sizes
+        are enforced while decompressing, not trusted from the archive header.
+        
+        Raises TooManyFilesError when the archive holds more than max_files
+        homework files, and zipfile.BadZipFile for corrupt archives.
+        """
+        max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+        results = []
         
-        # Save file
-        async with aiofiles.open(temp_file_path, 'wb') as f:
-            content = await upload_file.read()
-            await f.write(content)
+        with zipfile.ZipFile(archive_path) as archive:
+            entries = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not any(part.startswith(('.', '__MACOSX')) for part in info.filename.split('/'))
+            ]
+            if len(entries) > max_files:
+                raise TooManyFilesError(max_files)
+            
+            for info in entries:
+                name = os.path.basename(info.filename)
+                if not self.is_valid_file_type(name):
+                    results.append((name, "Invalid file type. Please upload PNG, JPG, JPEG, or PDF files."))
+                    continue
+                if info.file_size > max_size:
+                    results.append((name, str(FileTooLargeError(max_size))))
+                    continue
+                
+                file_path = os.path.join(destination_dir, f"{uuid.uuid4()}{os.path.splitext(name)[1].lower()}")
+                part_path = file_path + ".part"
+                digest = hashlib.sha256()
+                size_bytes = 0
+                try:
+                    with archive.open(info) as source, open(part_path, 'wb') as f:
+                        while True:
+                            chunk = source.read(self.CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            size_bytes += len(chunk)
+                            if size_bytes > max_size:
+                                raise FileTooLargeError(max_size)
+                            digest.update(chunk)
+                            f.write(chunk)
+                    os.replace(part_path, file_path)
+                except (FileTooLargeError, zipfile.BadZipFile, NotImplementedError) as e:
+                    # NotImplementedError: unsupported compression method or encryption
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    results.append((name, str(e) or "Unsupported archive entry"))
+                    continue
+                except BaseException:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    raise
+                
+                results.append((name, StoredFile(file_path=file_path, sha256=digest.hexdigest(), size_bytes=size_bytes)))
         
-        return temp_file_path
+        return results
     
     def cleanup_temp_file(self, file_path: str):
         """Remove temporary file"""
@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple, Union
+
+from models.homework_models import HomeworkProblem, HomeworkSummary
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+class PaginationUtils:
+    """
+    Opaque cursor tokens for keyset pagination of homework problems
+
+    A cursor encodes the sort key of the last item on a page
+    (upload_timestamp, id), so the next page starts right after it instead of
+    skipping over every earlier record.
+    """
+
+    @staticmethod
+    def encode_cursor(problem: Union[HomeworkProblem, HomeworkSummary]) -> str:
+        """Build the cursor that continues after the given problem"""
+        payload = json.dumps({"ts": problem.upload_timestamp.isoformat(), "id": problem.id}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Return the (upload_timestamp, id) sort key stored in a cursor"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(payload["ts"]), str(payload["id"])
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+            raise InvalidCursorError(f"Invalid pagination cursor: {cursor}") from e
@@ -0,0 +1,56 @@
+import re
+import shutil
+import subprocess
+from typing import List
+
+from config.config import settings
+
+class PDFUtils:
+    """Helpers for reading the embedded text layer of born-digital PDFs"""
+
+    # Characters that count as real content when deciding if a page has a text layer
+    _CONTENT_CHARS = re.compile(r'[A-Za-z0-9]')
+
+    def __init__(self):
+        self.pdftotext_cmd = shutil.which('pdftotext')
+
+    @property
+    def is_available(self) -> bool:
+        """pdftotext ships with poppler, which pdf2image already requires"""
+        return self.pdftotext_cmd is not None
+
+    def extract_text_layer(self, pdf_path: str) -> List[str]:
+        """
+        Extract the embedded text of every page, preserving the physical layout
+
+        Returns one string per page (empty for pages without a text layer).
+        Returns an empty list if the text layer could not be read at all.
+        """
+        if not self.is_available:
+            return []
+
+        try:
+            result = subprocess.run(
+                [self.pdftotext_cmd, '-layout', '-enc', 'UTF-8', pdf_path, '-'],
+                capture_output=True,
+                timeout=settings.PDF_TEXT_LAYER_TIMEOUT_SECONDS
+            )
+        except (subprocess.TimeoutExpired, OSError) as e:
+            print(f"⚠️  Could not read PDF text layer: {e}")
+            return []
+
+        if result.returncode != 0:
+            return []
+
+        # pdftotext separates pages with a form feed and terminates the last one with it too
+        pages = result.stdout.decode('utf-8', errors='replace').split('\f')
+        if pages and not pages[-1].strip():
+            pages = pages[:-1]
+
+        return [page.rstrip() for page in pages]
+
+    def has_text_layer(self, page_text: str) -> bool:
+        """Check whether a page's embedded text is substantial enough to skip OCR"""
+        if not page_text:
+            return False
+        return len(self._CONTENT_CHARS.findall(page_text)) >= settings.PDF_TEXT_LAYER_MIN_CHARS
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from models.homework_models import Solution
+
+def _default(value: Any) -> Any:
+    """
+    Encode what orjson does not: datetime subclasses
+
+    Records read back from Firestore carry DatetimeWithNanoseconds, which
+    orjson rejects although it is a datetime.
+    """
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class SerializedSolution:
+    """A solution rendered once: the plain dict (for Firestore) and its JSON bytes"""
+
+    __slots__ = ("data", "json")
+
+    def __init__(self, data: Dict[str, Any], json: bytes):
+        self.data = data
+        self.json = json
+
+class SolutionSerializer:
+    """
+    Serializes each solution version once
+
+    A 40-question solution is a large nested model. It is dumped once per
+    version (problem_id, solved_at) and the result is shared: Firestore
+    stores the dict, SQLite and HTTP responses use the JSON bytes, and records
+    and batch results that contain the solution reuse the dict, leaving orjson
+    only the (cheap) encoding step.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], SerializedSolution]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _version(solution: Solution) -> Tuple[str, str]:
+        return solution.problem_id, solution.solved_at.isoformat()
+
+    def serialize(self, solution: Solution) -> SerializedSolution:
+        """Dict and JSON forms of a solution, from the cache when this version was seen before"""
+        key = self._version(solution)
+        with self._lock:
+            serialized = self._entries.get(key)
+            if serialized is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return serialized
+            self.misses += 1
+
+        data = solution.model_dump()
+        serialized = SerializedSolution(data, orjson.dumps(data, default=_default))
+        with self._lock:
+            self._entries[key] = serialized
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return serialized
+
+    def to_data(self, model: BaseModel) -> Dict[str, Any]:
+        """Plain dict of a response model, reusing the cached dump of any solution it holds"""
+        solutions = {
+            name: value for name in type(model).model_fields
+            if isinstance(value := getattr(model, name), Solution)
+        }
+        if not solutions:
+            return model.model_dump()
+
+        data = model.model_dump(exclude=set(solutions))
+        # Rebuild in field order so the output matches the model's own serialization
+        ordered = {}
+        for name in type(model).model_fields:
+            if name in solutions:
+                ordered[name] = self.serialize(solutions[name]).data
+            elif name in data:
+                ordered[name] = data[name]
+        return ordered
+
+    def dumps_model(self, model: BaseModel) -> bytes:
+        """JSON for a response model"""
+        return orjson.dumps(self.to_data(model), default=_default)
+
+    def dumps_models(self, models: Iterable[BaseModel]) -> bytes:
+        """JSON array of response models"""
+        return orjson.dumps([self.to_data(model) for model in models], default=_default)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+class ORJSONBytesResponse(Response):
+    """
+    JSON response for bodies already serialized by SolutionSerializer
+
+    Returning it from a route skips FastAPI's response-model validation and
+    encoding, which would otherwise walk the whole solution again.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: bytes, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+        super().__init__(content=content, status_code=status_code, headers=headers)
+
+# Shared by the routes and the repositories so both use the same cached bytes
+solution_serializer = SolutionSerializer()
@@ -138,6 +138,35 @@ class HomeworkProblem {
   Map<String, dynamic> toJson() => _$HomeworkProblemToJson(this);
 }
 
+/// Lightweight history entry returned by GET /homework (no solution payload)
+@JsonSerializable()
+class HomeworkSummary {
+  final String id;
+  final String filename;
+  final String status;
+  
+  @JsonKey(name: 'upload_timestamp')
+  final DateTime uploadTimestamp;
+  
+  @JsonKey(name: 'solved_at')
+  final DateTime? solvedAt;
+  
+  @JsonKey(name: 'question_count')
+  final int? questionCount;
+
+  HomeworkSummary({
+    required this.id,
+    required this.filename,
+    this.status = 'uploaded',
+    required this.uploadTimestamp,
+    this.solvedAt,
+    this.questionCount,
+  });
+
+  factory HomeworkSummary.fromJson(Map<String, dynamic> json) => _$HomeworkSummaryFromJson(json);
+  Map<String, dynamic> toJson() => _$HomeworkSummaryToJson(this);
+}
+
 @JsonSerializable()
 class UploadResponse {
   @JsonKey(name: 'problem_id')
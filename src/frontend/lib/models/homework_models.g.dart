@@ -105,6 +105,28 @@ Map<String, dynamic> _$HomeworkProblemToJson(HomeworkProblem instance) =>
       'status': instance.status,
     };
 
+HomeworkSummary _$HomeworkSummaryFromJson(Map<String, dynamic> json) =>
+    HomeworkSummary(
+      id: json['id'] as String,
+      filename: json['filename'] as String,
+      status: json['status'] as String? ?? 'uploaded',
+      uploadTimestamp: DateTime.parse(json['upload_timestamp'] as String),
+      solvedAt: json['solved_at'] == null
+          ? null
+          : DateTime.parse(json['solved_at'] as String),
+      questionCount: json['question_count'] as int?,
+    );
+
+Map<String, dynamic> _$HomeworkSummaryToJson(HomeworkSummary instance) =>
+    <String, dynamic>{
+      'id': instance.id,
+      'filename': instance.filename,
+      'status': instance.status,
+      'upload_timestamp': instance.uploadTimestamp.toIso8601String(),
+      'solved_at': instance.solvedAt?.toIso8601String(),
+      'question_count': instance.questionCount,
+    };
+
 UploadResponse _$UploadResponseFromJson(Map<String, dynamic> json) =>
     UploadResponse(
       problemId: json['problem_id'] as String,
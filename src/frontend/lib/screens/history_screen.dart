@@ -18,7 +18,7 @@ class HistoryScreen extends StatefulWidget {
 
 class _HistoryScreenState extends State<HistoryScreen> {
   final ApiService _apiService = ApiService();
-  List<HomeworkProblem> _problems = [];
+  List<HomeworkSummary> _problems = [];
   bool _isLoading = false;
   bool _hasError = false;
   String _errorMessage = '';
@@ -271,14 +271,24 @@ class _HistoryScreenState extends State<HistoryScreen> {
     await _loadProblems();
   }
 
-  void _openProblem(HomeworkProblem problem) {
+  Future<void> _openProblem(HomeworkSummary problem) async {
     if (Helpers.isProblemSolved(problem)) {
+      // The history list carries summaries only; fetch the solution
+      final HomeworkProblem record;
+      try {
+        record = await _apiService.getHomeworkProblem(problem.id);
+      } catch (e) {
+        _showErrorDialog(e.toString());
+        return;
+      }
+      if (!mounted || record.solution == null) return;
+      
       // Navigate to solution screen
       Navigator.of(context).push(
         MaterialPageRoute(
           builder: (context) => SolutionScreen(
-            problemId: problem.id,
-            solution: problem.solution!,
+            problemId: record.id,
+            solution: record.solution!,
           ),
         ),
       );
@@ -288,7 +298,7 @@ class _HistoryScreenState extends State<HistoryScreen> {
     }
   }
 
-  void _showProblemDetailsDialog(HomeworkProblem problem) {
+  void _showProblemDetailsDialog(HomeworkSummary problem) {
     showDialog(
       context: context,
       builder: (context) => AlertDialog(
@@ -302,9 +312,9 @@ class _HistoryScreenState extends State<HistoryScreen> {
             Text('Status: ${Helpers.getStatusName(problem.status)}'),
             const SizedBox(height: 8),
             Text('Uploaded: ${Helpers.formatDetailedDateTime(problem.uploadTimestamp)}'),
-            if (problem.extractedContent != null) ...[
+            if (problem.questionCount != null) ...[
               const SizedBox(height: 8),
-              Text('Questions found: ${problem.extractedContent!.questions.length}'),
+              Text('Questions found: ${problem.questionCount}'),
             ],
           ],
         ),
@@ -326,7 +336,7 @@ class _HistoryScreenState extends State<HistoryScreen> {
     );
   }
 
-  void _retryProblem(HomeworkProblem problem) {
+  void _retryProblem(HomeworkSummary problem) {
     // TODO: Implement retry functionality
     ScaffoldMessenger.of(context).showSnackBar(
       const SnackBar(
@@ -335,7 +345,7 @@ class _HistoryScreenState extends State<HistoryScreen> {
     );
   }
 
-  Future<void> _deleteProblem(HomeworkProblem problem) async {
+  Future<void> _deleteProblem(HomeworkSummary problem) async {
     final confirmed = await _showDeleteConfirmationDialog(problem);
     if (!confirmed) return;
 
@@ -358,7 +368,7 @@ class _HistoryScreenState extends State<HistoryScreen> {
     }
   }
 
-  Future<bool> _showDeleteConfirmationDialog(HomeworkProblem problem) async {
+  Future<bool> _showDeleteConfirmationDialog(HomeworkSummary problem) async {
     return await showDialog<bool>(
       context: context,
       builder: (context) => AlertDialog(
@@ -89,8 +89,8 @@ class ApiService {
     }
   }
 
-  /// List recent homework problems
-  Future<List<HomeworkProblem>> listHomeworkProblems({
+  /// List recent homework problems as summaries (fetch a problem for its solution)
+  Future<List<HomeworkSummary>> listHomeworkProblems({
     int limit = 10,
     int offset = 0,
   }) async {
@@ -105,7 +105,7 @@ class ApiService {
       
       if (response.statusCode == 200) {
         List<dynamic> data = response.data;
-        return data.map((json) => HomeworkProblem.fromJson(json)).toList();
+        return data.map((json) => HomeworkSummary.fromJson(json)).toList();
       } else {
         throw ApiException('List problems failed: ${response.statusMessage}');
       }
@@ -128,9 +128,9 @@ class Helpers {
   }
   
   /// Generate problem summary
-  static String generateProblemSummary(HomeworkProblem problem) {
-    if (problem.extractedContent != null) {
-      final questions = problem.extractedContent!.questions.length;
+  static String generateProblemSummary(HomeworkSummary problem) {
+    if (problem.questionCount != null) {
+      final questions = problem.questionCount!;
       if (questions == 1) {
         return '1 question';
       } else {
@@ -158,17 +158,17 @@ class Helpers {
   }
   
   /// Check if problem has been solved
-  static bool isProblemSolved(HomeworkProblem problem) {
-    return problem.solution != null && problem.status == 'solved';
+  static bool isProblemSolved(HomeworkSummary problem) {
+    return problem.status == 'solved';
   }
   
   /// Check if problem is being processed
-  static bool isProblemProcessing(HomeworkProblem problem) {
+  static bool isProblemProcessing(HomeworkSummary problem) {
     return problem.status == 'processing';
   }
   
   /// Check if problem has error
-  static bool isProblemError(HomeworkProblem problem) {
+  static bool isProblemError(HomeworkSummary problem) {
     return problem.status == 'error';
   }
 }
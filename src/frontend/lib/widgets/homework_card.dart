@@ -6,7 +6,7 @@ import '../utils/constants.dart';
 import '../utils/helpers.dart';
 
 class HomeworkCard extends StatelessWidget {
-  final HomeworkProblem problem;
+  final HomeworkSummary problem;
   final VoidCallback onTap;
   final VoidCallback onDelete;
 
@@ -206,11 +206,7 @@ class HomeworkCard extends StatelessWidget {
             color: AppTheme.textSecondary,
           ),
         ),
-        if (problem.extractedContent != null) ...[
-          const SizedBox(height: 8),
-          _buildContentInfo(),
-        ],
-        if (problem.solution != null) ...[
+        if (problem.solvedAt != null) ...[
           const SizedBox(height: 8),
           _buildSolutionInfo(),
         ],
@@ -218,40 +214,20 @@ class HomeworkCard extends StatelessWidget {
     );
   }
 
-  Widget _buildContentInfo() {
-    final content = problem.extractedContent!;
-    return Wrap(
-      spacing: 8,
-      runSpacing: 4,
-      children: [
-        _buildInfoChip(
-          icon: MdiIcons.formatListNumbered,
-          label: '${content.questions.length} questions',
-          color: AppTheme.primaryColor,
-        ),
-        _buildInfoChip(
-          icon: MdiIcons.target,
-          label: Helpers.formatConfidenceScore(content.confidenceScore),
-          color: AppTheme.successColor,
-        ),
-      ],
-    );
-  }
-
   Widget _buildSolutionInfo() {
-    final solution = problem.solution!;
     return Wrap(
       spacing: 8,
       runSpacing: 4,
       children: [
-        _buildInfoChip(
-          icon: MdiIcons.checkCircle,
-          label: '${solution.questionsSolved.length} solved',
-          color: AppTheme.successColor,
-        ),
+        if (problem.questionCount != null)
+          _buildInfoChip(
+            icon: MdiIcons.checkCircle,
+            label: '${problem.questionCount} solved',
+            color: AppTheme.successColor,
+          ),
         _buildInfoChip(
           icon: MdiIcons.timerOutline,
-          label: Helpers.formatProcessingTime(solution.processingTimeSeconds),
+          label: Helpers.formatDateTime(problem.solvedAt!),
           color: AppTheme.warningColor,
         ),
       ],